@@ -0,0 +1,81 @@
+"""
+Concurrency vs. latency benchmark for the /message handlers.
+
+Boots the stub LLM and the unified backend as subprocesses, then fires N
+concurrent triage requests per level and reports p50/p99 latency.
+
+    python -m benchmarks.bench_concurrency --levels 10,50,100,200,400
+
+Use --workdir to run the same benchmark against another checkout (e.g. a
+`git worktree` of an older commit) to compare before/after.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from typing import List
+
+import httpx
+
+from benchmarks.harness import percentile, serve, stub_env
+
+
+async def run_level(client: httpx.AsyncClient, url: str, concurrency: int) -> dict:
+    async def one(i: int) -> float:
+        payload = {"message": {"role": "user", "content": f"Diabetes management slides #{i}"}}
+        started = time.perf_counter()
+        response = await client.post(url, json=payload)
+        response.raise_for_status()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(one(i) for i in range(concurrency)), return_exceptions=True)
+    wall = time.perf_counter() - started
+    latencies = [o for o in outcomes if isinstance(o, float)] or [float("nan")]
+    return {
+        "concurrency": concurrency,
+        "errors": concurrency - len([o for o in outcomes if isinstance(o, float)]),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "wall_s": wall,
+    }
+
+
+async def drive(base_url: str, levels: List[int]) -> List[dict]:
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(limits=limits, timeout=300) as client:
+        return [await run_level(client, f"{base_url}/triage/message", level) for level in levels]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", default="10,50,100,200,400")
+    parser.add_argument("--latency-ms", default="500", help="stub LLM latency per call")
+    parser.add_argument("--workdir", default=os.getcwd(), help="checkout to run the backend from")
+    parser.add_argument("--app-port", type=int, default=8700)
+    parser.add_argument("--llm-port", type=int, default=9100)
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.levels.split(",")]
+    env = stub_env(args.llm_port, STUB_LLM_LATENCY_MS=args.latency_ms)
+    # The stub always runs from this checkout so --workdir can point at older trees
+    llm_env = dict(env, PYTHONPATH=os.getcwd())
+
+    with serve("benchmarks.stub_llm:app", args.llm_port, os.getcwd(), llm_env):
+        with serve("services.main:app", args.app_port, args.workdir, env):
+            results = asyncio.run(drive(f"http://127.0.0.1:{args.app_port}", levels))
+
+    print(f"{'concurrency':>11} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9} {'wall s':>8} {'errors':>7}")
+    for row in results:
+        print(
+            f"{row['concurrency']:>11} {row['p50_ms']:>9.0f} {row['p99_ms']:>9.0f} "
+            f"{row['mean_ms']:>9.0f} {row['wall_s']:>8.2f} {row['errors']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Gamma polling load: many decks generating at once against the fake Gamma API.
+
+Boots benchmarks.fake_gamma and the unified backend with GAMMA_API_URL pointed
+at it, submits --decks presentation tasks concurrently, follows each task's
+stream until it finishes and reports how many polls Gamma received, the peak
+poll rate and how long after Gamma finished each deck was reported ready.
+
+    python -m benchmarks.bench_gamma_poll --decks 50 --duration-s 10 --rps 5
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import List, Tuple
+
+import httpx
+
+from benchmarks.harness import percentile, serve, stub_env
+
+
+async def run_deck(http: httpx.AsyncClient, base_url: str, index: int) -> Tuple[str, float]:
+    response = await http.post(
+        f"{base_url}/presentation/message",
+        json={"message": {"role": "user", "content": f"Deck {index}: diabetes management overview"}},
+        timeout=30,
+    )
+    response.raise_for_status()
+    task_id = response.json()["task_id"]
+    submitted = time.perf_counter()
+    state = "unknown"
+    async with http.stream(
+        "GET", f"{base_url}/presentation/message/stream", params={"task_id": task_id}, timeout=None
+    ) as stream:
+        async for line in stream.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            event = json.loads(line[5:])
+            if event.get("event") == "task-status" and event.get("state") in ("completed", "failed", "canceled"):
+                state = event["state"]
+                break
+    return state, time.perf_counter() - submitted
+
+
+async def drive(base_url: str, decks: int) -> List[Tuple[str, float]]:
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=None)) as http:
+        return await asyncio.gather(*(run_deck(http, base_url, i) for i in range(decks)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--decks", type=int, default=50)
+    parser.add_argument("--duration-s", default="10", help="how long each fake generation takes")
+    parser.add_argument("--rps", default="5", help="GAMMA_POLL_RPS budget")
+    parser.add_argument("--rate-limit-ratio", default="0", help="fraction of polls the fake answers with 429")
+    parser.add_argument("--app-port", type=int, default=8721)
+    parser.add_argument("--gamma-port", type=int, default=9201)
+    parser.add_argument("--llm-port", type=int, default=9121)
+    args = parser.parse_args()
+
+    gamma_url = f"http://127.0.0.1:{args.gamma_port}"
+    env = stub_env(
+        args.llm_port,
+        GAMMA_API_KEY="fake",
+        GAMMA_API_URL=gamma_url,
+        GAMMA_POLL_RPS=args.rps,
+        FAKE_GAMMA_DURATION_S=args.duration_s,
+        FAKE_GAMMA_429_RATIO=args.rate_limit_ratio,
+        PRESENTATION_MAX_CONCURRENCY=str(max(32, args.decks)),
+    )
+    with serve("benchmarks.fake_gamma:app", args.gamma_port, os.getcwd(), env):
+        with serve("services.main:app", args.app_port, os.getcwd(), env):
+            results = asyncio.run(drive(f"http://127.0.0.1:{args.app_port}", args.decks))
+            gamma = httpx.get(f"{gamma_url}/stats").json()
+
+    duration = float(args.duration_s)
+    completed = [elapsed for state, elapsed in results if state == "completed"]
+    print(f"decks completed: {len(completed)}/{args.decks}")
+    print(f"gamma polls: {gamma['polls']} ({gamma['polls'] / max(1, args.decks):.1f}/deck, "
+          f"a fixed 2s loop would need ~{duration / 2:.0f}/deck)")
+    print(f"peak polls/s: {gamma['peak_polls_per_second']} (budget {args.rps})")
+    if completed:
+        lag = [max(0.0, elapsed - duration) for elapsed in completed]
+        print(f"ready after gamma finished: p50 {percentile(lag, 50):.2f}s p95 {percentile(lag, 95):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Tail latency with and without hedged LLM requests across two stub providers.
+
+Boots two stub LLMs with a heavy latency tail (a share of calls wait an extra
+--tail-ms) and runs the unified backend with research routed to both
+("stub_a" and "stub_b"). The same batch of research tasks runs once with
+hedging off and once with LLM_HEDGE=1, and p50/p95/p99 task latency and the
+stub call counts are compared.
+
+    python -m benchmarks.bench_hedging --tasks 200 --tail-rate 0.1 --tail-ms 3000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.harness import percentile, serve, stub_env
+
+
+async def run_task(http: httpx.AsyncClient, base_url: str, index: int) -> float:
+    started = time.perf_counter()
+    response = await http.post(
+        f"{base_url}/research/message",
+        json={
+            "message": {"role": "user", "content": f"hedging topic {index}"},
+            "metadata": {"blocking": True, "cache": "bypass", "profile": "latency"},
+        },
+        timeout=None,
+    )
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def drive(base_url: str, tasks: int, concurrency: int) -> List[float]:
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> float:
+        async with limit:
+            return await run_task(http, base_url, i)
+
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=None)) as http:
+        return await asyncio.gather(*(one(i) for i in range(tasks)))
+
+
+def run(args: argparse.Namespace, hedge: bool) -> Dict[str, object]:
+    ports = {"stub_a": args.llm_port, "stub_b": args.llm_port + 1}
+    env = stub_env(
+        args.llm_port,
+        STUB_LLM_LATENCY_MS=args.latency_ms,
+        STUB_LLM_TOKEN_MS="1",
+        STUB_LLM_TAIL_RATE=args.tail_rate,
+        STUB_LLM_TAIL_MS=args.tail_ms,
+        RESEARCH_LLM="stub_a:gpt-4o,stub_b:gpt-4o",
+        RESEARCH_LLM_ROUTING="ordered",
+        LLM_HEDGE="1" if hedge else "0",
+        RESULT_CACHE="0",
+        **{f"{name.upper()}_BASE_URL": f"http://127.0.0.1:{port}/v1" for name, port in ports.items()},
+    )
+    app_url = f"http://127.0.0.1:{args.app_port}"
+    with serve("benchmarks.stub_llm:app", ports["stub_a"], os.getcwd(), env):
+        with serve("benchmarks.stub_llm:app", ports["stub_b"], os.getcwd(), env):
+            with serve("services.main:app", args.app_port, os.getcwd(), env):
+                latencies = asyncio.run(drive(app_url, args.tasks, args.concurrency))
+                calls = {name: httpx.get(f"http://127.0.0.1:{port}/stats").json()["requests"] for name, port in ports.items()}
+                routes = httpx.get(f"{app_url}/stats/llm").json()
+    return {"latencies": latencies, "calls": calls, "routes": routes}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--latency-ms", default="200", help="stub time to first token")
+    parser.add_argument("--tail-rate", default="0.1", help="share of calls hit by the tail")
+    parser.add_argument("--tail-ms", default="3000", help="extra latency for tail calls")
+    parser.add_argument("--app-port", type=int, default=8751)
+    parser.add_argument("--llm-port", type=int, default=9171)
+    args = parser.parse_args()
+
+    print(f"{'hedging':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'stub_a':>7} {'stub_b':>7}")
+    for hedge in (False, True):
+        result = run(args, hedge)
+        latencies = result["latencies"]
+        print(
+            f"{'on' if hedge else 'off':>8} {percentile(latencies, 50) * 1000:>8.0f} "
+            f"{percentile(latencies, 95) * 1000:>8.0f} {percentile(latencies, 99) * 1000:>8.0f} "
+            f"{result['calls']['stub_a']:>7} {result['calls']['stub_b']:>7}"
+        )
+        if hedge:
+            print(json.dumps(result["routes"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Per-hop overhead of the orchestrator's transport.
+
+Times the calls the orchestrator makes on every hop, against a task that has
+already completed, so agent work is left out:
+
+  resubscribe  POST /research/tasks/resubscribe
+  stream       GET /research/message/stream (history replay up to the terminal event)
+
+through three transports:
+
+  connect      a new client per call (a fresh TCP connection each hop, like httpx.post)
+  pooled       the orchestrator's long-lived keep-alive client (HTTP/2 when h2 is installed)
+  in-process   StreamingASGITransport calling services.main's app directly, no sockets
+
+    python -m benchmarks.bench_hop --hops 500
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+from benchmarks.harness import percentile, serve, stub_env
+from client.transport import IN_PROCESS_URL, http2_enabled, make_client
+
+MODES = ("connect", "pooled", "in-process")
+
+
+async def completed_task(http: httpx.AsyncClient, base_url: str) -> str:
+    response = await http.post(
+        f"{base_url}/research/message",
+        json={"message": {"role": "user", "content": "hypertension basics"}, "metadata": {"blocking": True}},
+        timeout=60,
+    )
+    response.raise_for_status()
+    return response.json()["task_id"]
+
+
+async def resubscribe(http: httpx.AsyncClient, base_url: str, task_id: str) -> None:
+    response = await http.post(f"{base_url}/research/tasks/resubscribe", json={"task_id": task_id})
+    response.raise_for_status()
+
+
+async def stream(http: httpx.AsyncClient, base_url: str, task_id: str) -> None:
+    async with http.stream("GET", f"{base_url}/research/message/stream", params={"task_id": task_id}) as response:
+        response.raise_for_status()
+        async for _ in response.aiter_bytes():
+            pass
+
+
+async def measure(
+    mode: str, base_url: str, call: Callable[[httpx.AsyncClient, str, str], Awaitable[None]], hops: int
+) -> List[float]:
+    shared = make_client("asgi" if mode == "in-process" else "network")
+    try:
+        task_id = await completed_task(shared, base_url)
+        # Warm up: imports, connection setup, first-request paths
+        for _ in range(10):
+            await call(shared, base_url, task_id)
+        samples = []
+        for _ in range(hops):
+            started = time.perf_counter()
+            if mode == "connect":
+                async with httpx.AsyncClient() as http:
+                    await call(http, base_url, task_id)
+            else:
+                await call(shared, base_url, task_id)
+            samples.append(time.perf_counter() - started)
+        return samples
+    finally:
+        await shared.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hops", type=int, default=500)
+    parser.add_argument("--app-port", type=int, default=8731)
+    parser.add_argument("--llm-port", type=int, default=9131)
+    args = parser.parse_args()
+
+    env = stub_env(args.llm_port, STUB_LLM_LATENCY_MS="0", STUB_LLM_TOKEN_MS="0", RESULT_CACHE_PATH="")
+    # The in-process app reads the same configuration as the server
+    os.environ.update(env)
+    network_url = f"http://127.0.0.1:{args.app_port}"
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    results: Dict[str, Dict[str, List[float]]] = {}
+    with serve("benchmarks.stub_llm:app", args.llm_port, cwd, env):
+        with serve("services.main:app", args.app_port, cwd, env):
+            for mode in MODES:
+                base_url = IN_PROCESS_URL if mode == "in-process" else network_url
+                results[mode] = {
+                    "resubscribe": asyncio.run(measure(mode, base_url, resubscribe, args.hops)),
+                    "stream": asyncio.run(measure(mode, base_url, stream, args.hops)),
+                }
+
+    print(f"pooled client protocol: {'HTTP/2 (h2)' if http2_enabled() else 'HTTP/1.1 keep-alive (h2 not installed)'}")
+    print(f"{'call':>12} {'mode':>11} {'mean ms':>8} {'p50 ms':>7} {'p95 ms':>7} {'hops/s':>8}")
+    for call in ("resubscribe", "stream"):
+        for mode in MODES:
+            samples = results[mode][call]
+            mean = statistics.mean(samples)
+            print(
+                f"{call:>12} {mode:>11} {mean * 1e3:>8.3f} {percentile(samples, 50) * 1e3:>7.3f} "
+                f"{percentile(samples, 95) * 1e3:>7.3f} {1 / mean:>8,.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
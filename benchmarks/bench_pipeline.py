@@ -0,0 +1,91 @@
+"""
+End-to-end pipeline latency: sequential hand-offs vs. the DAG orchestrator.
+
+Boots the stub LLM and the unified backend, then runs the same prompts
+through the old strategy (triage -> resubscribe -> research -> review ->
+presentation, each waiting for the previous one to finish) and through
+client.orchestrator.run_pipeline_async, reporting when each stage finished.
+
+    python -m benchmarks.bench_pipeline --runs 5
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.harness import serve, stub_env
+from client.orchestrator import AgentClient, agent_urls, run_pipeline_async
+
+STAGES = ("triage", "research", "review", "presentation")
+
+
+async def run_sequential(http: httpx.AsyncClient, urls: Dict[str, str], prompt: str) -> Dict[str, float]:
+    context_id = str(uuid.uuid4())
+    agents = {name: AgentClient(http, url) for name, url in urls.items()}
+    started = time.perf_counter()
+    finished = {}
+
+    triage = await agents["triage"].send(prompt, context_id)
+    route = (await agents["triage"].result(triage["task_id"]))["artifacts"][0]["route"]
+    finished["triage"] = time.perf_counter() - started
+    research = await agents["research"].run(prompt, context_id)
+    finished["research"] = time.perf_counter() - started
+    review = await agents["review"].run(
+        research["message"]["content"], context_id, ref=agents["research"].reference(research["message"])
+    )
+    finished["review"] = time.perf_counter() - started
+    await agents["presentation"].run(
+        review["message"]["content"], context_id, ref=agents["review"].reference(review["message"])
+    )
+    finished["presentation"] = time.perf_counter() - started
+    assert route == "medical_research"
+    return finished
+
+
+async def run_pipelined(http: httpx.AsyncClient, urls: Dict[str, str], prompt: str) -> Dict[str, float]:
+    result = await run_pipeline_async(prompt, http, urls)
+    return {name: result["timings"][name][1] for name in STAGES}
+
+
+async def drive(base_url: str, runs: int) -> Dict[str, List[Dict[str, float]]]:
+    urls = agent_urls(base_url)
+    results: Dict[str, List[Dict[str, float]]] = {"sequential": [], "pipelined": []}
+    async with httpx.AsyncClient() as http:
+        for i in range(runs):
+            prompt = f"Create a patient-friendly presentation on diabetes management #{i}"
+            results["sequential"].append(await run_sequential(http, urls, prompt))
+            results["pipelined"].append(await run_pipelined(http, urls, prompt))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency-ms", default="300", help="stub LLM time to first token")
+    parser.add_argument("--token-ms", default="5", help="stub LLM gap between streamed tokens")
+    parser.add_argument("--app-port", type=int, default=8701)
+    parser.add_argument("--llm-port", type=int, default=9101)
+    args = parser.parse_args()
+
+    env = stub_env(args.llm_port, STUB_LLM_LATENCY_MS=args.latency_ms, STUB_LLM_TOKEN_MS=args.token_ms)
+    with serve("benchmarks.stub_llm:app", args.llm_port, os.getcwd(), env):
+        with serve("services.main:app", args.app_port, os.getcwd(), env):
+            results = asyncio.run(drive(f"http://127.0.0.1:{args.app_port}", args.runs))
+
+    print("mean seconds from pipeline start until each stage finished")
+    print(f"{'stage':>13} {'sequential':>11} {'pipelined':>10} {'saved':>7}")
+    for stage in STAGES:
+        sequential = statistics.mean(run[stage] for run in results["sequential"])
+        pipelined = statistics.mean(run[stage] for run in results["pipelined"])
+        print(f"{stage:>13} {sequential:>11.2f} {pipelined:>10.2f} {sequential - pipelined:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Burst of research tasks against a stub LLM that enforces a requests-per-minute quota.
+
+Reports how many tasks fell back to [MOCK] content, how many 429s the stub
+served and the governor's queue/wait metrics. Run once without and once with
+a client-side budget matching the quota:
+
+    python -m benchmarks.bench_ratelimit --tasks 150 --quota-rpm 120
+    python -m benchmarks.bench_ratelimit --tasks 150 --quota-rpm 120 --budget-rpm 120
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import List
+
+import httpx
+
+from benchmarks.harness import serve, stub_env
+
+
+async def run_task(http: httpx.AsyncClient, base_url: str, index: int) -> str:
+    response = await http.post(
+        f"{base_url}/research/message",
+        json={
+            "message": {"role": "user", "content": f"rate limit topic {index}"},
+            "metadata": {"blocking": True, "cache": "bypass"},
+        },
+        timeout=None,
+    )
+    response.raise_for_status()
+    return response.json()["message"]["content"]
+
+
+async def drive(base_url: str, tasks: int) -> List[str]:
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=None)) as http:
+        return await asyncio.gather(*(run_task(http, base_url, i) for i in range(tasks)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=150)
+    parser.add_argument("--quota-rpm", default="120", help="quota the stub LLM enforces")
+    parser.add_argument("--budget-rpm", default="", help="OPENAI_RPM for the governor (empty = unlimited)")
+    parser.add_argument("--app-port", type=int, default=8731)
+    parser.add_argument("--llm-port", type=int, default=9131)
+    args = parser.parse_args()
+
+    env = stub_env(
+        args.llm_port,
+        STUB_LLM_RPM=args.quota_rpm,
+        OPENAI_RPM=args.budget_rpm,
+        RESULT_CACHE="0",
+        RESEARCH_MAX_CONCURRENCY=str(args.tasks),
+    )
+    llm_url = f"http://127.0.0.1:{args.llm_port}"
+    app_url = f"http://127.0.0.1:{args.app_port}"
+    with serve("benchmarks.stub_llm:app", args.llm_port, os.getcwd(), env):
+        with serve("services.main:app", args.app_port, os.getcwd(), env):
+            started = time.perf_counter()
+            contents = asyncio.run(drive(app_url, args.tasks))
+            elapsed = time.perf_counter() - started
+            stub = httpx.get(f"{llm_url}/stats").json()
+            governors = httpx.get(f"{app_url}/stats/ratelimits").json()
+
+    mocks = sum("[MOCK]" in content for content in contents)
+    print(f"tasks: {args.tasks}, mock fallbacks: {mocks}, elapsed {elapsed:.1f}s")
+    print(f"stub LLM requests: {stub['requests']}, 429s served: {stub['rate_limited']}")
+    print(json.dumps(governors, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+SSE fan-out throughput: one task's events delivered to many subscribers.
+
+Runs the in-process event bus with --subscribers subscribers on one task and
+publishes --events token-delta artifacts followed by a completion. The
+subscribers produce the bytes an SSE response would write. Two encodings are
+compared:
+
+  per-subscriber  the previous path: each event is built as a Pydantic model
+                  and dumped, then every subscriber re-serializes it with
+                  json.dumps and frames it with sse_starlette
+  encode-once     the current path: a plain event dict and one shared frame
+                  (Frame.sse) per event, encoded with orjson when installed
+
+The report shows deliveries per second (events x subscribers), wall time and
+CPU time.
+
+    python -m benchmarks.bench_sse_fanout --subscribers 1000 --events 200
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Dict, List
+
+# The benchmark measures the in-process bus, not a shared backend
+os.environ["TASK_BACKEND"] = "memory"
+
+from sse_starlette.sse import ServerSentEvent
+
+from services.common.encoding import orjson
+from services.common.schemas import TaskArtifactUpdateEvent, TaskState, TaskStatusUpdateEvent, artifact_event, status_event
+from services.common.sse import EventBus
+
+
+def legacy_encode(frame) -> bytes:
+    return ServerSentEvent(id=str(frame.id), data=json.dumps(frame.event), sep="\r\n").encode()
+
+
+def shared_encode(frame) -> bytes:
+    return frame.sse
+
+
+async def run(mode: str, subscribers: int, events: int, delta: str) -> Dict[str, float]:
+    bus = EventBus(history_size=events + 16)
+    task_id = f"fanout-{mode}"
+    encode = legacy_encode if mode == "per-subscriber" else shared_encode
+    written: List[int] = [0] * subscribers
+
+    async def subscriber(index: int) -> None:
+        total = 0
+        async for frame in bus.subscribe(task_id):
+            total += len(encode(frame))
+        written[index] = total
+
+    tasks = [asyncio.ensure_future(subscriber(i)) for i in range(subscribers)]
+    # Let every subscriber register its queue before the clock starts
+    while bus.stats()["subscribers"] < subscribers:
+        await asyncio.sleep(0)
+
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    for _ in range(events):
+        if mode == "per-subscriber":
+            event = TaskArtifactUpdateEvent(
+                task_id=task_id, artifact={"name": "summary", "delta": delta}, append=True, last_chunk=False
+            ).model_dump(mode="json")
+        else:
+            event = artifact_event(task_id, {"name": "summary", "delta": delta}, append=True, last_chunk=False)
+        bus.publish(task_id, event)
+        # Publishers yield between tokens in the real streams
+        await asyncio.sleep(0)
+    if mode == "per-subscriber":
+        bus.publish(task_id, TaskStatusUpdateEvent(task_id=task_id, state=TaskState.completed).model_dump(mode="json"))
+    else:
+        bus.publish(task_id, status_event(task_id, TaskState.completed))
+    await asyncio.gather(*tasks)
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+
+    deliveries = (events + 1) * subscribers
+    return {
+        "deliveries_per_s": deliveries / wall,
+        "events_per_s": (events + 1) / wall,
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "bytes": sum(written),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--delta-chars", type=int, default=16, help="size of each token delta")
+    args = parser.parse_args()
+
+    delta = ("lorem ipsum dolor sit amet " * (args.delta_chars // 27 + 1))[: args.delta_chars]
+    print(f"encoder: {'orjson ' + orjson.__version__ if orjson is not None else 'json (stdlib)'}")
+    print(f"{'mode':>15} {'deliveries/s':>13} {'events/s':>9} {'wall s':>7} {'cpu s':>7} {'MB out':>7}")
+    results = {}
+    for mode in ("per-subscriber", "encode-once"):
+        result = results[mode] = asyncio.run(run(mode, args.subscribers, args.events, delta))
+        print(
+            f"{mode:>15} {result['deliveries_per_s']:>13,.0f} {result['events_per_s']:>9,.0f} "
+            f"{result['wall_s']:>7.2f} {result['cpu_s']:>7.2f} {result['bytes'] / 1e6:>7.1f}"
+        )
+    speedup = results["encode-once"]["deliveries_per_s"] / results["per-subscriber"]["deliveries_per_s"]
+    print(f"encode-once is {speedup:.1f}x the per-subscriber throughput")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Local stand-in for the Gamma generations API.
+
+Run with:  uvicorn benchmarks.fake_gamma:app --port 9200
+Point the presentation agent at it with GAMMA_API_URL=http://127.0.0.1:9200 and
+any GAMMA_API_KEY. Generations move pending -> processing -> completed over
+FAKE_GAMMA_DURATION_S; GET /stats reports how hard they were polled.
+"""
+from __future__ import annotations
+
+import os
+import random
+import time
+import uuid
+from collections import Counter
+from typing import Dict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Fake Gamma")
+
+DURATION_S = float(os.getenv("FAKE_GAMMA_DURATION_S", "10"))
+# Fraction of polls answered with 429 to exercise backoff
+RATE_LIMIT_RATIO = float(os.getenv("FAKE_GAMMA_429_RATIO", "0"))
+
+GENERATIONS: Dict[str, float] = {}
+POLLS_PER_SECOND: Counter = Counter()
+POLLS: Counter = Counter()
+
+
+@app.post("/generations")
+async def create(request: Request):
+    await request.json()
+    generation_id = uuid.uuid4().hex
+    GENERATIONS[generation_id] = time.time()
+    return {"generationId": generation_id}
+
+
+@app.get("/generations/{generation_id}")
+async def status(generation_id: str):
+    if generation_id not in GENERATIONS:
+        return JSONResponse({"error": "not found"}, status_code=404)
+    POLLS[generation_id] += 1
+    POLLS_PER_SECOND[int(time.time())] += 1
+    if random.random() < RATE_LIMIT_RATIO:
+        return JSONResponse({"error": "rate limited"}, status_code=429, headers={"Retry-After": "1"})
+    elapsed = time.time() - GENERATIONS[generation_id]
+    if elapsed < DURATION_S * 0.2:
+        return {"generationId": generation_id, "status": "pending"}
+    if elapsed < DURATION_S:
+        return {"generationId": generation_id, "status": "processing"}
+    return {"generationId": generation_id, "status": "completed", "gammaUrl": f"https://gamma.app/docs/{generation_id}"}
+
+
+@app.get("/stats")
+def stats():
+    return {
+        "generations": len(GENERATIONS),
+        "polls": sum(POLLS.values()),
+        "max_polls_per_generation": max(POLLS.values(), default=0),
+        "peak_polls_per_second": max(POLLS_PER_SECOND.values(), default=0),
+    }
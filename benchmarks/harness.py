@@ -0,0 +1,60 @@
+"""Shared helpers for booting the stub servers and the unified app in benchmarks."""
+from __future__ import annotations
+
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+import httpx
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(url: str, timeout_s: float = 20.0) -> None:
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up")
+
+
+@contextmanager
+def serve(app: str, port: int, cwd: str, env: Dict[str, str], workers: int = 1) -> Iterator[subprocess.Popen]:
+    command = [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"]
+    if workers > 1:
+        command += ["--workers", str(workers)]
+    proc = subprocess.Popen(command, cwd=cwd, env=env)
+    try:
+        wait_for_port(f"http://127.0.0.1:{port}/docs")
+        yield proc
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def stub_env(llm_port: int, **overrides: str) -> Dict[str, str]:
+    """Environment pointing agents at the stub LLM on ``llm_port``."""
+    env = dict(os.environ)
+    env.update({
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{llm_port}/v1",
+    })
+    env.update(overrides)
+    return env
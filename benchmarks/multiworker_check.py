@@ -0,0 +1,118 @@
+"""
+Cross-worker check for the shared task backend.
+
+Boots the stub LLM and two independent copies of the unified backend that
+share one SQLite task database (TASK_BACKEND=sqlite), submits research tasks
+to the first and follows, resumes and resubscribes them on the second. With
+--workers N a single server runs N uvicorn workers instead and every request
+uses a fresh connection, so hand-offs land on arbitrary workers.
+
+    python -m benchmarks.multiworker_check --tasks 8
+    python -m benchmarks.multiworker_check --tasks 8 --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from contextlib import ExitStack
+from typing import List, Optional, Tuple
+
+import httpx
+
+from benchmarks.harness import serve, stub_env
+
+TERMINAL_STATES = {"completed", "failed", "canceled"}
+
+
+async def follow(http: httpx.AsyncClient, url: str, task_id: str, last_event_id: Optional[int] = None) -> List[Tuple[int, dict]]:
+    params = {"task_id": task_id}
+    if last_event_id is not None:
+        params["last_event_id"] = str(last_event_id)
+    events = []
+    event_id = None
+    async with http.stream("GET", f"{url}/research/message/stream", params=params, timeout=60) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line.startswith("id:"):
+                event_id = int(line[3:])
+            elif line.startswith("data:"):
+                event = json.loads(line[5:])
+                events.append((event_id, event))
+                if event.get("event") == "task-status" and event.get("state") in TERMINAL_STATES:
+                    break
+    return events
+
+
+async def check_task(submit_url: str, follow_url: str, index: int, fresh: bool) -> Optional[str]:
+    limits = httpx.Limits(max_keepalive_connections=0) if fresh else httpx.Limits()
+    async with httpx.AsyncClient(limits=limits) as http:
+        response = await http.post(
+            f"{submit_url}/research/message",
+            json={"message": {"role": "user", "content": f"multiworker check topic {index}"}},
+            timeout=20,
+        )
+        response.raise_for_status()
+        task_id = response.json()["task_id"]
+
+        events = await follow(http, follow_url, task_id)
+        if not events or events[-1][1].get("state") != "completed":
+            return f"{task_id}: stream ended without completion: {events[-1:]}"
+        if not any(event.get("event") == "task-artifact" for _, event in events):
+            return f"{task_id}: no artifact events streamed"
+
+        resumed = await follow(http, follow_url, task_id, last_event_id=events[0][0])
+        if [e for e, _ in resumed] != [e for e, _ in events[1:]]:
+            return f"{task_id}: resume replayed {len(resumed)} events, expected {len(events) - 1}"
+
+        response = await http.post(f"{follow_url}/research/tasks/resubscribe", json={"task_id": task_id}, timeout=10)
+        status = response.json()
+        if status["state"] != "completed" or not status.get("message"):
+            return f"{task_id}: resubscribe returned {status['state']}"
+    return None
+
+
+async def run_checks(submit_url: str, follow_url: str, tasks: int, fresh: bool) -> List[str]:
+    results = await asyncio.gather(*(check_task(submit_url, follow_url, i, fresh) for i in range(tasks)))
+    return [r for r in results if r is not None]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=0, help="run one server with N workers instead of two servers")
+    parser.add_argument("--ports", default="8711,8712")
+    parser.add_argument("--llm-port", type=int, default=9111)
+    args = parser.parse_args()
+
+    ports = [int(p) for p in args.ports.split(",")]
+    with tempfile.TemporaryDirectory() as tmp:
+        env = stub_env(
+            args.llm_port,
+            TASK_BACKEND="sqlite",
+            TASK_DB_PATH=os.path.join(tmp, "tasks.sqlite3"),
+            ARTIFACT_STORE_PATH=os.path.join(tmp, "artifacts.sqlite3"),
+            RESULT_CACHE="0",
+        )
+        with ExitStack() as stack:
+            stack.enter_context(serve("benchmarks.stub_llm:app", args.llm_port, os.getcwd(), env))
+            if args.workers:
+                stack.enter_context(serve("services.main:app", ports[0], os.getcwd(), env, workers=args.workers))
+                submit_url = follow_url = f"http://127.0.0.1:{ports[0]}"
+            else:
+                for port in ports[:2]:
+                    stack.enter_context(serve("services.main:app", port, os.getcwd(), env))
+                submit_url, follow_url = (f"http://127.0.0.1:{port}" for port in ports[:2])
+            failures = asyncio.run(run_checks(submit_url, follow_url, args.tasks, fresh=bool(args.workers)))
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"{args.tasks - len(failures)}/{args.tasks} tasks submitted on one worker were streamed, resumed and resubscribed on another")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Local stand-in for the OpenAI chat completions API.
+
+Run with:  uvicorn benchmarks.stub_llm:app --port 9100
+Point agents at it with OPENAI_BASE_URL=http://127.0.0.1:9100/v1
+
+Failure injection: STUB_LLM_ERROR_RATE answers that fraction of calls with a
+500, STUB_LLM_429_RATE with a 429 (on top of any STUB_LLM_RPM quota), and
+STUB_LLM_JITTER_MS adds up to that much random latency per call.
+STUB_LLM_TAIL_RATE of calls wait an extra STUB_LLM_TAIL_MS, for a heavy tail.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import random
+import time
+import uuid
+from collections import deque
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Stub LLM")
+
+LATENCY_MS = float(os.getenv("STUB_LLM_LATENCY_MS", "200"))
+# When streaming, LATENCY_MS is time to first token and this is the gap between tokens
+TOKEN_MS = float(os.getenv("STUB_LLM_TOKEN_MS", "10"))
+# Requests-per-minute quota enforced like the real API (0 = unlimited)
+RPM = int(os.getenv("STUB_LLM_RPM", "0"))
+JITTER_MS = float(os.getenv("STUB_LLM_JITTER_MS", "0"))
+ERROR_RATE = float(os.getenv("STUB_LLM_ERROR_RATE", "0"))
+RATE_LIMIT_RATE = float(os.getenv("STUB_LLM_429_RATE", "0"))
+TAIL_RATE = float(os.getenv("STUB_LLM_TAIL_RATE", "0"))
+TAIL_MS = float(os.getenv("STUB_LLM_TAIL_MS", "2000"))
+
+_recent: deque = deque()
+STATS = {"requests": 0, "rate_limited": 0, "errors": 0}
+
+
+def first_token_delay() -> float:
+    tail = TAIL_MS if random.random() < TAIL_RATE else 0.0
+    return (LATENCY_MS + random.uniform(0, JITTER_MS) + tail) / 1000
+
+
+def over_quota() -> float:
+    """Seconds until a slot frees up if the RPM quota is exhausted, else 0."""
+    if not RPM:
+        return 0.0
+    now = time.monotonic()
+    while _recent and now - _recent[0] >= 60:
+        _recent.popleft()
+    if len(_recent) >= RPM:
+        return 60 - (now - _recent[0])
+    _recent.append(now)
+    return 0.0
+
+
+def canned_reply(system_prompt: str) -> str:
+    if "triage" in system_prompt:
+        return os.getenv("STUB_LLM_ROUTE", "medical_research")
+    if "reviewer" in system_prompt:
+        return json.dumps({
+            "revisedSummary": "Diabetes is a chronic condition that affects how the body uses sugar.",
+            "warnings": ["No citations provided."],
+            "patientFriendlyScore": 4,
+        })
+    if "presentation designer" in system_prompt:
+        return json.dumps({"slides": [{"title": "Overview", "bullets": ["What is diabetes?"]}]})
+    return json.dumps({
+        "summary": "Diabetes management combines diet, activity and medication. " * 10,
+        "keyPoints": ["Monitor blood glucose", "Eat balanced meals", "Stay active"],
+        "riskFactors": ["Obesity", "Family history"],
+        "audienceTone": "patient-friendly",
+    })
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    STATS["requests"] += 1
+    wait = over_quota()
+    if not wait and random.random() < RATE_LIMIT_RATE:
+        wait = 1.0
+    if wait:
+        STATS["rate_limited"] += 1
+        return JSONResponse(
+            {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+            status_code=429,
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+    if random.random() < ERROR_RATE:
+        STATS["errors"] += 1
+        return JSONResponse(
+            {"error": {"message": "The server had an error", "type": "server_error", "code": None}},
+            status_code=500,
+        )
+    system_prompt = next((m["content"] for m in body["messages"] if m["role"] == "system"), "")
+    content = canned_reply(system_prompt)
+    if body.get("stream"):
+        return StreamingResponse(stream_reply(body, content), media_type="text/event-stream")
+
+    await asyncio.sleep(first_token_delay())
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 50, "completion_tokens": 50, "total_tokens": 100},
+    }
+
+
+async def stream_reply(body: dict, content: str):
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    await asyncio.sleep(first_token_delay())
+    # Roughly one token per 4 characters, like the real API
+    for start in range(0, len(content), 4):
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "delta": {"content": content[start:start + 4]}, "finish_reason": None}],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+        await asyncio.sleep(TOKEN_MS / 1000)
+    if (body.get("stream_options") or {}).get("include_usage"):
+        usage = {"prompt_tokens": 50, "completion_tokens": len(content) // 4, "total_tokens": 50 + len(content) // 4}
+        chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                 "model": body.get("model", "stub"), "choices": [], "usage": usage}
+        yield f"data: {json.dumps(chunk)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.get("/stats")
+def stats():
+    return STATS
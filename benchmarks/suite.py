@@ -0,0 +1,284 @@
+"""
+Offline benchmark suite: the unified backend against the stub LLM and fake Gamma.
+
+Boots benchmarks.stub_llm, benchmarks.fake_gamma and services.main, then runs
+two phases at --concurrency:
+
+  agents     --agent-requests tasks straight at each agent's /message,
+             following each task's SSE stream until it finishes
+  pipelines  --pipelines prompts through client.orchestrator.run_pipeline_async
+
+It reports throughput, p50/p95/p99 latency per agent and per pipeline stage,
+how long SSE events took to arrive after they were published, and how much
+the backend's RSS grew. Results are written as JSON so runs from different
+commits can be compared:
+
+    python -m benchmarks.suite --out before.json
+    git checkout <other commit>
+    python -m benchmarks.suite --out after.json --compare before.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.harness import percentile, serve, stub_env
+from client.orchestrator import TERMINAL_STATES, agent_urls, run_pipeline_async
+
+AGENTS = ("triage", "research", "review", "presentation")
+STAGES = ("triage", "research_summary", "research", "review", "presentation")
+
+PROMPTS = {
+    "triage": "Create a patient-friendly presentation on diabetes management #{i}",
+    "research": "Diabetes management in adults #{i}",
+    "review": "Diabetes is a chronic condition. Patients should monitor glucose daily. #{i}",
+    "presentation": "Deck {i}: diabetes management overview",
+}
+
+
+def summarize(values: List[float]) -> Dict[str, Any]:
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 1),
+        "p95_ms": round(percentile(values, 95) * 1000, 1),
+        "p99_ms": round(percentile(values, 99) * 1000, 1),
+        "max_ms": round(max(values) * 1000, 1),
+    }
+
+
+async def rss(http: httpx.AsyncClient, base_url: str) -> int:
+    return (await http.get(f"{base_url}/stats/memory")).json()["rss_bytes"]
+
+
+async def run_agent_task(
+    http: httpx.AsyncClient, base_url: str, agent: str, index: int, lags: List[float]
+) -> Tuple[str, float, float]:
+    """Submit one task and follow its stream; returns (state, accept s, finish s)."""
+    started = time.perf_counter()
+    response = await http.post(
+        f"{base_url}/{agent}/message",
+        json={"message": {"role": "user", "content": PROMPTS[agent].format(i=index)}},
+    )
+    response.raise_for_status()
+    submitted = response.json()
+    accepted = time.perf_counter() - started
+    state = submitted.get("state", "completed")
+    if state not in TERMINAL_STATES:
+        async with http.stream(
+            "GET", f"{base_url}/{agent}/message/stream", params={"task_id": submitted["task_id"]}
+        ) as stream:
+            async for line in stream.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[5:])
+                if "timestamp" in event:
+                    lags.append(max(0.0, time.time() - event["timestamp"]))
+                if event.get("event") == "task-status" and event.get("state") in TERMINAL_STATES:
+                    state = event["state"]
+                    break
+    return state, accepted, time.perf_counter() - started
+
+
+async def bounded(limit: asyncio.Semaphore, coro):
+    async with limit:
+        return await coro
+
+
+async def agent_phase(http: httpx.AsyncClient, base_url: str, requests: int, concurrency: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    lags: List[float] = []
+    for agent in AGENTS:
+        limit = asyncio.Semaphore(concurrency)
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(
+            *(bounded(limit, run_agent_task(http, base_url, agent, i, lags)) for i in range(requests)),
+            return_exceptions=True,
+        )
+        wall = time.perf_counter() - started
+        finished = [o for o in outcomes if isinstance(o, tuple)]
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                print(f"{agent} task failed: {outcome!r}")
+        results[agent] = {
+            "wall_s": round(wall, 3),
+            "tasks_per_s": round(len(finished) / wall, 2) if wall else 0.0,
+            "errors": requests - sum(state == "completed" for state, _, _ in finished),
+            "accept": summarize([accepted for _, accepted, _ in finished]),
+            "finish": summarize([total for _, _, total in finished]),
+        }
+    return {"agents": results, "sse_lag": summarize(lags)}
+
+
+async def pipeline_phase(http: httpx.AsyncClient, base_url: str, pipelines: int, concurrency: int) -> Dict[str, Any]:
+    urls = agent_urls(base_url)
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> dict:
+        async with limit:
+            return await run_pipeline_async(PROMPTS["triage"].format(i=i), http, urls)
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(one(i) for i in range(pipelines)), return_exceptions=True)
+    wall = time.perf_counter() - started
+    results = [o for o in outcomes if isinstance(o, dict)]
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            print(f"pipeline failed: {outcome!r}")
+
+    stages: Dict[str, Dict[str, Any]] = {}
+    for stage in STAGES:
+        durations = [r["timings"][stage][1] - r["timings"][stage][0] for r in results if stage in r["timings"]]
+        stages[stage] = summarize(durations)
+    return {
+        "wall_s": round(wall, 3),
+        "pipelines_per_min": round(len(results) / wall * 60, 2) if wall else 0.0,
+        "errors": pipelines - len(results),
+        "end_to_end": summarize([max(end for _, end in r["timings"].values()) for r in results]),
+        "stages": stages,
+    }
+
+
+async def drive(base_url: str, args: argparse.Namespace) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=args.concurrency * 4)
+    async with httpx.AsyncClient(limits=limits, timeout=args.timeout_s) as http:
+        memory = {"start_bytes": await rss(http, base_url)}
+        report = await agent_phase(http, base_url, args.agent_requests, args.concurrency)
+        memory["after_agents_bytes"] = await rss(http, base_url)
+        report["pipeline"] = await pipeline_phase(http, base_url, args.pipelines, args.concurrency)
+        memory["end_bytes"] = await rss(http, base_url)
+        memory["growth_bytes"] = memory["end_bytes"] - memory["start_bytes"]
+        report["memory"] = memory
+        metrics = (await http.get(f"{base_url}/metrics")).text
+    report["server_metrics_lines"] = len(metrics.splitlines())
+    return report
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(report: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat: Dict[str, float] = {}
+    for key, value in report.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    before = flatten(baseline["results"])
+    after = flatten(current["results"])
+    print(f"\nvs. {baseline['meta'].get('commit') or 'baseline'}")
+    print(f"{'metric':<44} {'before':>12} {'after':>12} {'change':>8}")
+    for name in sorted(set(before) & set(after)):
+        if not name.endswith(("p50_ms", "p95_ms", "p99_ms", "per_s", "per_min", "errors", "growth_bytes")):
+            continue
+        old, new = before[name], after[name]
+        change = f"{(new - old) / old * 100:+.0f}%" if old else ""
+        print(f"{name:<44} {old:>12} {new:>12} {change:>8}")
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    print(f"{'agent':>13} {'tasks/s':>8} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for agent, row in results["agents"].items():
+        finish = row["finish"]
+        print(
+            f"{agent:>13} {row['tasks_per_s']:>8} {row['errors']:>7} "
+            f"{finish.get('p50_ms', '-'):>8} {finish.get('p95_ms', '-'):>8} {finish.get('p99_ms', '-'):>8}"
+        )
+    pipeline = results["pipeline"]
+    print(f"\npipelines/min: {pipeline['pipelines_per_min']}, errors: {pipeline['errors']}")
+    print(f"{'stage':>17} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for stage, row in [*pipeline["stages"].items(), ("end_to_end", pipeline["end_to_end"])]:
+        print(f"{stage:>17} {row.get('p50_ms', '-'):>8} {row.get('p95_ms', '-'):>8} {row.get('p99_ms', '-'):>8}")
+    lag = results["sse_lag"]
+    print(f"\nSSE delivery lag: p50 {lag.get('p50_ms')}ms p99 {lag.get('p99_ms')}ms over {lag['count']} events")
+    memory = results["memory"]
+    print(f"RSS: {memory['start_bytes'] / 2**20:.1f} MiB -> {memory['end_bytes'] / 2**20:.1f} MiB "
+          f"({memory['growth_bytes'] / 2**20:+.1f} MiB)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pipelines", type=int, default=50)
+    parser.add_argument("--agent-requests", type=int, default=100, help="tasks per agent in the agents phase")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", default="200", help="stub LLM time to first token")
+    parser.add_argument("--jitter-ms", default="50", help="random extra stub LLM latency")
+    parser.add_argument("--token-ms", default="5", help="stub LLM gap between streamed tokens")
+    parser.add_argument("--error-rate", default="0", help="fraction of LLM calls answered with 500")
+    parser.add_argument("--rate-limit-rate", default="0", help="fraction of LLM calls answered with 429")
+    parser.add_argument("--gamma-duration-s", default="3", help="how long each fake Gamma generation takes")
+    parser.add_argument("--profile", default="latency", help="AGENT_PROFILE for the backend (demo adds pacing sleeps)")
+    parser.add_argument("--timeout-s", type=float, default=300)
+    parser.add_argument("--out", default="benchmark-results.json")
+    parser.add_argument("--compare", help="earlier result file to diff against")
+    parser.add_argument("--app-port", type=int, default=8741)
+    parser.add_argument("--llm-port", type=int, default=9141)
+    parser.add_argument("--gamma-port", type=int, default=9241)
+    args = parser.parse_args()
+
+    gamma_url = f"http://127.0.0.1:{args.gamma_port}"
+    env = stub_env(
+        args.llm_port,
+        STUB_LLM_LATENCY_MS=args.latency_ms,
+        STUB_LLM_JITTER_MS=args.jitter_ms,
+        STUB_LLM_TOKEN_MS=args.token_ms,
+        STUB_LLM_ERROR_RATE=args.error_rate,
+        STUB_LLM_429_RATE=args.rate_limit_rate,
+        GAMMA_API_KEY="fake",
+        GAMMA_API_URL=gamma_url,
+        FAKE_GAMMA_DURATION_S=args.gamma_duration_s,
+        AGENT_PROFILE=args.profile,
+        # Every request should reach the stub; repeated prompts must not be served from cache
+        # or share an in-flight call
+        RESULT_CACHE="0",
+        COALESCE="0",
+    )
+    llm_url = f"http://127.0.0.1:{args.llm_port}"
+    with serve("benchmarks.stub_llm:app", args.llm_port, os.getcwd(), env):
+        with serve("benchmarks.fake_gamma:app", args.gamma_port, os.getcwd(), env):
+            with serve("services.main:app", args.app_port, os.getcwd(), env):
+                results = asyncio.run(drive(f"http://127.0.0.1:{args.app_port}", args))
+                results["stub_llm"] = httpx.get(f"{llm_url}/stats").json()
+                results["gamma"] = httpx.get(f"{gamma_url}/stats").json()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+
+    print_report(results)
+    print(f"\nwrote {args.out}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as handle:
+            compare(report, json.load(handle))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Batch pipeline runner for bulk topic generation.
+
+Reads prompts from a JSONL file (one {"prompt": ..., "id": optional} object per
+line), runs them through the orchestrator concurrently and appends each result
+to an output JSONL file as soon as it completes. Re-running with the same
+output file skips prompts that already completed, so a crashed batch resumes
+where it stopped. Each prompt keeps the same context_id across runs, so a
+prompt that failed part-way is continued from its pipeline journal instead
+of redoing the stages that had finished.
+
+    python -m client.batch topics.jsonl --out results.jsonl --concurrency 20 \\
+        --limit research=8 --limit presentation=4
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import Dict, List, Optional, Set
+
+import httpx
+
+from client.orchestrator import agent_urls, run_pipeline_async
+from client.transport import default_base_url, make_client
+
+STAGES = ("triage", "research", "review", "presentation")
+HISTOGRAM_BUCKETS_S = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+
+
+def prompt_id(record: dict) -> str:
+    if record.get("id") is not None:
+        return str(record["id"])
+    return hashlib.sha256(record["prompt"].encode("utf-8")).hexdigest()[:16]
+
+
+def batch_context_id(out_path: str, item_id: str) -> str:
+    """Stable per prompt and output file, so a re-run continues the same pipeline."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"batch:{os.path.abspath(out_path)}#{item_id}"))
+
+
+def load_prompts(path: str) -> List[dict]:
+    prompts = []
+    with open(path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                prompts.append({"id": prompt_id(record), "prompt": record["prompt"]})
+    return prompts
+
+
+def completed_ids(path: str) -> Set[str]:
+    if not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A partially written last line from a crash
+                continue
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+def histogram(values: List[float]) -> List[str]:
+    counts = [0] * (len(HISTOGRAM_BUCKETS_S) + 1)
+    for value in values:
+        index = next((i for i, bound in enumerate(HISTOGRAM_BUCKETS_S) if value <= bound), len(HISTOGRAM_BUCKETS_S))
+        counts[index] += 1
+    peak = max(counts) or 1
+    lines = []
+    for i, count in enumerate(counts):
+        label = f"<= {HISTOGRAM_BUCKETS_S[i]}s" if i < len(HISTOGRAM_BUCKETS_S) else f"> {HISTOGRAM_BUCKETS_S[-1]}s"
+        if count:
+            lines.append(f"    {label:>8} {count:>6} {'#' * max(1, round(40 * count / peak))}")
+    return lines
+
+
+class BatchStats:
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.ok = 0
+        self.failed = 0
+        self.stage_seconds: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+
+    def record(self, timings: Dict[str, List[float]]) -> None:
+        for stage in STAGES:
+            if stage in timings:
+                start, end = timings[stage]
+                self.stage_seconds[stage].append(end - start)
+
+    def report(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        per_minute = self.ok / elapsed * 60 if elapsed else 0.0
+        lines = [
+            f"completed {self.ok}, failed {self.failed} in {elapsed:.1f}s "
+            f"({per_minute:.1f} pipelines/min)",
+        ]
+        for stage, values in self.stage_seconds.items():
+            if not values:
+                continue
+            ordered = sorted(values)
+            p50 = ordered[len(ordered) // 2]
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            lines.append(f"  {stage}: n={len(values)} p50={p50:.2f}s p95={p95:.2f}s max={ordered[-1]:.2f}s")
+            lines.extend(histogram(values))
+        return "\n".join(lines)
+
+
+async def run_batch(
+    prompts: List[dict],
+    out_path: str,
+    concurrency: int = 10,
+    agent_limits: Optional[Dict[str, int]] = None,
+    base_url: Optional[str] = None,
+) -> BatchStats:
+    done = completed_ids(out_path)
+    pending = [p for p in prompts if p["id"] not in done]
+    print(f"{len(prompts)} prompts, {len(prompts) - len(pending)} already completed, {len(pending)} to run")
+
+    stats = BatchStats()
+    gate = asyncio.Semaphore(concurrency)
+    limits = {name: asyncio.Semaphore(n) for name, n in (agent_limits or {}).items()}
+    urls = agent_urls(base_url or default_base_url())
+    http_limits = httpx.Limits(max_connections=None, max_keepalive_connections=concurrency * 4)
+
+    with open(out_path, "a", encoding="utf-8") as out:
+        async with make_client(limits=http_limits) as http:
+
+            async def run_one(item: dict) -> None:
+                async with gate:
+                    started = time.perf_counter()
+                    record = {"id": item["id"], "prompt": item["prompt"]}
+                    context_id = batch_context_id(out_path, item["id"])
+                    try:
+                        result = await run_pipeline_async(item["prompt"], http, urls, limits, context_id=context_id)
+                        states = [result[s]["state"] for s in STAGES if s in result]
+                        record["status"] = "ok" if all(s == "completed" for s in states) else "failed"
+                        record["result"] = result
+                        stats.record(result["timings"])
+                    except Exception as e:
+                        record["status"] = "error"
+                        record["error"] = repr(e)
+                        # For `python -m client.orchestrator --resume <context_id>`
+                        record["context_id"] = context_id
+                    record["elapsed_s"] = round(time.perf_counter() - started, 3)
+                    if record["status"] == "ok":
+                        stats.ok += 1
+                    else:
+                        stats.failed += 1
+                    # One line per pipeline, flushed so a crash loses at most in-flight work
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+
+            await asyncio.gather(*(run_one(item) for item in pending))
+    return stats
+
+
+def parse_limits(values: List[str]) -> Dict[str, int]:
+    limits = {}
+    for value in values:
+        agent, _, count = value.partition("=")
+        if agent not in STAGES or not count.isdigit():
+            raise argparse.ArgumentTypeError(f"expected <agent>=<n> with agent in {STAGES}, got {value!r}")
+        limits[agent] = int(count)
+    return limits
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("prompts", help="input JSONL with a 'prompt' per line")
+    parser.add_argument("--out", required=True, help="output JSONL (appended to, used for resume)")
+    parser.add_argument("--concurrency", type=int, default=10, help="pipelines in flight at once")
+    parser.add_argument("--limit", action="append", default=[], help="per-agent cap, e.g. research=8")
+    parser.add_argument("--base-url", default=None, help="unified backend URL (default: *_URL env vars, or in-process with ORCHESTRATOR_TRANSPORT=asgi)")
+    args = parser.parse_args()
+
+    stats = asyncio.run(
+        run_batch(
+            load_prompts(args.prompts),
+            args.out,
+            concurrency=args.concurrency,
+            agent_limits=parse_limits(args.limit),
+            base_url=args.base_url,
+        )
+    )
+    print(stats.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,59 +1,475 @@
 from __future__ import annotations
 
+import argparse
+import asyncio
+import json
 import os
+import time
 import uuid
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 
 import httpx
 
+from client.transport import default_base_url, run_sync, shared_client
+
 TRIAGE_URL = os.getenv("TRIAGE_URL", "http://localhost:8000/triage")
 RESEARCH_URL = os.getenv("RESEARCH_URL", "http://localhost:8000/research")
 REVIEW_URL = os.getenv("REVIEW_URL", "http://localhost:8000/review")
 PRESENTATION_URL = os.getenv("PRESENTATION_URL", "http://localhost:8000/presentation")
+TASK_TIMEOUT_S = float(os.getenv("TASK_TIMEOUT_S", "600"))
+
+AGENT_URLS = {
+    "triage": TRIAGE_URL,
+    "research": RESEARCH_URL,
+    "review": REVIEW_URL,
+    "presentation": PRESENTATION_URL,
+}
+
+TERMINAL_STATES = {"completed", "failed", "canceled"}
+# Journaled stages a resumed pipeline reuses (completed) or follows (still running)
+REUSABLE_STATES = {"completed", "queued", "working"}
+
+# Returned by a stage that decided not to run (e.g. research on the presentation route)
+SKIPPED = object()
+
+# Pipeline stages reported to callers, in order
+PIPELINE_STAGES = ("triage", "research", "review", "presentation")
+
+
+class StageFailed(Exception):
+    """A stage's task ended in a state other than completed; the stages after it don't run."""
+
+    def __init__(self, stage: str, output: dict):
+        super().__init__(f"{stage} {output.get('state')}")
+        self.stage = stage
+        self.output = output
+
+
+def require_completed(stage: str, output: dict) -> dict:
+    """``output`` if its task completed, so a failure is never handed downstream as content."""
+    if output.get("state", "completed") != "completed":
+        raise StageFailed(stage, output)
+    return output
+
+
+class AgentClient:
+    """A2A calls against one agent, sharing the caller's HTTP client.
+
+    ``limit`` optionally caps how many of this client's tasks may be in flight
+    at the agent at once; a slot is held from submission until the task is
+    seen reaching a terminal state.
+    """
+
+    def __init__(self, http: httpx.AsyncClient, url: str, limit: Optional[asyncio.Semaphore] = None):
+        self.http = http
+        self.url = url
+        self.limit = limit
+        self._held: Set[str] = set()
+
+    async def send(
+        self, content: str, context_id: str, task_id: Optional[str] = None, ref: Optional[dict] = None
+    ) -> dict:
+        """Submit a task; with ``ref`` the content is passed by reference and not sent."""
+        payload = {
+            "context_id": context_id,
+            "task_id": task_id,
+            "message": {"role": "user", "ref": ref} if ref is not None else {"role": "user", "content": content},
+        }
+        if self.limit is not None:
+            await self.limit.acquire()
+        try:
+            while True:
+                response = await self.http.post(f"{self.url}/message", json=payload, timeout=20)
+                if response.status_code == 429:
+                    # Agent queue is full; back off for as long as it asks
+                    await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+                    continue
+                response.raise_for_status()
+                submitted = response.json()
+                break
+        except BaseException:
+            if self.limit is not None:
+                self.limit.release()
+            raise
+
+        if self.limit is not None:
+            self._held.add(submitted["task_id"])
+            if submitted.get("state", "completed") in TERMINAL_STATES:
+                self._release(submitted["task_id"])
+        return submitted
+
+    def reference(self, message: dict) -> Optional[dict]:
+        """Artifact reference to one of this agent's replies, fetchable from this agent."""
+        ref = message.get("ref")
+        if not ref:
+            return None
+        return {**ref, "url": f"{self.url}/artifacts/{ref['hash']}"}
+
+    def _release(self, task_id: str) -> None:
+        if task_id in self._held:
+            self._held.discard(task_id)
+            self.limit.release()
+
+    def release_all(self) -> None:
+        for task_id in list(self._held):
+            self._release(task_id)
+
+    async def events(self, task_id: str) -> AsyncIterator[dict]:
+        """Follow the task's SSE stream until it reaches a terminal state."""
+        async with self.http.stream(
+            "GET", f"{self.url}/message/stream", params={"task_id": task_id}, timeout=TASK_TIMEOUT_S
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[5:])
+                if event.get("event") == "task-status" and event.get("state") in TERMINAL_STATES:
+                    self._release(task_id)
+                    yield event
+                    return
+                yield event
+
+    async def result(self, task_id: str) -> dict:
+        response = await self.http.post(f"{self.url}/tasks/resubscribe", json={"task_id": task_id}, timeout=10)
+        response.raise_for_status()
+        return response.json()
+
+    async def journal(self, context_id: str) -> Dict[str, dict]:
+        """The pipeline journal for ``context_id`` as seen by this agent's process."""
+        response = await self.http.get(f"{self.url}/contexts/{context_id}/journal", timeout=10)
+        response.raise_for_status()
+        return response.json()["stages"]
+
+    async def cancel(self, task_id: str) -> dict:
+        response = await self.http.post(f"{self.url}/tasks/cancel", json={"task_id": task_id}, timeout=10)
+        response.raise_for_status()
+        self._release(task_id)
+        return response.json()
+
+    async def wait(self, submitted: dict) -> dict:
+        """Wait for a submitted task to finish and merge its final result in."""
+        if submitted.get("state", "completed") in TERMINAL_STATES:
+            return submitted
+        async for _ in self.events(submitted["task_id"]):
+            pass
+        status = await self.result(submitted["task_id"])
+        return {
+            **submitted,
+            "state": status["state"],
+            "message": status.get("message") or submitted["message"],
+            "artifacts": status.get("artifacts", []),
+        }
+
+    async def run(self, content: str, context_id: str, ref: Optional[dict] = None) -> dict:
+        return await self.wait(await self.send(content, context_id, ref=ref))
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+    deps: Tuple[str, ...] = ()
+
+
+@dataclass
+class DagResult:
+    outputs: Dict[str, Any] = field(default_factory=dict)
+    # stage -> (start, end) seconds relative to the start of the run
+    timings: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+
+
+async def run_dag(stages: List[Stage], result: Optional[DagResult] = None) -> DagResult:
+    """Run stages as soon as their dependencies resolve.
+
+    Each stage receives its dependencies' outputs keyed by stage name; a stage
+    with no dependencies starts immediately, which is how speculative work is
+    expressed. If any stage raises, the rest are cancelled and the error is
+    re-raised; pass ``result`` to keep the outputs of the stages that finished.
+    """
+    result = result if result is not None else DagResult()
+    futures: Dict[str, asyncio.Future] = {}
+    started = time.perf_counter()
+
+    async def execute(stage: Stage) -> Any:
+        inputs = {dep: await futures[dep] for dep in stage.deps}
+        begin = time.perf_counter() - started
+        output = await stage.run(inputs)
+        result.timings[stage.name] = (begin, time.perf_counter() - started)
+        result.outputs[stage.name] = output
+        return output
+
+    for stage in stages:
+        futures[stage.name] = asyncio.ensure_future(execute(stage))
+    try:
+        await asyncio.gather(*futures.values())
+    except BaseException:
+        for future in futures.values():
+            future.cancel()
+        raise
+    return result
+
+
+def summary_of(research: dict) -> str:
+    """The ``summary`` field of a completed research result, which is what review reads.
+
+    Matches what ``first_summary`` streams, so review gets the same input (and
+    cache key) whether research was followed live, already finished or resumed.
+    """
+    for artifact in research.get("artifacts") or []:
+        if isinstance(artifact, dict) and isinstance(artifact.get("summary"), str):
+            return artifact["summary"]
+    content = research["message"]["content"]
+    try:
+        parsed = json.loads(content)
+    except ValueError:
+        return content
+    return parsed["summary"] if isinstance(parsed, dict) and isinstance(parsed.get("summary"), str) else content
 
 
-def post_message(url: str, content: str, context_id: str, task_id: str | None = None) -> dict:
-    payload = {
+async def first_summary(agent: AgentClient, submitted: dict) -> str:
+    """Return the research summary as soon as it has fully streamed.
+
+    Falls back to the task's final reply when no summary artifact is streamed
+    (e.g. the agent answered from a fallback path); raises ``StageFailed`` if
+    the task ends without completing.
+    """
+    async for event in agent.events(submitted["task_id"]):
+        artifact = event.get("artifact") or {}
+        if artifact.get("name") == "summary" and event.get("last_chunk"):
+            return artifact["value"]
+    return summary_of(require_completed("research", await agent.wait(submitted)))
+
+
+def agent_urls(base_url: Optional[str] = None) -> Dict[str, str]:
+    """Agent URLs from the environment, or all mounted under one unified app."""
+    if base_url is None:
+        return dict(AGENT_URLS)
+    return {name: f"{base_url.rstrip('/')}/{name}" for name in AGENT_URLS}
+
+
+async def load_journal(agents: Dict[str, AgentClient], context_id: str) -> Dict[str, dict]:
+    """Each stage's journal entry for ``context_id``, asked of the agent that ran it."""
+    views = await asyncio.gather(*(agent.journal(context_id) for agent in agents.values()))
+    return {name: view[name] for name, view in zip(agents, views) if name in view}
+
+
+def journaled(entry: dict, context_id: str) -> dict:
+    """A journal entry shaped like what ``AgentClient.send``/``wait`` return."""
+    return {
         "context_id": context_id,
-        "task_id": task_id,
-        "message": {"role": "user", "content": content},
+        "task_id": entry["task_id"],
+        "state": entry["state"],
+        "message": entry["message"] or {"role": "assistant", "content": ""},
+        "artifacts": entry["artifacts"],
+        "metadata": entry["metadata"],
+        "resumed": True,
     }
-    response = httpx.post(f"{url}/message", json=payload, timeout=20)
-    response.raise_for_status()
-    return response.json()
 
 
-def run_pipeline(prompt: str) -> dict:
-    context_id = str(uuid.uuid4())
-    triage = post_message(TRIAGE_URL, prompt, context_id)
-    
-    # Fetch the actual route from triage artifacts (not naive string matching)
+def pipeline_stages(
+    agents: Dict[str, AgentClient], prompt: str, context_id: str, journal: Optional[Dict[str, dict]] = None
+) -> List[Stage]:
+    triage = agents["triage"]
+    research = agents["research"]
+    review = agents["review"]
+    presentation = agents["presentation"]
+    journal = journal or {}
+
+    def reuse(name: str) -> Optional[dict]:
+        # Completed stages are reused as-is; running ones are followed rather than resent
+        entry = journal.get(name)
+        if entry is None or entry["state"] not in REUSABLE_STATES:
+            return None
+        return journaled(entry, context_id)
+
+    def completed(name: str) -> bool:
+        return journal.get(name, {}).get("state") == "completed"
+
+    async def run_triage(_: Dict[str, Any]) -> dict:
+        return require_completed("triage", await triage.wait(reuse("triage") or await triage.send(prompt, context_id)))
+
+    async def submit_research(_: Dict[str, Any]) -> Any:
+        previous = reuse("research")
+        if previous is not None:
+            return previous
+        if completed("review") or (completed("triage") and route_of(reuse("triage")) != "medical_research"):
+            return SKIPPED
+        # Speculative: most prompts route to research, so start it alongside triage
+        return await research.send(prompt, context_id)
+
+    async def confirm_research(inputs: Dict[str, Any]) -> Any:
+        submitted = inputs["research_submit"]
+        if route_of(inputs["triage"]) != "medical_research":
+            if submitted is not SKIPPED and submitted["state"] not in TERMINAL_STATES:
+                await research.cancel(submitted["task_id"])
+            return SKIPPED
+        return submitted
+
+    async def research_summary(inputs: Dict[str, Any]) -> Any:
+        gate = inputs["research_gate"]
+        if gate is SKIPPED or reuse("review") is not None:
+            return SKIPPED
+        if gate["state"] in TERMINAL_STATES:
+            return summary_of(require_completed("research", gate))
+        return await first_summary(research, gate)
+
+    async def research_result(inputs: Dict[str, Any]) -> Any:
+        if inputs["research_gate"] is SKIPPED:
+            return SKIPPED
+        return require_completed("research", await research.wait(inputs["research_gate"]))
+
+    async def run_review(inputs: Dict[str, Any]) -> Any:
+        previous = reuse("review")
+        if previous is not None:
+            return require_completed("review", await review.wait(previous))
+        if inputs["research_summary"] is SKIPPED:
+            return SKIPPED
+        return require_completed("review", await review.run(inputs["research_summary"], context_id))
+
+    async def run_presentation(inputs: Dict[str, Any]) -> dict:
+        previous = reuse("presentation")
+        if previous is not None:
+            return require_completed("presentation", await presentation.wait(previous))
+        if inputs["review"] is SKIPPED:
+            return require_completed("presentation", await presentation.run(prompt, context_id))
+        # Large reviews travel as a reference; co-located agents resolve it without a copy.
+        # A journaled review's reference may have expired from the artifact store, so it sends content
+        reviewed = inputs["review"]["message"]
+        ref = None if inputs["review"].get("resumed") else review.reference(reviewed)
+        return require_completed("presentation", await presentation.run(reviewed["content"], context_id, ref=ref))
+
+    return [
+        Stage("triage", run_triage),
+        Stage("research_submit", submit_research),
+        Stage("research_gate", confirm_research, ("triage", "research_submit")),
+        Stage("research_summary", research_summary, ("research_gate",)),
+        Stage("research", research_result, ("research_gate",)),
+        Stage("review", run_review, ("research_summary",)),
+        Stage("presentation", run_presentation, ("triage", "review")),
+    ]
+
+
+def route_of(triage: dict) -> str:
+    return triage.get("metadata", {}).get("route", "medical_research")
+
+
+def _agents(
+    http: Optional[httpx.AsyncClient],
+    urls: Optional[Dict[str, str]],
+    limits: Optional[Dict[str, asyncio.Semaphore]],
+) -> Dict[str, AgentClient]:
+    http = http or shared_client()
+    limits = limits or {}
+    return {
+        name: AgentClient(http, url, limits.get(name))
+        for name, url in (urls or agent_urls(default_base_url())).items()
+    }
+
+
+async def run_pipeline_async(
+    prompt: str,
+    http: Optional[httpx.AsyncClient] = None,
+    urls: Optional[Dict[str, str]] = None,
+    limits: Optional[Dict[str, asyncio.Semaphore]] = None,
+    context_id: Optional[str] = None,
+) -> dict:
+    """Run one prompt through the pipeline.
+
+    ``limits`` maps agent names to semaphores shared across concurrent
+    pipelines, capping each agent's in-flight tasks. Without ``http`` the
+    pipeline uses the long-lived shared client (see client/transport.py).
+    With ``context_id`` an earlier run of that context is continued: stages
+    its journal records as completed are reused and running ones followed.
+    """
+    agents = _agents(http, urls, limits)
+    if context_id is None:
+        return await _run(agents, prompt, str(uuid.uuid4()), {})
+    return await _run(agents, prompt, context_id, await load_journal(agents, context_id))
+
+
+async def resume_pipeline_async(
+    context_id: str,
+    prompt: Optional[str] = None,
+    http: Optional[httpx.AsyncClient] = None,
+    urls: Optional[Dict[str, str]] = None,
+    limits: Optional[Dict[str, asyncio.Semaphore]] = None,
+) -> dict:
+    """Continue the pipeline for ``context_id`` from its first incomplete stage.
+
+    The prompt defaults to the one triage journaled; it is only needed when
+    the earlier run failed before triage finished.
+    """
+    agents = _agents(http, urls, limits)
+    journal = await load_journal(agents, context_id)
+    prompt = prompt or journal.get("triage", {}).get("input")
+    if not prompt:
+        raise ValueError(f"Nothing journaled for context {context_id}; pass the prompt to start it")
+    return await _run(agents, prompt, context_id, journal)
+
+
+async def _run(agents: Dict[str, AgentClient], prompt: str, context_id: str, journal: Dict[str, dict]) -> dict:
+    dag = DagResult()
+    failed: Optional[StageFailed] = None
+    finished = False
     try:
-        resubscribe = httpx.post(
-            f"{TRIAGE_URL}/tasks/resubscribe",
-            json={"task_id": triage["task_id"]},
-            timeout=10
-        )
-        resubscribe.raise_for_status()
-        artifacts = resubscribe.json().get("artifacts", [])
-        route = artifacts[0].get("route", "medical_research") if artifacts else "medical_research"
+        await run_dag(pipeline_stages(agents, prompt, context_id, journal), dag)
+        finished = True
+    except StageFailed as e:
+        failed = e
+    finally:
+        # Whatever stopped the pipeline (a failed stage, a transport error, cancellation),
+        # research started speculatively must not keep running
+        if not finished and (failed is None or failed.stage != "research"):
+            await _cancel_speculative(agents["research"], dag)
+        for agent in agents.values():
+            agent.release_all()
+    result: Dict[str, Any] = {}
+    for name in PIPELINE_STAGES:
+        if failed is not None and name == failed.stage:
+            result[name] = failed.output
+        elif name in dag.outputs:
+            if dag.outputs[name] is not SKIPPED:
+                result[name] = dag.outputs[name]
+        elif failed is not None:
+            # Never submitted, or cancelled while waiting on the failed stage
+            result[name] = {"state": "skipped", "detail": f"{failed.stage} {failed.output.get('state')}"}
+    if failed is not None:
+        result["failed"] = failed.stage
+    result["timings"] = {name: [round(t, 3) for t in span] for name, span in dag.timings.items()}
+    result["resumed"] = [name for name, output in result.items() if isinstance(output, dict) and output.get("resumed")]
+    # Every hop shares context_id; the backend's /traces/{context_id} shows its side
+    result["context_id"] = context_id
+    return result
+
+
+async def _cancel_speculative(research: AgentClient, dag: DagResult) -> None:
+    # Research starts alongside triage; if the pipeline stopped first, don't leave it running
+    submitted = dag.outputs.get("research_submit")
+    if "research" in dag.outputs or not isinstance(submitted, dict) or submitted["state"] in TERMINAL_STATES:
+        return
+    try:
+        await research.cancel(submitted["task_id"])
     except Exception as e:
-        print(f"Failed to get route from triage, defaulting to medical_research: {e}")
-        route = "medical_research"
-    
-    if route == "medical_research":
-        research = post_message(RESEARCH_URL, prompt, context_id)
-        review = post_message(REVIEW_URL, research["message"]["content"], context_id)
-        presentation = post_message(PRESENTATION_URL, review["message"]["content"], context_id)
-        return {
-            "triage": triage,
-            "research": research,
-            "review": review,
-            "presentation": presentation,
-        }
-    presentation = post_message(PRESENTATION_URL, prompt, context_id)
-    return {"triage": triage, "presentation": presentation}
+        # Best effort, and often reached because the transport itself failed
+        print(f"Could not cancel research task {submitted['task_id']}: {e!r}")
+
+
+def run_pipeline(prompt: str) -> dict:
+    return run_sync(run_pipeline_async(prompt))
+
+
+def resume_pipeline(context_id: str, prompt: Optional[str] = None) -> dict:
+    return run_sync(resume_pipeline_async(context_id, prompt))
 
 
 if __name__ == "__main__":
-    result = run_pipeline("Create a patient-friendly presentation on diabetes management.")
-    print(result)
+    parser = argparse.ArgumentParser(description="Run a prompt through the agent pipeline.")
+    parser.add_argument("prompt", nargs="?", help="defaults to a demo prompt, or to the journaled one with --resume")
+    parser.add_argument("--resume", metavar="CONTEXT_ID", help="continue an earlier pipeline from its journal")
+    args = parser.parse_args()
+    if args.resume:
+        print(resume_pipeline(args.resume, args.prompt))
+    else:
+        print(run_pipeline(args.prompt or "Create a patient-friendly presentation on diabetes management."))
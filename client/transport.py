@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+import os
+import threading
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Tuple, TypeVar
+
+import httpx
+
+# "network" talks to the agents over HTTP; "asgi" calls services.main's app in this process
+ORCHESTRATOR_TRANSPORT = os.getenv("ORCHESTRATOR_TRANSPORT", "network")
+# Base URL of the in-process app; requests never leave the process, so the host is only a label
+IN_PROCESS_URL = "http://agents"
+
+T = TypeVar("T")
+
+
+def http2_enabled() -> bool:
+    """HTTP/2 when asked for (the default) and the optional ``h2`` package is installed."""
+    if os.getenv("ORCHESTRATOR_HTTP2", "1") == "0":
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(os.getenv("ORCHESTRATOR_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("ORCHESTRATOR_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(os.getenv("ORCHESTRATOR_KEEPALIVE_EXPIRY", "30")),
+    )
+
+
+class _ResponseStream(httpx.AsyncByteStream):
+    def __init__(self, chunks: "asyncio.Queue[Optional[bytes]]", app_task: asyncio.Task, disconnected: asyncio.Event):
+        self._chunks = chunks
+        self._app_task = app_task
+        self._disconnected = disconnected
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        while True:
+            chunk = await self._chunks.get()
+            if chunk is None:
+                return
+            yield chunk
+
+    async def aclose(self) -> None:
+        # Like a client hanging up: the app sees http.disconnect, and is stopped if it keeps going
+        self._disconnected.set()
+        if not self._app_task.done():
+            self._app_task.cancel()
+        await asyncio.wait([self._app_task])
+
+
+class StreamingASGITransport(httpx.AsyncBaseTransport):
+    """Calls an ASGI app directly, with no sockets.
+
+    Unlike ``httpx.ASGITransport``, which returns only after the app has sent
+    the whole body, the response is returned as soon as its headers are sent
+    and the body streams as the app writes it, so SSE endpoints can be
+    followed live. Closing the response disconnects the request.
+    """
+
+    def __init__(self, app: Any, client: Tuple[str, int] = ("127.0.0.1", 0)):
+        self.app = app
+        self.client = client
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = b"".join([part async for part in request.stream])
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "headers": [(k.lower(), v) for k, v in request.headers.raw],
+            "scheme": request.url.scheme,
+            "path": request.url.path,
+            "raw_path": request.url.raw_path.split(b"?")[0],
+            "query_string": request.url.query,
+            "server": (request.url.host, request.url.port),
+            "client": self.client,
+            "root_path": "",
+        }
+        received = False
+        disconnected = asyncio.Event()
+        started = asyncio.Event()
+        start: Dict[str, Any] = {}
+        chunks: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue()
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                start.update(message)
+                started.set()
+            elif message["type"] == "http.response.body":
+                if message.get("body") and request.method != "HEAD":
+                    chunks.put_nowait(message["body"])
+                if not message.get("more_body", False):
+                    chunks.put_nowait(None)
+
+        async def run() -> None:
+            try:
+                await self.app(scope, receive, send)
+            except Exception as e:
+                if not start:
+                    raise
+                # Headers are already out; the body just ends, as it would on a dropped connection
+                print(f"In-process {request.method} {request.url.path} failed mid-response: {e!r}")
+            finally:
+                chunks.put_nowait(None)
+                started.set()
+
+        app_task = asyncio.get_running_loop().create_task(run())
+        await started.wait()
+        if not start:
+            # The app failed (or returned) before sending a response
+            await app_task
+            raise RuntimeError(f"{request.method} {request.url} returned no response")
+        headers: List[Tuple[bytes, bytes]] = start.get("headers", [])
+        return httpx.Response(start["status"], headers=headers, stream=_ResponseStream(chunks, app_task, disconnected))
+
+
+def make_client(transport: Optional[str] = None, limits: Optional[httpx.Limits] = None) -> httpx.AsyncClient:
+    """A new pooled client for ``transport`` (default ``ORCHESTRATOR_TRANSPORT``)."""
+    if (transport or ORCHESTRATOR_TRANSPORT) == "asgi":
+        # Deferred: only the in-process mode needs the agents importable here
+        from services.main import app
+        from sse_starlette.sse import AppStatus
+
+        # sse-starlette keeps one shutdown Event per process, bound to the loop that made it;
+        # a new client usually means a new loop (run_pipeline), so let it be recreated
+        AppStatus.should_exit_event = None
+        return httpx.AsyncClient(transport=StreamingASGITransport(app), base_url=IN_PROCESS_URL)
+    return httpx.AsyncClient(http2=http2_enabled(), limits=limits or pool_limits())
+
+
+class _SharedClient:
+    # httpx clients are bound to the event loop they first ran on, so asyncio.run()
+    # callers (run_pipeline) get a fresh client per loop
+    def __init__(self) -> None:
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def get(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop or self._client.is_closed:
+            self._client = make_client()
+            self._loop = loop
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+
+_SHARED = _SharedClient()
+
+
+def shared_client() -> httpx.AsyncClient:
+    """The orchestrator's long-lived client, reused by every pipeline on this event loop."""
+    return _SHARED.get()
+
+
+async def close_shared_client() -> None:
+    await _SHARED.close()
+
+
+class _BackgroundLoop:
+    """One event loop in a daemon thread for synchronous callers.
+
+    Every run_sync() call runs there, so repeated run_pipeline() calls share
+    the pooled client (and its open connections) instead of each opening and
+    closing one under asyncio.run(). The client is closed at exit.
+    """
+
+    def __init__(self) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def run(self, work: Awaitable[T]) -> T:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="orchestrator-loop", daemon=True).start()
+                atexit.register(self.close)
+            loop = self._loop
+        future = asyncio.run_coroutine_threadsafe(_await(work), loop)
+        try:
+            return future.result()
+        except BaseException:
+            # e.g. KeyboardInterrupt: don't leave the pipeline running in the background
+            future.cancel()
+            raise
+
+    def close(self) -> None:
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(close_shared_client(), loop).result(timeout=10)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+
+
+async def _await(work: Awaitable[T]) -> T:
+    return await work
+
+
+_BACKGROUND = _BackgroundLoop()
+
+
+def run_sync(work: Awaitable[T]) -> T:
+    """Run ``work`` to completion from synchronous code, reusing the shared client across calls."""
+    return _BACKGROUND.run(work)
+
+
+def default_base_url() -> Optional[str]:
+    """Where agents live by default: the in-process app, or the *_URL env vars (``None``)."""
+    return IN_PROCESS_URL if ORCHESTRATOR_TRANSPORT == "asgi" else None
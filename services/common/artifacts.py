@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+
+from services.common.cache import CacheStore, SQLiteStore
+from services.common.metrics import Collected
+from services.common.schemas import ArtifactRef, Message
+
+# Messages at least this large are stored once and passed between agents by reference
+REF_MIN_BYTES = int(os.getenv("ARTIFACT_REF_MIN_BYTES", "1024"))
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class ArtifactStore:
+    """Content-addressed text shared by every agent in the process.
+
+    Agents put their output here once; downstream requests carry an
+    ``ArtifactRef`` instead of the text. Co-located agents (services/main.py)
+    resolve a reference to the very same string object, so a pipeline holds
+    one copy of each payload however many tasks refer to it. Identical
+    content from different tasks is stored once.
+
+    Entries are evicted least recently used once over ``max_bytes`` or after
+    ``ttl_s``. An optional persistent tier lets other workers sharing the
+    file resolve references too.
+    """
+
+    def __init__(self, max_bytes: int, ttl_s: float = 3600.0, disk: Optional[CacheStore] = None):
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.disk = disk
+        self.bytes = 0
+        # hash -> (text, size in bytes, expires at)
+        self._entries: "OrderedDict[str, Tuple[str, int, float]]" = OrderedDict()
+        self._http: Optional[httpx.AsyncClient] = None
+        # Digests whose content has reached the persistent tier, and writes still in flight
+        self._persisted: set = set()
+        self._writes: Dict[str, asyncio.Future] = {}
+        self.counters = {"stored": 0, "deduplicated": 0, "local": 0, "disk": 0, "fetched": 0, "missing": 0}
+
+    def put(self, text: str) -> ArtifactRef:
+        data = text.encode("utf-8")
+        digest = content_hash(data)
+        if digest in self._entries:
+            self.counters["deduplicated"] += 1
+            # Keep the copy already held; refresh its lifetime
+            held, size, _ = self._entries.pop(digest)
+            self._entries[digest] = (held, size, time.time() + self.ttl_s)
+        else:
+            self.counters["stored"] += 1
+            self._insert(digest, text, len(data))
+            if self.disk is not None:
+                self._persist(digest, data)
+        return ArtifactRef(hash=digest, size=len(data))
+
+    def _insert(self, digest: str, text: str, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        self._entries[digest] = (text, size, time.time() + self.ttl_s)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            self._pop(next(iter(self._entries)))
+
+    def _persist(self, digest: str, data: bytes) -> None:
+        disk = self.disk
+        assert disk is not None
+
+        def write() -> None:
+            try:
+                disk.put(digest, data, self.ttl_s)
+            except Exception as e:
+                print(f"Artifact store write failed: {e}")
+                return
+            if digest in self._entries:
+                self._persisted.add(digest)
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            write()
+            return
+        pending = self._writes[digest] = loop.run_in_executor(None, write)
+        pending.add_done_callback(lambda _: self._writes.pop(digest, None) if self._writes.get(digest) is pending else None)
+
+    def _pop(self, digest: str) -> None:
+        entry = self._entries.pop(digest, None)
+        self._persisted.discard(digest)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    async def persist(self, digest: str) -> bool:
+        """Wait until ``digest`` is in the persistent tier; ``False`` if there is none.
+
+        Waits for the background write from ``put`` if it is still in flight
+        (writing again off the loop only if it failed), so a caller that then
+        drops its own copy of the content (TaskStore) knows any worker can
+        still read it.
+        """
+        if self.disk is None:
+            return False
+        pending = self._writes.get(digest)
+        if pending is not None:
+            await asyncio.shield(pending)
+        if digest in self._persisted:
+            return True
+        text = self.get_local(digest)
+        if text is None:
+            return False
+        data = text.encode("utf-8")
+        self._persist(digest, data)
+        pending = self._writes.get(digest)
+        if pending is not None:
+            await asyncio.shield(pending)
+        return digest in self._persisted
+
+    def persisted(self, digest: str) -> bool:
+        """Whether ``digest`` has reached the persistent tier."""
+        return digest in self._persisted
+
+    def get_local(self, digest: str) -> Optional[str]:
+        """The held text for ``digest``, from memory only."""
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        if entry[2] <= time.time():
+            self._pop(digest)
+            return None
+        self._entries.move_to_end(digest)
+        return entry[0]
+
+    async def get(self, digest: str) -> Optional[str]:
+        text = self.get_local(digest)
+        if text is not None:
+            self.counters["local"] += 1
+            return text
+        if self.disk is not None:
+            return self._load(digest, await asyncio.to_thread(self._read, digest))
+        return None
+
+    def get_durable(self, digest: str) -> Optional[str]:
+        """Like ``get``, but blocking: memory, then the persistent tier."""
+        text = self.get_local(digest)
+        if text is not None:
+            self.counters["local"] += 1
+            return text
+        if self.disk is not None:
+            return self._load(digest, self._read(digest))
+        return None
+
+    def _read(self, digest: str) -> Optional[bytes]:
+        assert self.disk is not None
+        try:
+            return self.disk.get(digest)
+        except Exception as e:
+            print(f"Artifact store read failed: {e}")
+            return None
+
+    def _load(self, digest: str, data: Optional[bytes]) -> Optional[str]:
+        if data is None:
+            return None
+        self.counters["disk"] += 1
+        text = data.decode("utf-8")
+        self._insert(digest, text, len(data))
+        if digest in self._entries:
+            self._persisted.add(digest)
+        return text
+
+    async def resolve(self, ref: ArtifactRef) -> Optional[str]:
+        """Text for ``ref``: held here, else fetched from ``ref.url`` and verified."""
+        text = await self.get(ref.hash)
+        if text is not None or not ref.url:
+            if text is None:
+                self.counters["missing"] += 1
+            return text
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=float(os.getenv("ARTIFACT_FETCH_TIMEOUT_S", "10")))
+        try:
+            response = await self._http.get(ref.url)
+        except httpx.HTTPError as e:
+            print(f"Artifact fetch from {ref.url} failed: {e}")
+            self.counters["missing"] += 1
+            return None
+        if response.status_code != 200 or content_hash(response.content) != ref.hash:
+            self.counters["missing"] += 1
+            return None
+        self.counters["fetched"] += 1
+        text = response.content.decode("utf-8")
+        self.put(text)
+        return text
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "disk_tier": self.disk.stats() if self.disk is not None else None,
+        }
+
+
+_path = os.getenv("ARTIFACT_STORE_PATH", "")
+ARTIFACTS = ArtifactStore(
+    int(os.getenv("ARTIFACT_STORE_BYTES", str(128 * 1024 * 1024))),
+    ttl_s=float(os.getenv("ARTIFACT_TTL_S", os.getenv("TASK_TTL_S", "3600"))),
+    disk=SQLiteStore(_path, int(os.getenv("ARTIFACT_STORE_DISK_BYTES", str(1024 * 1024 * 1024)))) if _path else None,
+)
+
+
+def _artifact_samples() -> List[Tuple[Dict[str, Any], float]]:
+    return [({"outcome": name}, value) for name, value in ARTIFACTS.counters.items()]
+
+
+Collected("a2a_artifacts_total", "Artifact store writes, dedup hits and reference resolutions", _artifact_samples, kind="counter")
+Collected("a2a_artifact_store_bytes", "Bytes of artifact content held in memory", lambda: [({}, ARTIFACTS.bytes)])
+
+
+async def share_message(message: Message) -> Message:
+    """Store a large reply's content and attach its reference (content stays for callers).
+
+    Returns once the persistent tier (if any) holds it, so the finished task
+    can be stored by reference alone.
+    """
+    if message.ref is not None or not REF_MIN_BYTES <= len(message.content) <= ARTIFACTS.max_bytes:
+        return message
+    ref = ARTIFACTS.put(message.content)
+    await ARTIFACTS.persist(ref.hash)
+    return Message(role=message.role, content=message.content, ref=ref)
+
+
+def strip_content(message: Message, ttl_s: float) -> Message:
+    """The reference alone, for holding a finished task without another copy.
+
+    Only when the persistent tier already holds the content (see
+    ``share_message``) for at least ``ttl_s``; memory alone can evict it,
+    and other workers can't read it, so the content is kept inline otherwise.
+    """
+    if message.ref is None or not message.content or ARTIFACTS.ttl_s < ttl_s:
+        return message
+    if not ARTIFACTS.persisted(message.ref.hash):
+        return message
+    return Message(role=message.role, ref=message.ref)
+
+
+def restore_content(message: Message) -> Message:
+    """Re-attach stripped content from memory or the persistent tier."""
+    if message.ref is None or message.content:
+        return message
+    text = ARTIFACTS.get_durable(message.ref.hash)
+    return message if text is None else Message(role=message.role, content=text, ref=message.ref)
+
+
+async def message_text(message: Message) -> str:
+    """A request message's content, resolving its reference if it has one."""
+    if message.ref is None or message.content:
+        return message.content
+    text = await ARTIFACTS.resolve(message.ref)
+    if text is None:
+        raise HTTPException(status_code=404, detail=f"Artifact {message.ref.hash} not found")
+    return text
+
+
+router = APIRouter()
+
+
+@router.get("/artifacts/{digest}")
+async def fetch_artifact(digest: str):
+    text = await ARTIFACTS.get(digest)
+    if text is None:
+        raise HTTPException(status_code=404, detail=f"Artifact {digest} not found")
+    return Response(
+        text,
+        media_type="text/plain; charset=utf-8",
+        # Content-addressed, so it never changes
+        headers={"ETag": f'"{digest}"', "Cache-Control": "public, max-age=31536000, immutable"},
+    )
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.common.encoding import dumps, loads
+
+# Pruning runs on writes, at most this often
+PRUNE_INTERVAL_S = 60.0
+
+# A write run on the writer's connection, and what to call with its result once committed
+Write = Tuple[Callable[[sqlite3.Connection], Any], Optional[Callable[[Any], None]]]
+
+
+class SQLiteWriter:
+    """A thread that owns all writes to one SQLite database.
+
+    Callers queue writes and return at once, so the event loop never waits on
+    the disk. The thread commits whatever has queued up as one transaction,
+    then calls each write's ``done`` callback (on the writer thread) with its
+    result. Give it its own connection to a WAL file so readers aren't held
+    up while it commits; a connection shared with readers (an in-memory
+    database) needs their ``lock``.
+    """
+
+    def __init__(self, db: sqlite3.Connection, name: str, lock: Optional[threading.Lock] = None):
+        self.name = name
+        self._db = db
+        self._lock = lock
+        self._queue: "queue.SimpleQueue[Optional[Write]]" = queue.SimpleQueue()
+        self.batches = 0
+        self.writes = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, write: Callable[[sqlite3.Connection], Any], done: Optional[Callable[[Any], None]] = None) -> None:
+        self._queue.put((write, done))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued so far is committed."""
+        committed = threading.Event()
+        self.submit(lambda _: None, lambda _: committed.set())
+        return committed.wait(timeout)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while batch[-1] is not None:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = batch[-1] is None
+            writes = [item for item in batch if item is not None]
+            if writes:
+                if self._lock is not None:
+                    with self._lock:
+                        self._commit(writes)
+                else:
+                    self._commit(writes)
+            if stopping:
+                return
+
+    def _commit(self, writes: List[Write]) -> None:
+        results = []
+        try:
+            self._db.execute("BEGIN IMMEDIATE")
+            for write, _ in writes:
+                try:
+                    results.append(write(self._db))
+                except sqlite3.Error as e:
+                    print(f"{self.name}: SQLite write failed: {e}")
+                    results.append(None)
+            self._db.execute("COMMIT")
+        except sqlite3.Error as e:
+            print(f"{self.name}: SQLite commit failed: {e}")
+            if self._db.in_transaction:
+                self._db.execute("ROLLBACK")
+            results = [None] * len(writes)
+        self.batches += 1
+        self.writes += len(writes)
+        for (_, done), result in zip(writes, results):
+            if done is not None:
+                try:
+                    done(result)
+                except Exception as e:
+                    print(f"{self.name}: write callback failed: {e}")
+
+
+class SharedBackend:
+    """Task state and event log shared by every worker process and node.
+
+    Agents keep their per-process ``TaskStore`` and ``EventBus`` APIs; when a
+    backend is configured those read and write through it, so a follow-up
+    request can land on any worker. A Redis-like store would implement this
+    with hashes for task state and streams (``XADD``/``XREAD BLOCK``) for events.
+    """
+
+    def load_task(self, agent: str, task_id: str) -> Optional[Tuple[bytes, bool]]:
+        raise NotImplementedError
+
+    def save_task(self, agent: str, task_id: str, payload: bytes, compressed: bool, terminal: bool) -> None:
+        """Store the task's state; ``load_task`` in this process sees it at once, other workers once written."""
+        raise NotImplementedError
+
+    def append_event(
+        self, task_id: str, event: Dict[str, Any], terminal: bool, stored: Optional[Callable[[int], None]] = None
+    ) -> None:
+        """Append ``event`` to the log; ``stored`` is called with its id once readable.
+
+        Ids increase across the whole log. ``stored`` may run on another thread.
+        """
+        raise NotImplementedError
+
+    def read_events(self, task_id: str, after: int) -> List[Tuple[int, Dict[str, Any]]]:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+    def close(self) -> None:
+        """Finish pending writes."""
+
+
+class SQLiteBackend(SharedBackend):
+    """Default local backend: one SQLite file in WAL mode shared by all workers.
+
+    SQLite has no push notifications, so subscribers in other processes poll
+    ``read_events``; subscribers in the publishing process are woken directly.
+    Writes go through a ``SQLiteWriter`` thread, batched into one commit.
+    """
+
+    def __init__(self, path: str, task_ttl_s: float = 3600.0, event_retention_s: float = 300.0):
+        self.path = path
+        self.task_ttl_s = task_ttl_s
+        self.event_retention_s = event_retention_s
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                agent TEXT NOT NULL, task_id TEXT NOT NULL, payload BLOB NOT NULL,
+                compressed INTEGER NOT NULL, terminal INTEGER NOT NULL, updated_at REAL NOT NULL,
+                PRIMARY KEY (agent, task_id)
+            );
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, task_id TEXT NOT NULL, payload TEXT NOT NULL,
+                terminal INTEGER NOT NULL, created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS events_task ON events (task_id, id);
+            """
+        )
+        self._last_prune = time.time()
+        # Saved but not yet committed, so this process reads its own writes
+        self._pending: Dict[Tuple[str, str], Tuple[bytes, bool]] = {}
+        self._pending_lock = threading.Lock()
+        self._writer = SQLiteWriter(
+            sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10.0), "task-backend-writer"
+        )
+
+    def load_task(self, agent: str, task_id: str) -> Optional[Tuple[bytes, bool]]:
+        with self._pending_lock:
+            pending = self._pending.get((agent, task_id))
+        if pending is not None:
+            return pending
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payload, compressed FROM tasks WHERE agent = ? AND task_id = ?", (agent, task_id)
+            ).fetchone()
+        return (row[0], bool(row[1])) if row is not None else None
+
+    def save_task(self, agent: str, task_id: str, payload: bytes, compressed: bool, terminal: bool) -> None:
+        key = (agent, task_id)
+        entry = (payload, compressed)
+        with self._pending_lock:
+            self._pending[key] = entry
+        now = time.time()
+
+        def write(db: sqlite3.Connection) -> None:
+            db.execute(
+                "INSERT OR REPLACE INTO tasks (agent, task_id, payload, compressed, terminal, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (agent, task_id, payload, int(compressed), int(terminal), now),
+            )
+            self._maybe_prune(db, now)
+
+        def written(_: None) -> None:
+            with self._pending_lock:
+                # A newer save of the same task may be queued behind this one
+                if self._pending.get(key) is entry:
+                    del self._pending[key]
+
+        self._writer.submit(write, written)
+
+    def append_event(
+        self, task_id: str, event: Dict[str, Any], terminal: bool, stored: Optional[Callable[[int], None]] = None
+    ) -> None:
+        now = time.time()
+        payload = dumps(event).decode("utf-8")
+
+        def write(db: sqlite3.Connection) -> int:
+            cursor = db.execute(
+                "INSERT INTO events (task_id, payload, terminal, created_at) VALUES (?, ?, ?, ?)",
+                (task_id, payload, int(terminal), now),
+            )
+            self._maybe_prune(db, now)
+            return cursor.lastrowid
+
+        self._writer.submit(write, stored)
+
+    def read_events(self, task_id: str, after: int) -> List[Tuple[int, Dict[str, Any]]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, payload FROM events WHERE task_id = ? AND id > ? ORDER BY id", (task_id, after)
+            ).fetchall()
+        return [(event_id, loads(payload)) for event_id, payload in rows]
+
+    def _maybe_prune(self, db: sqlite3.Connection, now: float) -> None:
+        # Runs on the writer thread
+        if now - self._last_prune < PRUNE_INTERVAL_S:
+            return
+        self._last_prune = now
+        db.execute("DELETE FROM tasks WHERE terminal = 1 AND updated_at < ?", (now - self.task_ttl_s,))
+        db.execute(
+            "DELETE FROM events WHERE task_id IN"
+            " (SELECT task_id FROM events WHERE terminal = 1 AND created_at < ?)",
+            (now - self.event_retention_s,),
+        )
+        # Context streams (and tasks that never finished) have no terminal event
+        db.execute("DELETE FROM events WHERE created_at < ?", (now - self.task_ttl_s,))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        return self._writer.flush(timeout)
+
+    def close(self) -> None:
+        self._writer.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tasks = self._db.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+            events = self._db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "tasks": tasks,
+            "events": events,
+            "pending_tasks": pending,
+            "write_batches": self._writer.batches,
+            "writes": self._writer.writes,
+        }
+
+
+_backend: Optional[SharedBackend] = None
+
+
+def get_backend() -> Optional[SharedBackend]:
+    """The configured shared backend, or ``None`` for per-process state (TASK_BACKEND=memory)."""
+    global _backend
+    if _backend is None:
+        kind = os.getenv("TASK_BACKEND", "memory")
+        if kind == "memory":
+            return None
+        if kind != "sqlite":
+            raise ValueError(f"Unknown TASK_BACKEND {kind!r}")
+        if not os.getenv("ARTIFACT_STORE_PATH"):
+            # Workers resolve each other's artifact references through its shared tier
+            raise ValueError("TASK_BACKEND=sqlite needs ARTIFACT_STORE_PATH")
+        _backend = SQLiteBackend(
+            os.getenv("TASK_DB_PATH", ".cache/tasks.sqlite3"),
+            task_ttl_s=float(os.getenv("TASK_TTL_S", "3600")),
+            event_retention_s=float(os.getenv("SSE_RETENTION_S", "300")),
+        )
+    return _backend
+
+
+def close_backend() -> None:
+    """Commit the backend's queued writes; called on shutdown."""
+    global _backend
+    if _backend is not None:
+        _backend.close()
+        _backend = None
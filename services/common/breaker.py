@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from services.common.metrics import Collected, Counter
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+TRANSITIONS = Counter("a2a_circuit_transitions_total", "Circuit breaker state changes")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+
+    def __init__(self, provider: str, reason: str, retry_after_s: float):
+        super().__init__(f"{provider} circuit open ({reason}); retry in {retry_after_s:.1f}s")
+        self.provider = provider
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+    def artifact(self) -> Dict[str, Any]:
+        """Structured failure reason recorded on the task."""
+        return {
+            "error": "circuit_open",
+            "provider": self.provider,
+            "reason": self.reason,
+            "retry_after_s": round(self.retry_after_s, 1),
+        }
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over a sliding window of call outcomes.
+
+    The circuit opens when, over the last ``window_s`` seconds and at least
+    ``min_calls`` calls, the share of failed calls reaches ``error_rate`` or
+    the share of calls slower than ``slow_call_s`` reaches ``slow_rate``.
+    While open every call fails immediately. After ``open_s`` one probe call
+    is let through (half-open); its success closes the circuit, its failure
+    reopens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        error_rate: float = 0.5,
+        slow_call_s: float = 20.0,
+        slow_rate: float = 0.5,
+        min_calls: int = 5,
+        window_s: float = 30.0,
+        open_s: float = 15.0,
+    ):
+        self.name = name
+        self.error_rate = error_rate
+        self.slow_call_s = slow_call_s
+        self.slow_rate = slow_rate
+        self.min_calls = min_calls
+        self.window_s = window_s
+        self.open_s = open_s
+        self.state = CLOSED
+        self.reason = ""
+        self.opened_at = 0.0
+        self.probe_started: Optional[float] = None
+        # (finished at, failed, slow)
+        self._outcomes: Deque[Tuple[float, bool, bool]] = deque()
+        self.counters = {"calls": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go to the provider now."""
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now - self.opened_at < self.open_s:
+                self._reject(self.open_s - (now - self.opened_at))
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            # One probe at a time; a probe that never reported back is replaced after open_s
+            if self.probe_started is not None and now - self.probe_started < self.open_s:
+                self._reject(self.open_s - (now - self.probe_started))
+            self.probe_started = now
+        self.counters["calls"] += 1
+
+    def raise_if_open(self) -> None:
+        """Fail fast while open, without claiming the half-open probe."""
+        if self.state == OPEN:
+            remaining = self.open_s - (time.monotonic() - self.opened_at)
+            if remaining > 0:
+                raise CircuitOpenError(self.name, self.reason, remaining)
+
+    def record_success(self, latency_s: float) -> None:
+        slow = latency_s >= self.slow_call_s
+        if self.state == HALF_OPEN:
+            if slow:
+                self._open(f"probe took {latency_s:.1f}s")
+            else:
+                self._outcomes.clear()
+                self._transition(CLOSED)
+            return
+        self._record(False, slow)
+
+    def record_failure(self, error: BaseException) -> None:
+        self.counters["failures"] += 1
+        if self.state == HALF_OPEN:
+            self._open(f"probe failed: {type(error).__name__}")
+            return
+        self._record(True, False)
+
+    def _record(self, failed: bool, slow: bool) -> None:
+        now = time.monotonic()
+        self._outcomes.append((now, failed, slow))
+        while self._outcomes and now - self._outcomes[0][0] > self.window_s:
+            self._outcomes.popleft()
+        if self.state != CLOSED or len(self._outcomes) < self.min_calls:
+            return
+        total = len(self._outcomes)
+        failures = sum(1 for _, f, _ in self._outcomes if f)
+        slow_calls = sum(1 for _, _, s in self._outcomes if s)
+        if failures / total >= self.error_rate:
+            self._open(f"{failures}/{total} calls failed")
+        elif slow_calls / total >= self.slow_rate:
+            self._open(f"{slow_calls}/{total} calls slower than {self.slow_call_s:g}s")
+
+    def _open(self, reason: str) -> None:
+        self.reason = reason
+        self.opened_at = time.monotonic()
+        self.probe_started = None
+        self.counters["opened"] += 1
+        self._transition(OPEN)
+        print(f"Circuit {self.name} opened: {reason}")
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        TRANSITIONS.inc(breaker=self.name, state=state)
+        self.state = state
+        if state != HALF_OPEN:
+            self.probe_started = None
+        if state == CLOSED:
+            print(f"Circuit {self.name} closed")
+
+    def _reject(self, retry_after_s: float) -> None:
+        self.counters["rejected"] += 1
+        raise CircuitOpenError(self.name, self.reason, max(0.0, retry_after_s))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "state": self.state,
+            "reason": self.reason if self.state != CLOSED else None,
+            "window_calls": len(self._outcomes),
+        }
+
+
+BREAKERS: Dict[str, CircuitBreaker] = {}
+
+Collected(
+    "a2a_circuit_state",
+    "Circuit breaker state (0 closed, 1 half-open, 2 open)",
+    lambda: [({"breaker": b.name}, STATE_VALUES[b.state]) for b in BREAKERS.values()],
+)
+
+
+def _env(name: str, provider: str, default: str) -> str:
+    # LLM_BREAKER_OPENAI_OPEN_S overrides LLM_BREAKER_OPEN_S
+    return os.getenv(f"LLM_BREAKER_{provider.upper()}_{name}") or os.getenv(f"LLM_BREAKER_{name}", default)
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    breaker = BREAKERS.get(provider)
+    if breaker is None:
+        breaker = BREAKERS[provider] = CircuitBreaker(
+            provider,
+            error_rate=float(_env("ERROR_RATE", provider, "0.5")),
+            slow_call_s=float(_env("SLOW_S", provider, "20")),
+            slow_rate=float(_env("SLOW_RATE", provider, "0.5")),
+            min_calls=int(_env("MIN_CALLS", provider, "5")),
+            window_s=float(_env("WINDOW_S", provider, "30")),
+            open_s=float(_env("OPEN_S", provider, "15")),
+        )
+    return breaker
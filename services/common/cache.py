@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.common.metrics import Collected
+
+# metadata["cache"] values a caller can send to control the result cache
+CACHE_BYPASS = "bypass"  # neither read nor write
+CACHE_REFRESH = "refresh"  # recompute and overwrite
+
+
+def cache_key(agent: str, model: str, system_prompt: str, text: str, **params: Any) -> str:
+    """Content address of an LLM result: same inputs, same key."""
+    normalized = " ".join(text.split())
+    material = json.dumps(
+        [agent, model, hashlib.sha256(system_prompt.encode("utf-8")).hexdigest(), normalized, params],
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class CacheStore:
+    """Interface for one cache tier. Values are opaque bytes."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def put(self, key: str, value: bytes, ttl_s: float) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemoryStore(CacheStore):
+    """LRU bounded by the total size of stored values."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            self._pop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: str, value: bytes, ttl_s: float) -> None:
+        if len(value) > self.max_bytes:
+            return
+        self._pop(key)
+        self._entries[key] = (value, time.time() + ttl_s)
+        self.bytes += len(value)
+        while self.bytes > self.max_bytes:
+            self._pop(next(iter(self._entries)))
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry[0])
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "bytes": self.bytes, "max_bytes": self.max_bytes}
+
+
+class SQLiteStore(CacheStore):
+    """Persistent tier in a single SQLite file, evicting least recently used rows by size."""
+
+    def __init__(self, path: str, max_bytes: int, recount_every: int = 1000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.recount_every = recount_every
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_expires ON results (expires_at)")
+        # Running total of stored bytes, so a put doesn't sum the whole table. Other processes
+        # sharing the file change it too, so it is recounted every ``recount_every`` puts
+        self._bytes = self._count()
+        self._puts = 0
+
+    def _count(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, expires_at, size FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._bytes -= row[2]
+                return None
+            self._db.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def put(self, key: str, value: bytes, ttl_s: float) -> None:
+        now = time.time()
+        with self._lock:
+            replaced = self._db.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now + ttl_s, now),
+            )
+            self._bytes += len(value) - (replaced[0] if replaced is not None else 0)
+            self._puts += 1
+            if self._puts % self.recount_every == 0:
+                self._bytes = self._count()
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        # Both reads walk an index and stop early; nothing here scans the whole table
+        expired = self._db.execute("DELETE FROM results WHERE expires_at <= ? RETURNING size", (now,)).fetchall()
+        self._bytes -= sum(size for size, in expired)
+        if self._bytes <= self.max_bytes:
+            return
+        excess = self._bytes - self.max_bytes
+        freed = 0
+        doomed = []
+        for key, size in self._db.execute("SELECT key, size FROM results ORDER BY accessed_at"):
+            doomed.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._db.executemany("DELETE FROM results WHERE key = ?", doomed)
+        self._bytes -= freed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {"path": self.path, "entries": entries, "bytes": size, "max_bytes": self.max_bytes}
+
+
+class ResultCache:
+    """Memory LRU in front of an optional persistent store.
+
+    Disk hits are promoted into memory. Persistent-store calls run in a
+    thread so a slow disk never stalls the event loop.
+    """
+
+    def __init__(self, memory: CacheStore, disk: Optional[CacheStore] = None, ttl_s: float = 86400.0):
+        self.memory = memory
+        self.disk = disk
+        self.ttl_s = ttl_s
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "bypassed": 0}
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = self.memory.get(key)
+        if raw is not None:
+            self.counters["memory_hits"] += 1
+            return json.loads(raw)
+        if self.disk is not None:
+            try:
+                raw = await asyncio.to_thread(self.disk.get, key)
+            except Exception as e:
+                # The cache is an optimization; a broken disk tier must not fail the task
+                print(f"Result cache read failed: {e}")
+            if raw is not None:
+                self.counters["disk_hits"] += 1
+                self.memory.put(key, raw, self.ttl_s)
+                return json.loads(raw)
+        self.counters["misses"] += 1
+        return None
+
+    async def put(self, key: str, value: Any) -> None:
+        raw = json.dumps(value).encode("utf-8")
+        self.memory.put(key, raw, self.ttl_s)
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.put, key, raw, self.ttl_s)
+            except Exception as e:
+                print(f"Result cache write failed: {e}")
+        self.counters["stores"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "memory": self.memory.stats(),
+            "disk": self.disk.stats() if self.disk is not None else None,
+        }
+
+
+_cache: Optional[ResultCache] = None
+
+
+def _cache_requests() -> List[Tuple[Dict[str, Any], float]]:
+    if _cache is None:
+        return []
+    return [({"cache": "result", "outcome": name}, value) for name, value in _cache.counters.items()]
+
+
+Collected("a2a_cache_requests_total", "Result cache lookups and stores by outcome", _cache_requests, kind="counter")
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Process-wide result cache, or ``None`` when RESULT_CACHE=0."""
+    global _cache
+    if os.getenv("RESULT_CACHE", "1") == "0":
+        return None
+    if _cache is None:
+        path = os.getenv("RESULT_CACHE_PATH", ".cache/results.sqlite3")
+        _cache = ResultCache(
+            MemoryStore(int(os.getenv("RESULT_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))),
+            SQLiteStore(path, int(os.getenv("RESULT_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))) if path else None,
+            ttl_s=float(os.getenv("RESULT_CACHE_TTL_S", "86400")),
+        )
+    return _cache
+
+
+def cache_mode(metadata: Dict[str, Any]) -> Optional[str]:
+    mode = metadata.get("cache")
+    if mode is False:
+        return CACHE_BYPASS
+    return mode if mode in (CACHE_BYPASS, CACHE_REFRESH) else None
+
+
+async def cached_result(key: str, mode: Optional[str] = None) -> Optional[Any]:
+    cache = get_result_cache()
+    if cache is None or mode == CACHE_REFRESH:
+        return None
+    if mode == CACHE_BYPASS:
+        cache.counters["bypassed"] += 1
+        return None
+    return await cache.get(key)
+
+
+async def store_result(key: str, value: Any, mode: Optional[str] = None) -> None:
+    cache = get_result_cache()
+    if cache is not None and mode != CACHE_BYPASS:
+        await cache.put(key, value)
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from services.common.metrics import Collected, Counter
+from services.common.sse import BUS
+from services.common.tasks import TaskResult
+
+COALESCED = Counter("a2a_coalesced_requests_total", "Requests by whether they started work or joined an identical in-flight one")
+
+# Every single-flight group in this process, for /stats/coalescing and the gauges
+FLIGHT_GROUPS: Dict[str, "SingleFlight"] = {}
+
+
+class Flight:
+    """One shared execution and the tasks waiting on it."""
+
+    def __init__(self, key: str, flight_id: str):
+        self.key = key
+        self.id = flight_id
+        self.task_ids: List[str] = []
+        # Everything the execution published, replayed to tasks that join late
+        self.events: List[Dict[str, Any]] = []
+        self.runner: Optional[asyncio.Task] = None
+
+    def fan_out(self, event: Dict[str, Any]) -> None:
+        self.events.append(event)
+        for task_id in self.task_ids:
+            BUS.publish(task_id, {**event, "task_id": task_id})
+
+
+class SingleFlight:
+    """Runs identical concurrent requests once and shares the result.
+
+    The first request for a key starts the work under a flight id of its own;
+    requests with the same key that arrive while it runs attach to it. Every
+    attached task keeps its own task_id: the execution's events are replayed
+    and then re-published to each of them, and each gets the shared
+    TaskResult (or error). The work is canceled only when every attached
+    task has been canceled.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[str, Flight] = {}
+        self.counters = {"leaders": 0, "followers": 0}
+        FLIGHT_GROUPS[name] = self
+
+    async def run(self, key: str, task_id: str, work: Callable[[str], Awaitable[TaskResult]]) -> TaskResult:
+        """Run ``work(flight_id)`` for ``key``, or join the run already in flight."""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = Flight(key, f"{self.name}-flight-{uuid.uuid4()}")
+            BUS.forward(flight.id, flight.fan_out)
+            flight.runner = asyncio.get_running_loop().create_task(self._fly(flight, work))
+            self.counters["leaders"] += 1
+            COALESCED.inc(agent=self.name, role="leader")
+        else:
+            for event in flight.events:
+                BUS.publish(task_id, {**event, "task_id": task_id})
+            self.counters["followers"] += 1
+            COALESCED.inc(agent=self.name, role="follower")
+        flight.task_ids.append(task_id)
+        assert flight.runner is not None
+        try:
+            # Shielded: one caller being canceled must not cancel the others' work
+            return await asyncio.shield(flight.runner)
+        finally:
+            flight.task_ids.remove(task_id)
+            if not flight.task_ids and not flight.runner.done():
+                self._land(flight)
+                flight.runner.cancel()
+
+    async def _fly(self, flight: Flight, work: Callable[[str], Awaitable[TaskResult]]) -> TaskResult:
+        try:
+            return await work(flight.id)
+        finally:
+            self._land(flight)
+
+    def _land(self, flight: Flight) -> None:
+        # Later identical requests start fresh work (and usually hit the result cache)
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+        BUS.unforward(flight.id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "in_flight": len(self._flights),
+            "waiting": sum(len(f.task_ids) for f in self._flights.values()),
+        }
+
+
+def coalescing_enabled(agent: str) -> bool:
+    return (os.getenv(f"{agent.upper()}_COALESCE") or os.getenv("COALESCE", "1")) != "0"
+
+
+async def single_flight(
+    group: SingleFlight, key: str, task_id: str, work: Callable[[str], Awaitable[TaskResult]], enabled: bool = True
+) -> TaskResult:
+    """``group.run`` when coalescing is on for this agent and request, else ``work(task_id)``."""
+    if not enabled or not coalescing_enabled(group.name):
+        return await work(task_id)
+    return await group.run(key, task_id, work)
+
+
+def _flight_samples() -> List[Tuple[Dict[str, Any], float]]:
+    samples = []
+    for group in FLIGHT_GROUPS.values():
+        stats = group.stats()
+        samples.append(({"agent": group.name, "kind": "executions"}, stats["in_flight"]))
+        samples.append(({"agent": group.name, "kind": "tasks"}, stats["waiting"]))
+    return samples
+
+
+Collected("a2a_coalesce_in_flight", "Shared executions in flight and the tasks attached to them", _flight_samples)
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Type, Union
+
+from fastapi.responses import JSONResponse
+
+try:  # orjson is optional; it is several times faster than the stdlib encoder
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+def _dumps_ascii(value: Any) -> bytes:
+    # Escapes lone surrogates (which IncrementalJSONParser keeps, like json.loads) instead of failing
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=True).encode("utf-8")
+
+
+if orjson is not None:
+    from fastapi.responses import ORJSONResponse
+
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(value: Any) -> bytes:
+        """Compact UTF-8 JSON."""
+        try:
+            return orjson.dumps(value, option=_OPTIONS)
+        except TypeError:
+            # orjson rejects strings that aren't valid UTF-8, e.g. an unpaired surrogate
+            return _dumps_ascii(value)
+
+    def loads(raw: Union[bytes, str]) -> Any:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # Also rejects escaped lone surrogates, which the stdlib reads back
+            return json.loads(raw)
+
+    class _ORJSONResponse(ORJSONResponse):
+        def render(self, content: Any) -> bytes:
+            return dumps(content)
+
+    # For FastAPI(default_response_class=...): every JSON endpoint encodes with orjson
+    JSON_RESPONSE: Type[JSONResponse] = _ORJSONResponse
+else:
+
+    def dumps(value: Any) -> bytes:
+        """Compact UTF-8 JSON."""
+        try:
+            return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        except UnicodeEncodeError:
+            return _dumps_ascii(value)
+
+    def loads(raw: Union[bytes, str]) -> Any:
+        return json.loads(raw)
+
+    JSON_RESPONSE = JSONResponse
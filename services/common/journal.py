@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter
+
+from services.common.backend import SQLiteWriter
+from services.common.encoding import dumps, loads
+from services.common.schemas import Message
+from services.common.taskstore import STORES
+
+# Pruning runs on writes, at most this often
+PRUNE_INTERVAL_S = 60.0
+
+# Journal entries that may still finish
+OPEN_STATES = {"queued", "working"}
+
+
+class WorkflowJournal:
+    """Durable record of every pipeline stage, keyed by ``context_id``.
+
+    Agents write one row per (context, agent): the latest task they ran for
+    that pipeline, when it was submitted and again when it finished, with its
+    final reply and artifacts. A client that retries a pipeline (the
+    orchestrator's ``resume_pipeline``, or the web UI after a reload) reads the
+    journal and reuses completed stages instead of re-running their LLM calls,
+    and follows stages that are still running instead of submitting them again.
+
+    A completed stage is never overwritten by a different task that did not
+    complete, so a speculative or retried submission can't lose a result.
+
+    ``record`` only queues the upsert for a ``SQLiteWriter`` thread, which
+    applies writes in order; ``stages`` waits for queued writes first, so
+    it runs off the event loop (FastAPI runs the sync journal route in its
+    threadpool).
+    """
+
+    def __init__(self, path: str, ttl_s: float = 7 * 86400.0):
+        self.path = path or ":memory:"
+        self.ttl_s = ttl_s
+        directory = os.path.dirname(path) if path else ""
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10.0)
+        if path:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS stages (
+                context_id TEXT NOT NULL, agent TEXT NOT NULL, task_id TEXT NOT NULL, state TEXT NOT NULL,
+                message TEXT, artifacts TEXT, metadata TEXT, input TEXT, updated_at REAL NOT NULL,
+                PRIMARY KEY (context_id, agent)
+            );
+            CREATE INDEX IF NOT EXISTS stages_updated ON stages (updated_at);
+            """
+        )
+        self._last_prune = time.time()
+        self.writes = 0
+        if path:
+            writer_db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10.0)
+            self._writer = SQLiteWriter(writer_db, "workflow-journal-writer")
+        else:
+            # An in-memory database exists only on this connection, so the writer shares it
+            self._writer = SQLiteWriter(self._db, "workflow-journal-writer", self._lock)
+
+    def record(
+        self,
+        context_id: str,
+        agent: str,
+        task_id: str,
+        state: str,
+        message: Optional[Message] = None,
+        artifacts: Optional[List[Dict[str, Any]]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        input: Optional[str] = None,
+    ) -> None:
+        now = time.time()
+        row = (
+            context_id,
+            agent,
+            task_id,
+            state,
+            # The full content, not just a reference: the journal outlives the artifact store
+            dumps(message.model_dump(mode="json")).decode("utf-8") if message is not None else None,
+            dumps(artifacts).decode("utf-8") if artifacts is not None else None,
+            dumps(metadata).decode("utf-8") if metadata is not None else None,
+            input,
+            now,
+        )
+
+        def write(db: sqlite3.Connection) -> None:
+            db.execute(
+                "INSERT INTO stages (context_id, agent, task_id, state, message, artifacts, metadata, input, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (context_id, agent) DO UPDATE SET"
+                " task_id = excluded.task_id, state = excluded.state, message = excluded.message,"
+                " artifacts = excluded.artifacts, metadata = excluded.metadata,"
+                " input = COALESCE(excluded.input, stages.input), updated_at = excluded.updated_at"
+                " WHERE stages.state != 'completed' OR stages.task_id = excluded.task_id"
+                " OR excluded.state = 'completed'",
+                row,
+            )
+            self.writes += 1
+            self._maybe_prune(db, now)
+
+        self._writer.submit(write)
+
+    def flush(self, timeout: Optional[float] = 10.0) -> bool:
+        """Wait until every ``record`` so far is written."""
+        return self._writer.flush(timeout)
+
+    def stages(self, context_id: str) -> Dict[str, Dict[str, Any]]:
+        """The latest entry per agent for ``context_id``; blocks until queued records are written."""
+        self.flush()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT agent, task_id, state, message, artifacts, metadata, input, updated_at"
+                " FROM stages WHERE context_id = ?",
+                (context_id,),
+            ).fetchall()
+        return {
+            agent: {
+                "agent": agent,
+                "task_id": task_id,
+                "state": state,
+                "message": loads(message) if message else None,
+                "artifacts": loads(artifacts) if artifacts else [],
+                "metadata": loads(metadata) if metadata else {},
+                "input": input,
+                "updated_at": updated_at,
+            }
+            for agent, task_id, state, message, artifacts, metadata, input, updated_at in rows
+        }
+
+    def _maybe_prune(self, db: sqlite3.Connection, now: float) -> None:
+        # Runs on the writer thread
+        if now - self._last_prune < PRUNE_INTERVAL_S:
+            return
+        self._last_prune = now
+        db.execute("DELETE FROM stages WHERE updated_at < ?", (now - self.ttl_s,))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            contexts, stages = self._db.execute("SELECT COUNT(DISTINCT context_id), COUNT(*) FROM stages").fetchone()
+        return {
+            "path": self.path,
+            "contexts": contexts,
+            "stages": stages,
+            "writes": self.writes,
+            "write_batches": self._writer.batches,
+        }
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+JOURNAL = WorkflowJournal(
+    os.getenv("WORKFLOW_JOURNAL_PATH", ".cache/workflows.sqlite3"),
+    ttl_s=float(os.getenv("WORKFLOW_JOURNAL_TTL_S", str(7 * 86400))),
+)
+
+
+async def journal_view(context_id: str) -> Dict[str, Any]:
+    """The journal for ``context_id``, with open stages checked against this process's task stores.
+
+    A stage journaled as queued or working whose task its agent no longer
+    knows (the process restarted) is reported as ``lost``, so clients run it
+    again rather than wait on it. The journal is read off the loop; the task
+    stores are only touched on it.
+    """
+    stages = await asyncio.to_thread(JOURNAL.stages, context_id)
+    for agent, entry in stages.items():
+        store = STORES.get(agent)
+        if entry["state"] not in OPEN_STATES or store is None:
+            continue
+        current = store.get(entry["task_id"])
+        if current is None:
+            entry["state"] = "lost"
+        elif current.state.value in OPEN_STATES:
+            # queued -> working isn't journaled
+            entry["state"] = current.state.value
+    return {"context_id": context_id, "stages": stages}
+
+
+router = APIRouter()
+
+
+@router.get("/contexts/{context_id}/journal")
+async def context_journal(context_id: str):
+    return await journal_view(context_id)
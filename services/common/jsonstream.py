@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import json
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from services.common.sse import publish_artifact
+
+# (kind, key, payload): kind is "delta" for a piece of a string value still
+# being generated, or "value" once a top-level value is complete.
+FieldEvent = Tuple[str, str, Any]
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class IncrementalJSONParser:
+    """Parses a streamed top-level JSON object field by field.
+
+    String values are surfaced as decoded deltas while they are generated;
+    every value (strings included) is surfaced once more when complete.
+    Nested values are buffered and decoded with ``json.loads`` when closed.
+    """
+
+    def __init__(self) -> None:
+        self._state = "start"
+        self._key = ""
+        self._raw: List[str] = []
+        self._text: List[str] = []
+        self._escape: Optional[str] = None
+        # A \uD800-\uDBFF escape, held until we see whether its low half follows
+        self._high: Optional[str] = None
+        self._depth = 0
+        self._in_string = False
+        self._string_escape = False
+
+    def feed(self, chunk: str) -> List[FieldEvent]:
+        events: List[FieldEvent] = []
+        delta: List[str] = []
+        for char in chunk:
+            state = self._state
+            if state == "start":
+                if char == "{":
+                    self._state = "key_or_end"
+            elif state == "key_or_end":
+                if char == '"':
+                    self._state = "key"
+                    self._raw = []
+                elif char == "}":
+                    self._state = "done"
+            elif state == "key":
+                if self._string_escape:
+                    self._raw.append(char)
+                    self._string_escape = False
+                elif char == "\\":
+                    self._raw.append(char)
+                    self._string_escape = True
+                elif char == '"':
+                    self._key = json.loads('"' + "".join(self._raw) + '"')
+                    self._state = "colon"
+                else:
+                    self._raw.append(char)
+            elif state == "colon":
+                if char == ":":
+                    self._state = "value_start"
+            elif state == "value_start":
+                if char.isspace():
+                    continue
+                if char == '"':
+                    self._state = "string"
+                    self._text = []
+                else:
+                    self._state = "raw"
+                    self._raw = [char]
+                    self._depth = 1 if char in "[{" else 0
+                    self._in_string = False
+                    self._string_escape = False
+            elif state == "string":
+                if self._escape is not None:
+                    self._escape += char
+                    decoded = self._decode_escape()
+                    if decoded:
+                        delta.append(decoded)
+                        self._text.append(decoded)
+                elif char == "\\":
+                    self._escape = ""
+                else:
+                    if self._high is not None:
+                        # Unpaired; kept as a lone surrogate, as json.loads does
+                        delta.append(self._high)
+                        self._text.append(self._high)
+                        self._high = None
+                    if char == '"':
+                        if delta:
+                            events.append(("delta", self._key, "".join(delta)))
+                            delta = []
+                        events.append(("value", self._key, "".join(self._text)))
+                        self._state = "after_value"
+                    else:
+                        delta.append(char)
+                        self._text.append(char)
+            elif state == "raw":
+                ended = self._consume_raw(char)
+                if ended is not None:
+                    events.append(("value", self._key, json.loads("".join(self._raw))))
+                    self._state = ended
+            elif state == "after_value":
+                if char == ",":
+                    self._state = "key_or_end"
+                elif char == "}":
+                    self._state = "done"
+
+        if delta and self._state == "string":
+            events.append(("delta", self._key, "".join(delta)))
+        return events
+
+    def _decode_escape(self) -> Optional[str]:
+        """The text of a finished escape (``""`` while a surrogate waits for its pair), or ``None`` mid-escape."""
+        escape = self._escape or ""
+        if escape[0] == "u" and len(escape) < 5:
+            return None
+        self._escape = None
+        high, self._high = self._high, None
+        if escape[0] != "u":
+            return (high or "") + _ESCAPES.get(escape[0], escape[0])
+        code = int(escape[1:5], 16)
+        if high is not None and 0xDC00 <= code <= 0xDFFF:
+            return chr(0x10000 + ((ord(high) - 0xD800) << 10) + (code - 0xDC00))
+        if 0xD800 <= code <= 0xDBFF:
+            self._high = chr(code)
+            return high or ""
+        return (high or "") + chr(code)
+
+    def _consume_raw(self, char: str) -> Optional[str]:
+        """Buffer ``char`` of a non-string value; returns the next state once it ends."""
+        if self._in_string:
+            if self._string_escape:
+                self._string_escape = False
+            elif char == "\\":
+                self._string_escape = True
+            elif char == '"':
+                self._in_string = False
+        elif char == '"':
+            self._in_string = True
+        elif char in "[{":
+            self._depth += 1
+        elif char in "]}":
+            if self._depth == 0:
+                # A scalar closed by the end of the enclosing object
+                return "done"
+            self._depth -= 1
+            if self._depth == 0:
+                self._raw.append(char)
+                return "after_value"
+        elif char == "," and self._depth == 0:
+            return "key_or_end"
+        self._raw.append(char)
+        return None
+
+    @property
+    def done(self) -> bool:
+        return self._state == "done"
+
+
+async def stream_json_artifacts(task_id: str, deltas: AsyncIterator[str], fields: Iterable[str]) -> str:
+    """Relay ``fields`` of a streamed JSON completion as artifact events.
+
+    String fields are published as appended deltas while generated; every
+    field gets a final ``last_chunk`` event carrying its complete value.
+    Returns the full completion text.
+    """
+    wanted = set(fields)
+    parser = IncrementalJSONParser()
+    parts: List[str] = []
+    async for delta in deltas:
+        parts.append(delta)
+        for kind, key, payload in parser.feed(delta):
+            if key not in wanted:
+                continue
+            if kind == "delta":
+                publish_artifact(task_id, {"name": key, "delta": payload}, append=True, last_chunk=False)
+            else:
+                publish_artifact(task_id, {"name": key, "value": payload}, append=True, last_chunk=True)
+    return "".join(parts)
+
+
+def publish_json_fields(task_id: str, data: Dict[str, Any], fields: Iterable[str]) -> None:
+    """Publish complete ``fields`` of an already-known result, e.g. a cache hit."""
+    for key in fields:
+        if key in data:
+            publish_artifact(task_id, {"name": key, "value": data[key]}, append=True, last_chunk=True)
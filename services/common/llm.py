@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+import openai
+
+from services.common.breaker import CircuitOpenError, get_breaker
+from services.common.metrics import Counter, observe_stage, record_usage
+from services.common.providers import (
+    Route,
+    close_providers,
+    hedge_delay_s,
+    hedging_enabled,
+    routes_for,
+    select_routes,
+)
+from services.common.ratelimit import backoff_s, estimate_tokens, get_governor, retry_after_s
+
+# Providers and their pooled clients live in services/common/providers.py and
+# are shared by every agent mounted in services/main.py. Each agent picks its
+# routes (provider:model) from <AGENT>_LLM; calls go to the fastest available
+# route, fail over when a circuit is open, and can be hedged.
+
+HEDGES = Counter("a2a_llm_hedges_total", "Hedged LLM calls by which request answered first")
+
+T = TypeVar("T")
+
+
+def default_model(agent: Optional[str] = None) -> str:
+    """Model of the agent's first configured route."""
+    return routes_for(agent)[0].model
+
+
+def model_label(agent: Optional[str] = None) -> str:
+    """Every route the agent may use, e.g. for cache keys and status messages."""
+    return ",".join(route.label for route in routes_for(agent))
+
+
+def check_llm_circuit(agent: Optional[str] = None) -> None:
+    """Raise CircuitOpenError now if every provider the agent could use is down."""
+    select_routes(agent)
+
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+async def _governed(route: Route, kwargs: Dict[str, Any], stream: bool = False) -> Any:
+    """Create a completion on ``route`` within its rate budget, retrying throttled calls.
+
+    Each attempt first checks the provider's circuit breaker, so during an
+    outage calls (and pending retries) fail with CircuitOpenError at once.
+    """
+    kwargs = dict(kwargs, model=route.model)
+    provider = route.provider
+    governor = get_governor(provider.name, route.model)
+    breaker = get_breaker(provider.name)
+    max_retries = int(os.getenv("LLM_MAX_RETRIES", "5"))
+    estimated = estimate_tokens(kwargs.get("messages"), kwargs.get("max_tokens"))
+    attempt = 0
+    while True:
+        breaker.before_call()
+        reservation = await governor.acquire(estimated)
+        started = time.perf_counter()
+        try:
+            if stream:
+                response = await provider.client.chat.completions.create(stream=True, **kwargs)
+                # Headers arrive with the first token; failures mid-stream are recorded by the reader
+                breaker.record_success(time.perf_counter() - started)
+                return reservation, response
+            completion = await provider.client.chat.completions.create(**kwargs)
+            breaker.record_success(time.perf_counter() - started)
+            observe_stage("llm_total", time.perf_counter() - started, model=route.model, provider=provider.name)
+            usage = getattr(completion, "usage", None)
+            governor.settle(reservation, usage.total_tokens if usage is not None else None)
+            if usage is not None:
+                record_usage(route.model, usage.prompt_tokens, usage.completion_tokens)
+            return reservation, completion
+        except RETRYABLE_ERRORS as e:
+            # Nothing was generated, so the reserved tokens go back
+            governor.settle(reservation, 0)
+            if isinstance(e, openai.RateLimitError) and getattr(e, "code", None) != "insufficient_quota":
+                # Throttling is the governor's business; the provider itself answered
+                breaker.record_success(time.perf_counter() - started)
+            else:
+                breaker.record_failure(e)
+            if attempt >= max_retries or getattr(e, "code", None) == "insufficient_quota":
+                governor.counters["failures"] += 1
+                raise
+            response = getattr(e, "response", None)
+            wait = retry_after_s(response.headers if response is not None else None)
+            if isinstance(e, openai.RateLimitError):
+                governor.rate_limited(wait if wait is not None else backoff_s(attempt, 1.0, 30.0))
+            else:
+                await asyncio.sleep(wait if wait is not None else backoff_s(attempt, 0.5, 20.0))
+            governor.counters["retries"] += 1
+            attempt += 1
+        except openai.APIStatusError:
+            # A 4xx about the request itself says nothing about provider health
+            governor.settle(reservation, 0)
+            breaker.record_success(time.perf_counter() - started)
+            raise
+        except asyncio.CancelledError:
+            # e.g. the losing side of a hedged call
+            governor.settle(reservation, 0)
+            raise
+
+
+async def _nothing(_: Any) -> None:
+    return None
+
+
+async def _routed(
+    agent: Optional[str],
+    call: Callable[[Route], Awaitable[T]],
+    discard: Callable[[T], Awaitable[None]] = _nothing,
+) -> T:
+    """Run ``call`` on the agent's best route, hedging or failing over as configured."""
+    routes = select_routes(agent)
+    if hedging_enabled(agent) and len(routes) > 1:
+        return await _hedged(agent, routes[0], routes[1:], call, discard)
+    error: Optional[BaseException] = None
+    for route in routes:
+        try:
+            return await call(route)
+        except (CircuitOpenError, *RETRYABLE_ERRORS) as e:
+            # This provider is down or exhausted its retries; try the next one
+            error = e
+    assert error is not None
+    raise error
+
+
+async def _hedged(
+    agent: Optional[str],
+    primary: Route,
+    backups: List[Route],
+    call: Callable[[Route], Awaitable[T]],
+    discard: Callable[[T], Awaitable[None]],
+) -> T:
+    """Start ``primary``; if it hasn't answered by its p95, race a backup against it.
+
+    The first successful answer wins and the other request is cancelled (or,
+    if it also finished, discarded). A failure on one side leaves the other
+    running; only when every started request failed is the last error raised.
+    """
+    tasks = {asyncio.ensure_future(call(primary)): primary}
+    queue = list(backups)
+    error: Optional[BaseException] = None
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_delay_s(agent, primary))
+        while True:
+            for task in done:
+                route = tasks.pop(task)
+                if task.exception() is None:
+                    if len(tasks) or route is not primary:
+                        route.wins += 1
+                        HEDGES.inc(agent=agent or "default", answered="primary" if route is primary else "hedge")
+                    # Anything else still in ``tasks`` is cancelled or discarded below
+                    return task.result()
+                error = task.exception()
+            if queue and (not tasks or not done):
+                # Primary is slow (timeout) or failed: fire the next route
+                backup = queue.pop(0)
+                tasks[asyncio.ensure_future(call(backup))] = backup
+            if not tasks:
+                assert error is not None
+                raise error
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                result = await task
+            except BaseException:
+                continue
+            await discard(result)
+
+
+async def chat_completion(agent: Optional[str] = None, **kwargs: Any) -> Any:
+    async def call(route: Route) -> Any:
+        started = time.perf_counter()
+        _, completion = await _governed(route, kwargs)
+        route.observe(time.perf_counter() - started)
+        return completion
+
+    return await _routed(agent, call)
+
+
+@dataclass
+class _OpenStream:
+    route: Route
+    reservation: Any
+    stream: Any
+    chunks: AsyncIterator[Any]
+    first: Optional[Any]
+    started: float
+
+
+async def _open_stream(route: Route, kwargs: Dict[str, Any]) -> _OpenStream:
+    """Start a streamed completion and wait for its first chunk."""
+    started = time.perf_counter()
+    reservation, stream = await _governed(route, kwargs, stream=True)
+    chunks = stream.__aiter__()
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except BaseException as e:
+        if isinstance(e, RETRYABLE_ERRORS):
+            get_breaker(route.provider.name).record_failure(e)
+        get_governor(route.provider.name, route.model).settle(reservation, 0)
+        await stream.close()
+        raise
+    route.observe(time.perf_counter() - started)
+    return _OpenStream(route, reservation, stream, chunks, first, started)
+
+
+async def _close_stream(opened: _OpenStream) -> None:
+    get_governor(opened.route.provider.name, opened.route.model).settle(opened.reservation, 0)
+    await opened.stream.close()
+
+
+async def stream_chat_completion(agent: Optional[str] = None, **kwargs: Any) -> AsyncIterator[str]:
+    """Yield content deltas of a streamed chat completion as they arrive."""
+    if os.getenv("LLM_STREAM_USAGE", "1") != "0":
+        # Ask for a final usage chunk so token metrics and budgets use real counts
+        kwargs.setdefault("stream_options", {"include_usage": True})
+    started = time.perf_counter()
+    opened = await _routed(agent, lambda route: _open_stream(route, kwargs), _close_stream)
+    route = opened.route
+    governor = get_governor(route.provider.name, route.model)
+    chars = sum(len(str(m.get("content", ""))) for m in kwargs.get("messages") or [])
+    first_token = None
+    usage = None
+
+    async def chunks() -> AsyncIterator[Any]:
+        if opened.first is not None:
+            yield opened.first
+            async for chunk in opened.chunks:
+                yield chunk
+
+    try:
+        try:
+            async for chunk in chunks():
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if first_token is None:
+                        first_token = time.perf_counter()
+                        observe_stage("llm_ttft", first_token - started, model=route.model, provider=route.provider.name)
+                    chars += len(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+        except RETRYABLE_ERRORS as e:
+            get_breaker(route.provider.name).record_failure(e)
+            raise
+    finally:
+        observe_stage("llm_total", time.perf_counter() - started, model=route.model, provider=route.provider.name)
+        if usage is not None:
+            record_usage(route.model, usage.prompt_tokens, usage.completion_tokens)
+            governor.settle(opened.reservation, usage.total_tokens)
+        else:
+            # ~4 characters per token, matching the reservation estimate
+            governor.settle(opened.reservation, chars / 4)
+        # A consumer that stops early (cancelled task, client gone) must not leave the response open
+        await opened.stream.close()
+
+
+async def close_llm_client() -> None:
+    await close_providers()
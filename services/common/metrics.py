@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Prometheus text exposition without a client library dependency. Metrics
+# are process-local; with several workers each one serves its own /metrics.
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        REGISTRY.append(self)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        super().__init__(name, help)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(k)} {v}" for k, v in self._values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        self._values[_key(labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = buckets
+        # label key -> (per-bucket counts, sum, count)
+        self._values: Dict[LabelKey, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _key(labels)
+        counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        self._values[key] = (counts, total + value, count + 1)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', repr(bound)))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class Collected(Metric):
+    """A gauge whose samples are read from existing state at scrape time."""
+
+    def __init__(self, name: str, help: str, collect: Callable[[], List[Tuple[Dict[str, Any], float]]], kind: str = "gauge"):
+        super().__init__(name, help)
+        self.collect = collect
+        self.kind = kind
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(_key(labels))} {value}" for labels, value in self.collect()]
+
+
+REGISTRY: List[Metric] = []
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        try:
+            samples = metric.samples()
+        except Exception as e:
+            print(f"Metric {metric.name} failed to collect: {e}")
+            continue
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = Histogram("a2a_stage_seconds", "Time spent per agent stage")
+TASKS_FINISHED = Counter("a2a_tasks_finished_total", "Tasks reaching a terminal state")
+LLM_TOKENS = Counter("a2a_llm_tokens_total", "LLM tokens from completion usage")
+LLM_COST = Counter("a2a_llm_cost_usd_total", "Estimated LLM spend from completion usage")
+FALLBACKS = Counter("a2a_fallbacks_total", "Tasks answered with placeholder content after an error")
+
+
+# Trace context: set for the duration of a task so nested calls (LLM, Gamma)
+# are attributed to the agent, task and pipeline (context_id) they serve.
+@dataclass
+class Trace:
+    context_id: str
+    task_id: str
+    agent: str
+
+
+CURRENT_TRACE: ContextVar[Optional[Trace]] = ContextVar("a2a_trace", default=None)
+
+TRACE_MAX_CONTEXTS = int(os.getenv("TRACE_MAX_CONTEXTS", "1000"))
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "256"))
+_spans: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+
+
+def record_span(trace: Trace, stage: str, started: float, seconds: float, **attrs: Any) -> None:
+    spans = _spans.get(trace.context_id)
+    if spans is None:
+        spans = _spans[trace.context_id] = []
+        while len(_spans) > TRACE_MAX_CONTEXTS:
+            _spans.popitem(last=False)
+    if len(spans) < TRACE_MAX_SPANS:
+        spans.append({
+            "agent": trace.agent,
+            "task_id": trace.task_id,
+            "stage": stage,
+            "start": round(started, 6),
+            "seconds": round(seconds, 6),
+            **attrs,
+        })
+
+
+def spans_for(context_id: str) -> List[Dict[str, Any]]:
+    return sorted(_spans.get(context_id, []), key=lambda span: span["start"])
+
+
+def observe_stage(stage: str, seconds: float, started: Optional[float] = None, agent: Optional[str] = None, **attrs: Any) -> None:
+    """Record a stage duration against the current trace (if any)."""
+    trace = CURRENT_TRACE.get()
+    STAGE_SECONDS.observe(seconds, agent=agent or (trace.agent if trace else "unknown"), stage=stage)
+    if trace is not None:
+        record_span(trace, stage, started if started is not None else time.time() - seconds, seconds, **attrs)
+
+
+@contextmanager
+def stage_timer(stage: str, **attrs: Any) -> Iterator[None]:
+    wall = time.time()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started, wall, **attrs)
+
+
+# USD per 1M (prompt, completion) tokens; override with LLM_PRICE_<MODEL>="in,out"
+DEFAULT_PRICES = {
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+}
+
+
+def _price(model: str) -> Optional[Tuple[float, float]]:
+    override = os.getenv("LLM_PRICE_" + "".join(c if c.isalnum() else "_" for c in model.upper()))
+    if override:
+        prompt, _, completion = override.partition(",")
+        return float(prompt), float(completion or prompt)
+    return DEFAULT_PRICES.get(model)
+
+
+def record_usage(model: str, prompt_tokens: int, completion_tokens: int) -> None:
+    trace = CURRENT_TRACE.get()
+    agent = trace.agent if trace else "unknown"
+    LLM_TOKENS.inc(prompt_tokens, agent=agent, model=model, kind="prompt")
+    LLM_TOKENS.inc(completion_tokens, agent=agent, model=model, kind="completion")
+    price = _price(model)
+    if price is not None:
+        LLM_COST.inc((prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000, agent=agent, model=model)
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Any, Dict
+
+# "demo" keeps the presentation-friendly behaviour: pauses so the UI
+# animations have time to play, scripted status messages and [MOCK] content
+# when a provider fails. "latency" drops all of that: no sleeps, only status
+# events that reflect real progress, and provider errors fail the task.
+DEMO = "demo"
+LATENCY = "latency"
+
+
+@dataclass(frozen=True)
+class Profile:
+    name: str
+    pacing_s: float
+    scripted_events: bool
+    mock_fallbacks: bool
+
+    @property
+    def demo(self) -> bool:
+        return self.name == DEMO
+
+
+PROFILES = {
+    DEMO: Profile(DEMO, float(os.getenv("DEMO_PACING_S", "1")), scripted_events=True, mock_fallbacks=True),
+    LATENCY: Profile(LATENCY, 0.0, scripted_events=False, mock_fallbacks=False),
+}
+
+DEFAULT_PROFILE = os.getenv("AGENT_PROFILE", DEMO)
+
+
+def profile_for(metadata: Dict[str, Any]) -> Profile:
+    """The request's ``metadata.profile`` if it names one, else AGENT_PROFILE."""
+    return PROFILES.get(metadata.get("profile"), PROFILES.get(DEFAULT_PROFILE, PROFILES[DEMO]))
+
+
+async def pace(profile: Profile) -> None:
+    """Cosmetic pause between steps; a no-op outside demo mode."""
+    if profile.pacing_s > 0:
+        await asyncio.sleep(profile.pacing_s)
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import os
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI
+
+from services.common.breaker import CircuitOpenError, get_breaker
+from services.common.metrics import Collected
+
+# Every provider is reached through an OpenAI-compatible chat completions
+# endpoint, so one client type covers them all:
+#   openai   OPENAI_API_KEY, OPENAI_BASE_URL (optional), OPENAI_MODEL
+#   gemini   GEMINI_API_KEY, Google's OpenAI-compatible endpoint, GEMINI_MODEL
+#   <name>   <NAME>_BASE_URL and <NAME>_API_KEY, e.g. a local stub or vLLM
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+
+DEFAULT_MODELS = {"openai": "gpt-4o", "gemini": "gemini-2.0-flash"}
+
+
+def _env_prefix(name: str) -> str:
+    return re.sub(r"[^A-Z0-9]+", "_", name.upper()).strip("_")
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "1000")),
+        max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "200")),
+        keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30")),
+    )
+
+
+class Provider:
+    """One upstream endpoint with its own pooled client, created lazily."""
+
+    def __init__(self, name: str):
+        prefix = _env_prefix(name)
+        self.name = name
+        self.api_key = os.getenv(f"{prefix}_API_KEY") or ("stub" if name not in DEFAULT_MODELS else None)
+        self.base_url = os.getenv(f"{prefix}_BASE_URL") or (GEMINI_BASE_URL if name == "gemini" else None)
+        self.default_model = os.getenv(f"{prefix}_MODEL") or DEFAULT_MODELS.get(name, "gpt-4o")
+        if name not in DEFAULT_MODELS and not self.base_url:
+            raise ValueError(f"LLM provider {name!r} needs {prefix}_BASE_URL")
+        self._client: Optional[AsyncOpenAI] = None
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        if self._client is None:
+            timeout = float(os.getenv("LLM_TIMEOUT", "60"))
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=timeout,
+                # Retries happen in llm._governed so every 429 is seen by the rate governor
+                max_retries=0,
+                http_client=httpx.AsyncClient(limits=_pool_limits(), timeout=timeout),
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+PROVIDERS: Dict[str, Provider] = {}
+
+
+def get_provider(name: str) -> Provider:
+    provider = PROVIDERS.get(name)
+    if provider is None:
+        provider = PROVIDERS[name] = Provider(name)
+    return provider
+
+
+@dataclass
+class Route:
+    """A provider/model an agent may call, with that agent's observed latency."""
+
+    agent: str
+    provider: Provider
+    model: str
+    samples: Deque[float] = field(default_factory=lambda: deque(maxlen=int(os.getenv("LLM_LATENCY_WINDOW", "100"))))
+    ewma_s: Optional[float] = None
+    wins: int = 0
+
+    @property
+    def label(self) -> str:
+        return f"{self.provider.name}:{self.model}"
+
+    def observe(self, latency_s: float) -> None:
+        """Time to first token for streams, full response time otherwise."""
+        self.samples.append(latency_s)
+        self.ewma_s = latency_s if self.ewma_s is None else 0.8 * self.ewma_s + 0.2 * latency_s
+
+    def p95_s(self) -> Optional[float]:
+        if len(self.samples) < int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "10")):
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "route": self.label,
+            "calls": len(self.samples),
+            "ewma_ms": round(self.ewma_s * 1000, 1) if self.ewma_s is not None else None,
+            "p95_ms": round(self.p95_s() * 1000, 1) if self.p95_s() is not None else None,
+            "wins": self.wins,
+        }
+
+
+ROUTES: Dict[str, List[Route]] = {}
+
+Collected(
+    "a2a_llm_route_latency_seconds",
+    "Smoothed time to first response per agent route",
+    lambda: [
+        ({"agent": r.agent, "route": r.label}, r.ewma_s)
+        for routes in ROUTES.values() for r in routes if r.ewma_s is not None
+    ],
+)
+
+
+def parse_routes(spec: str) -> List[Tuple[str, Optional[str]]]:
+    """``"openai:gpt-4o, gemini"`` -> [("openai", "gpt-4o"), ("gemini", None)]."""
+    routes = []
+    for item in spec.split(","):
+        name, _, model = item.strip().partition(":")
+        if name:
+            routes.append((name, model or None))
+    return routes
+
+
+def routes_for(agent: Optional[str]) -> List[Route]:
+    """Candidate routes for ``agent`` from <AGENT>_LLM, else LLM_ROUTES, else OpenAI."""
+    key = agent or "default"
+    routes = ROUTES.get(key)
+    if routes is None:
+        spec = (agent and os.getenv(f"{_env_prefix(agent)}_LLM")) or os.getenv("LLM_ROUTES") or "openai"
+        routes = []
+        for name, model in parse_routes(spec):
+            provider = get_provider(name)
+            routes.append(Route(key, provider, model or provider.default_model))
+        ROUTES[key] = routes
+    return routes
+
+
+def _setting(agent: Optional[str], name: str, default: str) -> str:
+    return (agent and os.getenv(f"{_env_prefix(agent)}_{name}")) or os.getenv(name, default)
+
+
+def routing_policy(agent: Optional[str]) -> str:
+    """``ordered`` keeps the configured order; ``latency`` prefers the fastest route seen."""
+    return _setting(agent, "LLM_ROUTING", "latency")
+
+
+def hedging_enabled(agent: Optional[str]) -> bool:
+    return _setting(agent, "LLM_HEDGE", "0") == "1"
+
+
+def hedge_delay_s(agent: Optional[str], route: Route) -> float:
+    """Wait this long on the primary before firing a hedge: its p95, once known."""
+    p95 = route.p95_s()
+    return p95 if p95 is not None else float(_setting(agent, "LLM_HEDGE_DELAY_S", "2.0"))
+
+
+def select_routes(agent: Optional[str]) -> List[Route]:
+    """Routes to try in order, skipping providers whose circuit is open."""
+    routes = routes_for(agent)
+    if routing_policy(agent) == "latency" and len(routes) > 1:
+        # Routes with no samples yet sort first so each gets measured once
+        routes = sorted(routes, key=lambda r: r.ewma_s if r.ewma_s is not None else -1.0)
+    available = []
+    first_error: Optional[CircuitOpenError] = None
+    for route in routes:
+        try:
+            get_breaker(route.provider.name).raise_if_open()
+        except CircuitOpenError as e:
+            first_error = first_error or e
+            continue
+        available.append(route)
+    if not available and first_error is not None:
+        raise first_error
+    return available
+
+
+def route_stats() -> Dict[str, List[Dict[str, object]]]:
+    return {agent: [route.stats() for route in routes] for agent, routes in ROUTES.items()}
+
+
+async def close_providers() -> None:
+    for provider in PROVIDERS.values():
+        await provider.close()
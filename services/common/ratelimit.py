@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from services.common.metrics import Collected
+
+
+class TokenBucket:
+    """Per-minute budget that hands out reservations instead of refusing.
+
+    A reservation may drive the balance negative; the caller then waits for
+    the refill to cover it. Later callers see the deeper deficit and wait
+    longer, so queued calls are served in arrival order.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.balance = per_minute
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take ``amount`` and return how many seconds to wait before using it."""
+        self.balance = min(self.capacity, self.balance + (now - self.updated) * self.rate)
+        self.updated = now
+        self.balance -= min(amount, self.capacity)
+        return -self.balance / self.rate if self.balance < 0 else 0.0
+
+    def refund(self, amount: float) -> None:
+        self.balance = min(self.capacity, self.balance + amount)
+
+
+@dataclass
+class Reservation:
+    tokens: float
+    waited_s: float
+
+
+class RateGovernor:
+    """Requests- and tokens-per-minute budgets for one provider/model.
+
+    ``rpm``/``tpm`` of 0 mean unlimited. Calls queue until both budgets
+    cover them; a rate-limit response pauses every caller until the
+    provider's ``Retry-After`` has elapsed.
+    """
+
+    def __init__(self, name: str, rpm: float = 0, tpm: float = 0):
+        self.name = name
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.blocked_until = 0.0
+        self.waiting = 0
+        self.counters = {"calls": 0, "rate_limited": 0, "retries": 0, "failures": 0}
+        self.wait_total_s = 0.0
+        self.wait_max_s = 0.0
+
+    async def acquire(self, estimated_tokens: float) -> Reservation:
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            delay = max(0.0, self.blocked_until - started)
+            if self.requests is not None:
+                delay = max(delay, self.requests.reserve(1, started))
+            if self.tokens is not None:
+                delay = max(delay, self.tokens.reserve(estimated_tokens, started))
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # A 429 seen by someone else while we slept pushes us back too
+            while self.blocked_until > time.monotonic():
+                await asyncio.sleep(self.blocked_until - time.monotonic())
+        finally:
+            self.waiting -= 1
+        waited = time.monotonic() - started
+        self.counters["calls"] += 1
+        self.wait_total_s += waited
+        self.wait_max_s = max(self.wait_max_s, waited)
+        return Reservation(tokens=estimated_tokens, waited_s=waited)
+
+    def settle(self, reservation: Reservation, actual_tokens: Optional[float]) -> None:
+        """Correct the token budget once the real usage is known."""
+        if self.tokens is None or actual_tokens is None:
+            return
+        difference = reservation.tokens - actual_tokens
+        if difference > 0:
+            self.tokens.refund(difference)
+        else:
+            self.tokens.reserve(-difference, time.monotonic())
+
+    def rate_limited(self, retry_after_s: float) -> None:
+        self.counters["rate_limited"] += 1
+        self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after_s)
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.counters["calls"]
+        return {
+            **self.counters,
+            "queue_depth": self.waiting,
+            "wait_avg_s": round(self.wait_total_s / calls, 4) if calls else 0.0,
+            "wait_max_s": round(self.wait_max_s, 4),
+            "rpm": self.requests.capacity if self.requests is not None else None,
+            "tpm": self.tokens.capacity if self.tokens is not None else None,
+        }
+
+
+GOVERNORS: Dict[Tuple[str, str], RateGovernor] = {}
+
+Collected(
+    "a2a_ratelimit_queue_depth",
+    "Calls waiting for rate budget",
+    lambda: [({"governor": g.name}, g.waiting) for g in GOVERNORS.values()],
+)
+Collected(
+    "a2a_ratelimit_wait_seconds_total",
+    "Time calls spent waiting for rate budget",
+    lambda: [({"governor": g.name}, g.wait_total_s) for g in GOVERNORS.values()],
+    kind="counter",
+)
+Collected(
+    "a2a_ratelimit_events_total",
+    "Governed calls, 429s, retries and failures",
+    lambda: [({"governor": g.name, "event": k}, v) for g in GOVERNORS.values() for k, v in g.counters.items()],
+    kind="counter",
+)
+
+
+def _env_budget(kind: str, provider: str, model: str) -> float:
+    # Most specific first: OPENAI_GPT_4O_RPM, then OPENAI_RPM
+    model_key = re.sub(r"[^A-Z0-9]+", "_", model.upper()).strip("_")
+    for name in (f"{provider.upper()}_{model_key}_{kind}", f"{provider.upper()}_{kind}"):
+        value = os.getenv(name)
+        if value:
+            return float(value)
+    return 0.0
+
+
+def get_governor(provider: str, model: str) -> RateGovernor:
+    key = (provider, model)
+    governor = GOVERNORS.get(key)
+    if governor is None:
+        governor = GOVERNORS[key] = RateGovernor(
+            f"{provider}/{model}",
+            rpm=_env_budget("RPM", provider, model),
+            tpm=_env_budget("TPM", provider, model),
+        )
+    return governor
+
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def retry_after_s(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Seconds to wait according to ``Retry-After`` or OpenAI's rate-limit reset headers."""
+    if not headers:
+        return None
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    if headers.get("retry-after"):
+        try:
+            return float(headers["retry-after"])
+        except ValueError:
+            pass
+    resets = []
+    for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        value = headers.get(name)
+        if value:
+            # e.g. "1s", "6m0s", "120ms"
+            resets.append(sum(float(n) * _UNITS[unit] for n, unit in _DURATION.findall(value)))
+    return max(resets) if resets else None
+
+
+def backoff_s(attempt: int, base_s: float, cap_s: float) -> float:
+    # Full jitter so retries from many callers spread out
+    return random.uniform(0, min(cap_s, base_s * 2 ** attempt))
+
+
+def estimate_tokens(messages: Any, max_tokens: Optional[int] = None) -> float:
+    # ~4 characters per token is close enough for budgeting
+    prompt_chars = sum(len(str(m.get("content", ""))) for m in messages or [])
+    completion = max_tokens or int(os.getenv("LLM_EXPECTED_COMPLETION_TOKENS", "600"))
+    return prompt_chars / 4 + completion
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import time
 from enum import Enum
 from typing import Any, Dict, List, Literal, Optional
 
@@ -12,11 +13,23 @@ class TaskState(str, Enum):
     input_required = "input-required"
     completed = "completed"
     failed = "failed"
+    canceled = "canceled"
+
+
+class ArtifactRef(BaseModel):
+    """Pointer to content in the artifact store (services/common/artifacts.py)."""
+
+    hash: str
+    size: int
+    # Where to fetch it when the receiving agent doesn't hold it, e.g. <agent url>/artifacts/<hash>
+    url: Optional[str] = None
 
 
 class Message(BaseModel):
     role: str
-    content: str
+    # Empty when the content is passed by reference
+    content: str = ""
+    ref: Optional[ArtifactRef] = None
 
 
 class TaskStatusUpdateEvent(BaseModel):
@@ -24,12 +37,58 @@ class TaskStatusUpdateEvent(BaseModel):
     task_id: str
     state: TaskState
     detail: Optional[str] = None
+    # Publish time (epoch seconds) so clients can measure delivery lag
+    timestamp: float = Field(default_factory=time.time)
+    # Final artifacts, set on the terminal event so streams need no resubscribe
+    artifacts: Optional[List[Dict[str, Any]]] = None
+    # Final reply, also on the terminal event; large replies carry only their ref
+    message: Optional[Dict[str, Any]] = None
 
 
 class TaskArtifactUpdateEvent(BaseModel):
     event: Literal["task-artifact"] = "task-artifact"
     task_id: str
     artifact: Dict[str, Any]
+    append: bool = False
+    last_chunk: bool = True
+    timestamp: float = Field(default_factory=time.time)
+
+
+# The event bus publishes plain dicts shaped like the two models above, built
+# without validation because every status change and token delta goes
+# through here. Keep them in sync with the models.
+
+
+def status_event(
+    task_id: str,
+    state: TaskState,
+    detail: Optional[str] = None,
+    artifacts: Optional[List[Dict[str, Any]]] = None,
+    message: Optional[Message] = None,
+) -> Dict[str, Any]:
+    event = {"event": "task-status", "task_id": task_id, "state": state.value, "detail": detail, "timestamp": time.time()}
+    if artifacts is not None:
+        # Only final events carry artifacts; the rest keep their usual shape
+        event["artifacts"] = artifacts
+    if message is not None:
+        # A shared reply is already in the artifact store; every subscriber's history needn't hold it too
+        event["message"] = (
+            {"role": message.role, "content": "", "ref": message.ref.model_dump()}
+            if message.ref is not None
+            else {"role": message.role, "content": message.content, "ref": None}
+        )
+    return event
+
+
+def artifact_event(task_id: str, artifact: Dict[str, Any], append: bool = False, last_chunk: bool = True) -> Dict[str, Any]:
+    return {
+        "event": "task-artifact",
+        "task_id": task_id,
+        "artifact": artifact,
+        "append": append,
+        "last_chunk": last_chunk,
+        "timestamp": time.time(),
+    }
 
 
 class MessageRequest(BaseModel):
@@ -43,6 +102,7 @@ class MessageResponse(BaseModel):
     context_id: str
     task_id: str
     message: Message
+    state: TaskState = TaskState.completed
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
@@ -50,8 +110,13 @@ class ResubscribeRequest(BaseModel):
     task_id: str
 
 
+class CancelRequest(BaseModel):
+    task_id: str
+
+
 class ResubscribeResponse(BaseModel):
     task_id: str
     state: TaskState
     last_event: Optional[Dict[str, Any]] = None
     artifacts: List[Dict[str, Any]] = Field(default_factory=list)
+    message: Optional[Message] = None
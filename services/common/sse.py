@@ -1,15 +1,417 @@
 from __future__ import annotations
 
-import json
-import time
-from typing import Iterable, Iterator
+import asyncio
+import os
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Set, Tuple
 
+from sse_starlette.sse import EventSourceResponse
+from starlette.requests import Request
 
-def format_sse(data: dict) -> str:
-    return f"data: {json.dumps(data)}\n\n"
+from services.common.backend import SharedBackend, get_backend
+from services.common.metrics import Collected
+from services.common.encoding import dumps
+from services.common.schemas import Message, ResubscribeResponse, TaskState, artifact_event, status_event
 
+TERMINAL_STATES = {TaskState.completed.value, TaskState.failed.value, TaskState.canceled.value}
 
-def simple_event_stream(events: Iterable[dict], delay_s: float = 0.5) -> Iterator[str]:
-    for event in events:
-        time.sleep(delay_s)
-        yield format_sse(event)
+PING_INTERVAL_S = int(os.getenv("SSE_PING_S", "15"))
+# How often subscribers re-check a shared backend for events published by other workers
+POLL_INTERVAL_S = float(os.getenv("SSE_POLL_S", "0.1"))
+# How long a stream for a task nobody knows waits for its first event before closing
+UNKNOWN_TASK_WAIT_S = float(os.getenv("SSE_UNKNOWN_TASK_WAIT_S", "30"))
+
+# Looks a task up in its agent's TaskStore
+TaskLookup = Callable[[str], Optional[ResubscribeResponse]]
+
+
+def is_terminal(event: Dict[str, Any]) -> bool:
+    return event.get("event") == "task-status" and event.get("state") in TERMINAL_STATES
+
+
+class Frame:
+    """One event as delivered on a stream: its id, payload and SSE encoding.
+
+    The encoding is produced on first read and then shared, so an event
+    fanned out to a thousand subscribers is serialized once, not a thousand
+    times.
+    """
+
+    __slots__ = ("id", "event", "_sse")
+
+    def __init__(self, event_id: int, event: Dict[str, Any]):
+        self.id = event_id
+        self.event = event
+        self._sse: Optional[bytes] = None
+
+    @property
+    def sse(self) -> bytes:
+        if self._sse is None:
+            # sse_starlette writes bytes through untouched; \r\n matches its own framing
+            self._sse = b"id: %d\r\ndata: %s\r\n\r\n" % (self.id, dumps(self.event))
+        return self._sse
+
+
+class TaskChannel:
+    def __init__(self, history_size: int):
+        self.history: Deque[Frame] = deque(maxlen=history_size)
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.next_id = 1
+        self.closed = False
+
+    def idle(self) -> bool:
+        return not self.subscribers and not self.history
+
+
+class ContextChannel(TaskChannel):
+    """Merged events of every task in one context_id, with their own ids."""
+
+    def __init__(self, history_size: int):
+        super().__init__(history_size)
+        self.tasks: Set[str] = set()
+
+    def idle(self) -> bool:
+        return super().idle() and not self.tasks
+
+
+def context_log_key(context_id: str) -> str:
+    # Context streams share the backend's event log with task streams
+    return f"context:{context_id}"
+
+
+class EventBus:
+    """In-process pub/sub for task events.
+
+    Every task gets a channel holding a bounded replay history and one queue per
+    live subscriber. Publishing pushes into those queues, so idle subscribers
+    simply await and cost nothing until an event arrives.
+
+    Tasks bound to a context_id (``bind``) also publish into that context's
+    channel, tagged with the agent, so one subscription can follow a whole
+    pipeline in publish order. Context channels number their events
+    separately and never end on their own.
+
+    With a shared backend (TASK_BACKEND) events are appended to its log
+    instead of the local history, and subscribers read from the log, so a
+    stream can be served by a different worker than the one running the task.
+    """
+
+    def __init__(self, history_size: int = 1024, retention_s: float = 300.0, context_history_size: int = 4096):
+        self.history_size = history_size
+        self.retention_s = retention_s
+        self.context_history_size = context_history_size
+        self._channels: Dict[str, TaskChannel] = {}
+        self._contexts: Dict[str, ContextChannel] = {}
+        # task_id -> (context_id, agent) until the task's terminal event
+        self._bindings: Dict[str, Tuple[str, str]] = {}
+        self._forwards: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+
+    def forward(self, task_id: str, sink: Callable[[Dict[str, Any]], None]) -> None:
+        """Hand events published for ``task_id`` to ``sink`` instead of a channel.
+
+        Used by coalesced executions (services/common/coalesce.py), which run
+        under their own id and re-publish to every task attached to them.
+        """
+        self._forwards[task_id] = sink
+
+    def unforward(self, task_id: str) -> None:
+        self._forwards.pop(task_id, None)
+
+    def bind(self, task_id: str, context_id: str, agent: str) -> None:
+        """Also publish ``task_id``'s events to ``context_id``'s merged stream."""
+        self._bindings[task_id] = (context_id, agent)
+        self._context(context_id).tasks.add(task_id)
+
+    def _channel(self, task_id: str) -> TaskChannel:
+        channel = self._channels.get(task_id)
+        if channel is None:
+            channel = self._channels[task_id] = TaskChannel(self.history_size)
+        return channel
+
+    def _context(self, context_id: str) -> ContextChannel:
+        channel = self._contexts.get(context_id)
+        if channel is None:
+            channel = self._contexts[context_id] = ContextChannel(self.context_history_size)
+        return channel
+
+    def publish(self, task_id: str, event: Dict[str, Any]) -> int:
+        """Publish ``event``; returns its id, or 0 when forwarded or the shared backend assigns it."""
+        sink = self._forwards.get(task_id)
+        if sink is not None:
+            sink(event)
+            return 0
+        channel = self._channel(task_id)
+        backend = get_backend()
+        event_id = 0
+        if backend is not None:
+            # Subscribers read the log, so wake them once the event is in it
+            backend.append_event(task_id, event, is_terminal(event), self._waker(channel))
+        else:
+            event_id = channel.next_id
+            channel.next_id += 1
+            frame = Frame(event_id, event)
+            channel.history.append(frame)
+            for queue in channel.subscribers:
+                queue.put_nowait(frame)
+
+        binding = self._bindings.get(task_id)
+        if binding is not None:
+            self._publish_context(task_id, binding[0], binding[1], event)
+
+        if is_terminal(event) and not channel.closed:
+            channel.closed = True
+            # Keep the history around so late subscribers can still replay it
+            asyncio.get_running_loop().call_later(self.retention_s, self._drop, task_id, channel)
+        return event_id
+
+    def _publish_context(self, task_id: str, context_id: str, agent: str, event: Dict[str, Any]) -> None:
+        channel = self._context(context_id)
+        tagged = {**event, "context_id": context_id, "agent": agent}
+        backend = get_backend()
+        if backend is not None:
+            backend.append_event(context_log_key(context_id), tagged, False, self._waker(channel))
+        else:
+            frame = Frame(channel.next_id, tagged)
+            channel.next_id += 1
+            channel.history.append(frame)
+            for queue in channel.subscribers:
+                queue.put_nowait(frame)
+
+        if is_terminal(event):
+            del self._bindings[task_id]
+            channel.tasks.discard(task_id)
+            if not channel.tasks:
+                asyncio.get_running_loop().call_later(self.retention_s, self._drop_context, context_id, channel)
+
+    @staticmethod
+    def _waker(channel: TaskChannel) -> Callable[[int], None]:
+        loop = asyncio.get_running_loop()
+
+        def notify() -> None:
+            for queue in channel.subscribers:
+                queue.put_nowait(None)
+
+        def wake(_: int) -> None:
+            # Called on the backend's writer thread
+            try:
+                loop.call_soon_threadsafe(notify)
+            except RuntimeError:
+                pass  # the loop has shut down
+
+        return wake
+
+    def _drop(self, task_id: str, channel: TaskChannel) -> None:
+        if self._channels.get(task_id) is channel:
+            del self._channels[task_id]
+
+    def _drop_context(self, context_id: str, channel: ContextChannel) -> None:
+        if self._contexts.get(context_id) is not channel or channel.tasks:
+            # Replaced, or a new stage started in the meantime (it reschedules on finishing)
+            return
+        if channel.subscribers:
+            # Someone is still following the pipeline; keep its replay window
+            asyncio.get_running_loop().call_later(self.retention_s, self._drop_context, context_id, channel)
+            return
+        del self._contexts[context_id]
+
+    async def subscribe(
+        self, task_id: str, last_event_id: Optional[int] = None, lookup: Optional[TaskLookup] = None
+    ) -> AsyncIterator[Frame]:
+        """``task_id``'s events until its terminal one.
+
+        With ``lookup`` the stream always ends: a finished task whose events
+        have expired gets one final event built from its stored state, and a
+        task that is neither stored nor publishing is given up on after
+        ``UNKNOWN_TASK_WAIT_S``.
+        """
+        channel = self._channel(task_id)
+        backend = get_backend()
+        after = last_event_id or 0
+
+        def follow() -> AsyncIterator[Frame]:
+            if backend is not None:
+                return self._follow_backend(backend, task_id, channel, after, until_terminal=True)
+            return self._follow(channel, after, until_terminal=True)
+
+        try:
+            stored = lookup(task_id) if lookup is not None else None
+            if stored is not None and stored.state.value in TERMINAL_STATES:
+                if not await self._has_events(backend, task_id, channel, after):
+                    yield final_frame(stored, after)
+                    return
+            elif lookup is not None and stored is None:
+                events = follow()
+                try:
+                    first = await asyncio.wait_for(events.__anext__(), UNKNOWN_TASK_WAIT_S)
+                except (asyncio.TimeoutError, StopAsyncIteration):
+                    stored = lookup(task_id)
+                    if stored is not None and stored.state.value in TERMINAL_STATES:
+                        yield final_frame(stored, after)
+                    if stored is None or stored.state.value in TERMINAL_STATES:
+                        return
+                    # Submitted just now but hasn't published yet
+                else:
+                    yield first
+                    if is_terminal(first.event):
+                        return
+                    async for item in events:
+                        yield item
+                    return
+            async for item in follow():
+                yield item
+        finally:
+            if channel.idle() and self._channels.get(task_id) is channel:
+                del self._channels[task_id]
+
+    @staticmethod
+    async def _has_events(backend: Optional[SharedBackend], key: str, channel: TaskChannel, after: int) -> bool:
+        if backend is not None:
+            return bool(await asyncio.to_thread(backend.read_events, key, after))
+        return any(frame.id > after for frame in channel.history)
+
+    async def subscribe_context(self, context_id: str, last_event_id: Optional[int] = None) -> AsyncIterator[Frame]:
+        """Every event of every task bound to ``context_id``, until the caller stops."""
+        channel = self._context(context_id)
+        backend = get_backend()
+        try:
+            if backend is not None:
+                key = context_log_key(context_id)
+                events = self._follow_backend(backend, key, channel, last_event_id or 0, until_terminal=False)
+            else:
+                events = self._follow(channel, last_event_id or 0, until_terminal=False)
+            async for item in events:
+                yield item
+        finally:
+            if channel.idle() and self._contexts.get(context_id) is channel:
+                del self._contexts[context_id]
+
+    async def _follow(self, channel: TaskChannel, after: int, until_terminal: bool) -> AsyncIterator[Frame]:
+        for frame in list(channel.history):
+            if frame.id > after:
+                yield frame
+                after = frame.id
+                if until_terminal and is_terminal(frame.event):
+                    return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        channel.subscribers.add(queue)
+        try:
+            # Anything published while the replay above was being consumed
+            for frame in list(channel.history):
+                if frame.id > after:
+                    queue.put_nowait(frame)
+            while True:
+                frame = await queue.get()
+                if frame.id <= after:
+                    continue
+                after = frame.id
+                yield frame
+                if until_terminal and is_terminal(frame.event):
+                    return
+        finally:
+            channel.subscribers.discard(queue)
+
+    async def _follow_backend(
+        self, backend: SharedBackend, key: str, channel: TaskChannel, after: int, until_terminal: bool
+    ) -> AsyncIterator[Frame]:
+        # Local publishes wake us immediately; remote ones are seen on the next poll
+        wake: asyncio.Queue = asyncio.Queue()
+        channel.subscribers.add(wake)
+        try:
+            while True:
+                for event_id, event in await asyncio.to_thread(backend.read_events, key, after):
+                    after = event_id
+                    yield Frame(event_id, event)
+                    if until_terminal and is_terminal(event):
+                        return
+                try:
+                    await asyncio.wait_for(wake.get(), POLL_INTERVAL_S)
+                except asyncio.TimeoutError:
+                    pass
+                while not wake.empty():
+                    wake.get_nowait()
+        finally:
+            channel.subscribers.discard(wake)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "channels": len(self._channels),
+            "contexts": len(self._contexts),
+            "subscribers": sum(len(c.subscribers) for c in self._channels.values())
+            + sum(len(c.subscribers) for c in self._contexts.values()),
+        }
+
+
+def final_frame(stored: ResubscribeResponse, after: int) -> Frame:
+    """The terminal event for a finished task, rebuilt from its stored state."""
+    event = status_event(stored.task_id, stored.state, "Replayed from the task store", stored.artifacts, stored.message)
+    return Frame(after + 1, event)
+
+
+BUS = EventBus(
+    history_size=int(os.getenv("SSE_HISTORY_SIZE", "1024")),
+    retention_s=float(os.getenv("SSE_RETENTION_S", "300")),
+    context_history_size=int(os.getenv("SSE_CONTEXT_HISTORY_SIZE", "4096")),
+)
+
+Collected("a2a_sse_subscribers", "Open SSE subscriptions", lambda: [({}, BUS.stats()["subscribers"])])
+Collected("a2a_sse_channels", "Tasks with an event channel in memory", lambda: [({}, BUS.stats()["channels"])])
+Collected("a2a_sse_contexts", "Contexts with a merged event channel in memory", lambda: [({}, BUS.stats()["contexts"])])
+
+
+def publish_status(
+    task_id: str,
+    state: TaskState,
+    detail: Optional[str] = None,
+    artifacts: Optional[List[Dict[str, Any]]] = None,
+    message: Optional[Message] = None,
+) -> int:
+    return BUS.publish(task_id, status_event(task_id, state, detail, artifacts, message))
+
+
+def publish_artifact(
+    task_id: str, artifact: Dict[str, Any], append: bool = False, last_chunk: bool = True
+) -> int:
+    return BUS.publish(task_id, artifact_event(task_id, artifact, append, last_chunk))
+
+
+def parse_last_event_id(request: Request, last_event_id: Optional[str] = None) -> Optional[int]:
+    raw = last_event_id or request.headers.get("last-event-id")
+    try:
+        return int(raw) if raw else None
+    except ValueError:
+        return None
+
+
+def task_event_response(
+    task_id: str, request: Request, last_event_id: Optional[str] = None, lookup: Optional[TaskLookup] = None
+) -> EventSourceResponse:
+    """SSE response replaying and then following ``task_id``'s events.
+
+    Pass the agent's ``TASKS.get`` as ``lookup`` so the stream still ends for
+    a task whose events have expired or that was never submitted.
+    """
+    after = parse_last_event_id(request, last_event_id)
+
+    async def event_generator():
+        async for frame in BUS.subscribe(task_id, after, lookup):
+            yield frame.sse
+
+    return EventSourceResponse(event_generator(), ping=PING_INTERVAL_S)
+
+
+def context_event_response(
+    context_id: str, request: Request, last_event_id: Optional[str] = None
+) -> EventSourceResponse:
+    """SSE response replaying and then following every task in ``context_id``.
+
+    Event ids are the context's own sequence, so ``Last-Event-ID`` resumes
+    the merged stream; each event names its ``agent`` and ``task_id``.
+    """
+    after = parse_last_event_id(request, last_event_id)
+
+    async def event_generator():
+        async for frame in BUS.subscribe_context(context_id, after):
+            yield frame.sse
+
+    return EventSourceResponse(event_generator(), ping=PING_INTERVAL_S)
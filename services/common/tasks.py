@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import traceback
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+
+from services.common.artifacts import share_message
+from services.common.journal import JOURNAL
+from services.common.metrics import CURRENT_TRACE, TASKS_FINISHED, Collected, Trace, observe_stage
+from services.common.schemas import (
+    Message,
+    MessageRequest,
+    MessageResponse,
+    ResubscribeResponse,
+    TaskState,
+    TaskStatusUpdateEvent,
+)
+from services.common.sse import BUS, TERMINAL_STATES, publish_status
+from services.common.taskstore import TaskStore
+
+
+@dataclass
+class TaskResult:
+    message: Message
+    artifacts: List[Dict[str, Any]] = field(default_factory=list)
+    state: TaskState = TaskState.completed
+    detail: Optional[str] = None
+
+
+Job = Callable[[str], Awaitable[TaskResult]]
+
+
+# Every engine in this process, for the in-flight gauges
+ENGINES: Dict[str, "TaskEngine"] = {}
+
+# How long /tasks/cancel waits for a running job to stop before answering
+CANCEL_WAIT_S = float(os.getenv("TASK_CANCEL_WAIT_S", "5"))
+
+
+class QueueFullError(Exception):
+    def __init__(self, agent: str, retry_after: int):
+        super().__init__(f"{agent} task queue is full")
+        self.retry_after = retry_after
+
+
+class TaskEngine:
+    """Bounded async worker pool that runs agent jobs in the background.
+
+    Each agent owns one engine; ``concurrency`` caps how many jobs run at once
+    and ``max_queue`` caps how many may wait before submissions are rejected.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        tasks: TaskStore,
+        concurrency: Optional[int] = None,
+        max_queue: Optional[int] = None,
+    ):
+        prefix = name.upper()
+        self.name = name
+        self.tasks = tasks
+        self.concurrency = concurrency or int(os.getenv(f"{prefix}_MAX_CONCURRENCY", "32"))
+        self.max_queue = max_queue or int(os.getenv(f"{prefix}_MAX_QUEUE", "1000"))
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._running = 0
+        self._active: Dict[str, asyncio.Task] = {}
+        self._canceled: Set[str] = set()
+        # task_id -> future resolved once the worker has recorded the task's final state
+        self._finished: Dict[str, asyncio.Future] = {}
+        self._avg_duration_s = 5.0
+        ENGINES[name] = self
+
+    def _ensure_workers(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._workers = [
+                loop.create_task(self._worker(), name=f"{self.name}-worker-{i}")
+                for i in range(self.concurrency)
+            ]
+        return self._queue
+
+    def _set_state(
+        self,
+        task_id: str,
+        state: TaskState,
+        detail: Optional[str] = None,
+        artifacts: Optional[List[Dict[str, Any]]] = None,
+        message: Optional[Message] = None,
+    ) -> None:
+        self.tasks[task_id] = ResubscribeResponse(
+            task_id=task_id,
+            state=state,
+            last_event=TaskStatusUpdateEvent(task_id=task_id, state=state, detail=detail).model_dump(),
+            artifacts=artifacts or [],
+            message=message,
+        )
+        if state.value in TERMINAL_STATES:
+            publish_status(task_id, state, detail, artifacts or [], message)
+        else:
+            publish_status(task_id, state, detail)
+
+    def retry_after(self) -> int:
+        queued = self._queue.qsize() if self._queue is not None else 0
+        return max(1, math.ceil(self._avg_duration_s * (queued + 1) / self.concurrency))
+
+    def submit(self, task_id: str, context_id: str, job: Job) -> asyncio.Future:
+        queue = self._ensure_workers()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        try:
+            queue.put_nowait((task_id, context_id, job, future, loop.time()))
+        except asyncio.QueueFull:
+            raise QueueFullError(self.name, self.retry_after()) from None
+        self._finished[task_id] = future
+        future.add_done_callback(lambda done: self._forget_finished(task_id, done))
+        BUS.bind(task_id, context_id, self.name)
+        self._set_state(task_id, TaskState.queued, "Waiting for a worker...")
+        # Journaled now so a retrying client can find and follow the task instead of resending it
+        JOURNAL.record(context_id, self.name, task_id, TaskState.queued.value)
+        return future
+
+    def _forget_finished(self, task_id: str, future: asyncio.Future) -> None:
+        # The same task_id may have been submitted again since
+        if self._finished.get(task_id) is future:
+            del self._finished[task_id]
+
+    def cancel(self, task_id: str) -> bool:
+        active = self._active.get(task_id)
+        if active is not None:
+            active.cancel()
+            return True
+        current = self.tasks.get(task_id)
+        if current is not None and current.state == TaskState.queued:
+            # Skipped when a worker dequeues it
+            self._canceled.add(task_id)
+            self._set_state(task_id, TaskState.canceled, "Canceled before start")
+            return True
+        return False
+
+    async def cancel_and_wait(self, task_id: str, timeout_s: Optional[float] = None) -> bool:
+        """Cancel ``task_id`` and wait until its final state is recorded.
+
+        Gives up after ``timeout_s`` (``CANCEL_WAIT_S``) if the job doesn't
+        stop, and returns whether a cancellation was requested.
+        """
+        requested = self.cancel(task_id)
+        finished = self._finished.get(task_id)
+        current = self.tasks.get(task_id)
+        if not requested or finished is None or (current is not None and current.state.value in TERMINAL_STATES):
+            return requested
+        await asyncio.wait({finished}, timeout=CANCEL_WAIT_S if timeout_s is None else timeout_s)
+        return True
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            task_id, context_id, job, future, enqueued_at = await self._queue.get()
+            if task_id in self._canceled:
+                self._canceled.discard(task_id)
+                self._queue.task_done()
+                JOURNAL.record(context_id, self.name, task_id, TaskState.canceled.value)
+                if not future.done():
+                    future.set_result(self._response(task_id, context_id, TaskState.canceled, "Task canceled"))
+                continue
+
+            self._running += 1
+            started = loop.time()
+            observe_stage("queue_wait", started - enqueued_at, agent=self.name)
+            # The job's task copies this context, so its LLM/Gamma calls are traced
+            trace_token = CURRENT_TRACE.set(Trace(context_id=context_id, task_id=task_id, agent=self.name))
+            try:
+                self._set_state(task_id, TaskState.working, None)
+                self._active[task_id] = loop.create_task(job(task_id))
+                result = await self._active[task_id]
+            except asyncio.CancelledError:
+                current = asyncio.current_task()
+                if current is not None and getattr(current, "cancelling", lambda: 0)():
+                    # The worker itself is shutting down, not just this job
+                    raise
+                result = TaskResult(
+                    message=Message(role="assistant", content="Task canceled"),
+                    state=TaskState.canceled,
+                    detail="Canceled while running",
+                )
+            except Exception as e:
+                # Errors that know their structured reason (e.g. CircuitOpenError) provide it
+                artifact = e.artifact() if hasattr(e, "artifact") else {"error": str(e)}
+                if not hasattr(e, "artifact"):
+                    traceback.print_exc()
+                result = TaskResult(
+                    message=Message(role="assistant", content=f"Task failed: {e}"),
+                    artifacts=[artifact],
+                    state=TaskState.failed,
+                    detail=str(e),
+                )
+            finally:
+                self._active.pop(task_id, None)
+                self._running -= 1
+                elapsed = loop.time() - started
+                self._avg_duration_s = 0.8 * self._avg_duration_s + 0.2 * elapsed
+                observe_stage("run", elapsed, agent=self.name)
+                CURRENT_TRACE.reset(trace_token)
+                self._queue.task_done()
+
+            TASKS_FINISHED.inc(agent=self.name, state=result.state.value)
+            # Large replies go to the artifact store once; downstream agents get a reference
+            result.message = await share_message(result.message)
+            self._set_state(task_id, result.state, result.detail, result.artifacts, result.message)
+            JOURNAL.record(context_id, self.name, task_id, result.state.value, result.message, result.artifacts)
+            if not future.done():
+                future.set_result(
+                    MessageResponse(
+                        context_id=context_id,
+                        task_id=task_id,
+                        message=result.message,
+                        state=result.state,
+                    )
+                )
+
+    @staticmethod
+    def _response(task_id: str, context_id: str, state: TaskState, content: str) -> MessageResponse:
+        return MessageResponse(
+            context_id=context_id,
+            task_id=task_id,
+            message=Message(role="assistant", content=content),
+            state=state,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "agent": self.name,
+            "running": self._running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "avg_duration_s": round(self._avg_duration_s, 3),
+        }
+
+
+def _in_flight() -> List[Tuple[Dict[str, Any], float]]:
+    samples = []
+    for engine in ENGINES.values():
+        stats = engine.stats()
+        samples.append(({"agent": engine.name, "state": "working"}, stats["running"]))
+        samples.append(({"agent": engine.name, "state": "queued"}, stats["queued"]))
+    return samples
+
+
+Collected("a2a_tasks_in_flight", "Tasks queued or running per agent", _in_flight)
+
+
+def request_ids(request: MessageRequest) -> Tuple[str, str]:
+    return request.task_id or str(uuid.uuid4()), request.context_id or str(uuid.uuid4())
+
+
+async def dispatch(engine: TaskEngine, request: MessageRequest, job: Job) -> MessageResponse:
+    """Queue ``job`` and return immediately, or wait when ``metadata.blocking`` is set."""
+    task_id, context_id = request_ids(request)
+    try:
+        future = engine.submit(task_id, context_id, job)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    if request.metadata.get("blocking"):
+        # Shield so a disconnecting client doesn't cancel the background job
+        return await asyncio.shield(future)
+
+    return MessageResponse(
+        context_id=context_id,
+        task_id=task_id,
+        message=Message(role="assistant", content=f"Task {task_id} queued"),
+        state=TaskState.queued,
+    )
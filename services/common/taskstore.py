@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from services.common.artifacts import ARTIFACTS, restore_content, strip_content
+from services.common.backend import get_backend
+from services.common.metrics import Collected
+from services.common.schemas import ResubscribeResponse
+from services.common.sse import BUS, TERMINAL_STATES
+
+# Every store created in this process, for the memory gauge
+STORES: Dict[str, "TaskStore"] = {}
+
+
+class TaskStore:
+    """Task state for one agent, bounded once tasks finish.
+
+    Live tasks are kept as models. Terminal tasks are encoded to JSON,
+    zlib-compressed above ``compress_bytes`` and written to ``spill_dir``
+    above ``spill_bytes``; they are evicted oldest first once older than
+    ``ttl_s`` or once encoded terminal tasks exceed ``max_bytes``.
+
+    Supports the dict operations the agents use (``store[id] = ...``,
+    ``store.get(id)``), so it drops in for the old ``TASKS`` dicts. With a
+    shared backend (TASK_BACKEND) every task is read and written through it
+    instead, so any worker can answer for any task.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl_s: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        compress_bytes: Optional[int] = None,
+        spill_bytes: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+    ):
+        self.name = name
+        self.ttl_s = ttl_s if ttl_s is not None else float(os.getenv("TASK_TTL_S", "3600"))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("TASK_MAX_BYTES", str(64 * 1024 * 1024)))
+        self.compress_bytes = (
+            compress_bytes if compress_bytes is not None else int(os.getenv("TASK_COMPRESS_BYTES", "4096"))
+        )
+        self.spill_bytes = spill_bytes if spill_bytes is not None else int(os.getenv("TASK_SPILL_BYTES", "262144"))
+        self.spill_dir = spill_dir if spill_dir is not None else os.getenv("TASK_SPILL_DIR", ".cache/tasks")
+        self._live: Dict[str, ResubscribeResponse] = {}
+        # task_id -> (finished_at, payload, compressed, spill path); payload is b"" when spilled
+        self._done: "OrderedDict[str, Tuple[float, bytes, bool, Optional[str]]]" = OrderedDict()
+        self.bytes = 0
+        self.spilled_bytes = 0
+        self.evicted = 0
+        STORES[name] = self
+
+    def __setitem__(self, task_id: str, response: ResubscribeResponse) -> None:
+        if response.message is not None and response.message.ref is not None:
+            # The artifact store already holds the reply; keep only its reference if it's durable
+            response = response.model_copy(update={"message": strip_content(response.message, self.ttl_s)})
+        backend = get_backend()
+        if backend is not None:
+            payload = response.model_dump_json().encode("utf-8")
+            compressed = len(payload) > self.compress_bytes
+            backend.save_task(
+                self.name,
+                task_id,
+                zlib.compress(payload, 6) if compressed else payload,
+                compressed,
+                response.state in TERMINAL_STATES,
+            )
+            return
+        self._forget(task_id)
+        if response.state in TERMINAL_STATES:
+            self._done[task_id] = (time.time(), *self._encode(task_id, response))
+            self.bytes += len(self._done[task_id][1])
+        else:
+            self._live[task_id] = response
+        self._evict()
+
+    def get(self, task_id: str, default: Any = None) -> Any:
+        backend = get_backend()
+        if backend is not None:
+            stored = backend.load_task(self.name, task_id)
+            if stored is None:
+                return default
+            payload, compressed = stored
+            return _restore(ResubscribeResponse.model_validate_json(zlib.decompress(payload) if compressed else payload))
+        response = self._live.get(task_id)
+        if response is not None:
+            return response
+        entry = self._done.get(task_id)
+        if entry is None:
+            return default
+        if entry[0] + self.ttl_s <= time.time():
+            self._forget(task_id)
+            return default
+        return _restore(self._decode(entry))
+
+    def __getitem__(self, task_id: str) -> ResubscribeResponse:
+        response = self.get(task_id)
+        if response is None:
+            raise KeyError(task_id)
+        return response
+
+    def __contains__(self, task_id: object) -> bool:
+        return self.get(task_id) is not None
+
+    def __len__(self) -> int:
+        return len(self._live) + len(self._done)
+
+    def _encode(self, task_id: str, response: ResubscribeResponse) -> Tuple[bytes, bool, Optional[str]]:
+        payload = response.model_dump_json().encode("utf-8")
+        compressed = len(payload) > self.compress_bytes
+        if compressed:
+            payload = zlib.compress(payload, 6)
+        if len(payload) > self.spill_bytes and self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            # task ids come from clients, so never use them as file names directly
+            digest = hashlib.sha256(task_id.encode("utf-8")).hexdigest()[:32]
+            path = os.path.join(self.spill_dir, f"{self.name}-{digest}.json" + (".z" if compressed else ""))
+            with open(path, "wb") as handle:
+                handle.write(payload)
+            self.spilled_bytes += len(payload)
+            return b"", compressed, path
+        return payload, compressed, None
+
+    @staticmethod
+    def _decode(entry: Tuple[float, bytes, bool, Optional[str]]) -> ResubscribeResponse:
+        _, payload, compressed, path = entry
+        if path is not None:
+            with open(path, "rb") as handle:
+                payload = handle.read()
+        if compressed:
+            payload = zlib.decompress(payload)
+        return ResubscribeResponse.model_validate_json(payload)
+
+    def _forget(self, task_id: str) -> None:
+        self._live.pop(task_id, None)
+        entry = self._done.pop(task_id, None)
+        if entry is None:
+            return
+        self.bytes -= len(entry[1])
+        if entry[3] is not None:
+            try:
+                self.spilled_bytes -= os.path.getsize(entry[3])
+                os.remove(entry[3])
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        expired_before = time.time() - self.ttl_s
+        while self._done:
+            task_id, (finished_at, *_rest) = next(iter(self._done.items()))
+            if finished_at > expired_before and self.bytes <= self.max_bytes:
+                break
+            self._forget(task_id)
+            self.evicted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "live": len(self._live),
+            "terminal": len(self._done),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "spilled_bytes": self.spilled_bytes,
+            "evicted": self.evicted,
+        }
+
+
+def _restore(response: ResubscribeResponse) -> ResubscribeResponse:
+    if response.message is None or response.message.ref is None:
+        return response
+    return response.model_copy(update={"message": restore_content(response.message)})
+
+
+def rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm", "r", encoding="utf-8") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+Collected("a2a_process_resident_bytes", "Resident memory of this process", lambda: [({}, rss_bytes() or 0)])
+Collected(
+    "a2a_taskstore_bytes",
+    "Encoded bytes of finished tasks held in memory",
+    lambda: [({"agent": name}, store.bytes) for name, store in STORES.items()],
+)
+
+
+def memory_stats() -> Dict[str, Any]:
+    backend = get_backend()
+    return {
+        "rss_bytes": rss_bytes(),
+        "task_bytes": sum(store.bytes for store in STORES.values()),
+        "stores": {name: store.stats() for name, store in STORES.items()},
+        "events": BUS.stats(),
+        "artifacts": ARTIFACTS.stats(),
+        "backend": backend.stats() if backend is not None else None,
+    }
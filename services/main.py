@@ -1,4 +1,9 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
@@ -8,8 +13,34 @@ from services.triage.app import app as triage_app
 from services.research.app import app as research_app
 from services.review.app import app as review_app
 from services.presentation.app import app as presentation_app
+from services.common.artifacts import ARTIFACTS, router as artifacts_router
+from services.common.backend import close_backend
+from services.common.breaker import BREAKERS
+from services.common.coalesce import FLIGHT_GROUPS
+from services.common.encoding import JSON_RESPONSE
+from services.common.journal import JOURNAL, router as journal_router
+from services.common.llm import close_llm_client
+from services.common.metrics import render, spans_for
+from services.common.providers import route_stats
+from services.common.ratelimit import GOVERNORS
+from services.common.sse import context_event_response
+from services.common.taskstore import memory_stats
+from services.presentation.gamma import POLLER
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Mounted sub-apps don't get lifespan events, so shared pools close here
+    await close_llm_client()
+    await POLLER.close()
+    await ARTIFACTS.close()
+    # Queued task, event and journal writes
+    await asyncio.to_thread(close_backend)
+    await asyncio.to_thread(JOURNAL.close)
 
-app = FastAPI(title="A2A Unified Backend")
+
+app = FastAPI(title="A2A Unified Backend", lifespan=lifespan, default_response_class=JSON_RESPONSE)
 
 # Global CORS Policy - One Origin to Rule Them All
 app.add_middleware(
@@ -26,7 +57,52 @@ app.mount("/triage", triage_app)
 app.mount("/research", research_app)
 app.mount("/review", review_app)
 app.mount("/presentation", presentation_app)
+# Artifacts are shared by every agent in the process; also served under each agent's prefix
+app.include_router(artifacts_router)
+# Pipeline journals (GET /contexts/{context_id}/journal), also under each agent's prefix
+app.include_router(journal_router)
 
 @app.get("/")
 def root():
     return {"status": "A2A Unified Backend Running"}
+
+
+@app.get("/contexts/{context_id}/stream")
+async def context_stream(context_id: str, request: Request, last_event_id: Optional[str] = None):
+    # One connection for a whole pipeline: every agent's events for this context, in order
+    return context_event_response(context_id, request, last_event_id)
+
+
+@app.get("/stats/memory")
+def memory():
+    return {**memory_stats(), "journal": JOURNAL.stats()}
+
+
+@app.get("/stats/ratelimits")
+def ratelimits():
+    return {governor.name: governor.stats() for governor in GOVERNORS.values()}
+
+
+@app.get("/stats/llm")
+def llm_routes():
+    return route_stats()
+
+
+@app.get("/stats/circuits")
+def circuits():
+    return {breaker.name: breaker.stats() for breaker in BREAKERS.values()}
+
+
+@app.get("/stats/coalescing")
+def coalescing():
+    return {group.name: group.stats() for group in FLIGHT_GROUPS.values()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/traces/{context_id}")
+def trace(context_id: str):
+    return {"context_id": context_id, "spans": spans_for(context_id)}
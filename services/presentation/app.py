@@ -1,29 +1,41 @@
 from __future__ import annotations
 
-import uuid
-from typing import Dict
-
-from fastapi import FastAPI
 import json
+import os
+import traceback
+from typing import Optional
 
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from sse_starlette.sse import EventSourceResponse
 
+from services.common.artifacts import message_text, router as artifacts_router
+from services.common.breaker import CircuitOpenError
+from services.common.cache import cache_key
+from services.common.coalesce import SingleFlight, single_flight
+from services.common.encoding import JSON_RESPONSE
+from services.common.journal import router as journal_router
+from services.common.llm import chat_completion, model_label
+from services.common.metrics import stage_timer
+from services.common.profile import DEMO, PROFILES, Profile, profile_for
 from services.common.schemas import (
+    CancelRequest,
     Message,
     MessageRequest,
     MessageResponse,
     ResubscribeRequest,
     ResubscribeResponse,
-    TaskArtifactUpdateEvent,
     TaskState,
-    TaskStatusUpdateEvent,
 )
-from services.common.sse import simple_event_stream
+from services.common.sse import publish_status, task_event_response
+from services.common.taskstore import TaskStore
+from services.common.tasks import TaskEngine, TaskResult, dispatch
+from services.presentation.gamma import POLLER, GammaError
 
-from fastapi.middleware.cors import CORSMiddleware
+load_dotenv()
 
-app = FastAPI(title="A2A Presentation Agent")
+app = FastAPI(title="A2A Presentation Agent", default_response_class=JSON_RESPONSE)
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,65 +45,71 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-TASKS: Dict[str, ResubscribeResponse] = {}
+TASKS = TaskStore("presentation")
 
+ENGINE = TaskEngine("presentation", TASKS)
 
-import os
-import time
-import httpx
-from openai import OpenAI
-from dotenv import load_dotenv
+app.include_router(artifacts_router)
+app.include_router(journal_router)
 
-load_dotenv()
+# Identical decks requested at the same time share one Gamma generation
+FLIGHTS = SingleFlight("presentation")
 
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 @app.post("/message", response_model=MessageResponse)
-def message(request: MessageRequest) -> MessageResponse:
-    task_id = request.task_id or str(uuid.uuid4())
-    context_id = request.context_id or str(uuid.uuid4())
-    
+async def message(request: MessageRequest) -> MessageResponse:
+    content_to_present = await message_text(request.message)
+
+    async def job(task_id: str) -> TaskResult:
+        return await run_presentation(task_id, content_to_present, profile_for(request.metadata))
+
+    return await dispatch(ENGINE, request, job)
+
+
+async def run_presentation(
+    task_id: str, content_to_present: str, profile: Profile = PROFILES[DEMO]
+) -> TaskResult:
+    backend = "gamma" if os.getenv("GAMMA_API_KEY") else model_label("presentation")
+    key = cache_key("presentation", backend, "", content_to_present, profile=profile.name)
+    return await single_flight(
+        FLIGHTS, key, task_id, lambda run_id: presentation(run_id, content_to_present, profile)
+    )
+
+
+async def presentation(task_id: str, content_to_present: str, profile: Profile) -> TaskResult:
     gamma_key = os.getenv("GAMMA_API_KEY")
     slides_url = "https://gamma.app/error"
     artifacts = []
     
     if gamma_key:
         try:
+            publish_status(task_id, TaskState.working, "Submitting deck to Gamma...")
             # 1. Start Generation
-            headers = {"X-API-KEY": gamma_key, "Content-Type": "application/json"}
             payload = {
-                "inputText": request.message.content,
+                "inputText": content_to_present,
                 "textMode": "generate",
                 "format": "presentation",
                 "numCards": 7
             }
             
-            with httpx.Client(timeout=30.0) as client:
-                resp = client.post("https://public-api.gamma.app/v1.0/generations", json=payload, headers=headers)
-                resp.raise_for_status()
-                job_id = resp.json()["generationId"]
-                
-                # 2. Poll for Completion
-                status = "queued"
-                while status in ["queued", "processing", "pending"]:
-                    time.sleep(2.0)
-                    job_resp = client.get(f"https://public-api.gamma.app/v1.0/generations/{job_id}", headers=headers)
-                    if job_resp.status_code == 200:
-                        job_data = job_resp.json()
-                        status = job_data["status"]
-                        if status == "completed":
-                            slides_url = job_data["gammaUrl"]
-                            artifacts = [{"gammaUrl": slides_url}]
-                            break
-                        elif status == "failed":
-                            slides_url = "https://gamma.app/failed"
-                            artifacts = [{"error": "Gamma generation failed"}]
-                            break
-                    else:
-                        break
+            job_id = await POLLER.submit(gamma_key, payload)
+            publish_status(task_id, TaskState.working, f"Gamma generation {job_id} queued")
+
+            # 2. Poll for Completion on the shared scheduler
+            with stage_timer("gamma_poll"):
+                job_data = await POLLER.wait(task_id, gamma_key, job_id)
+            if job_data["status"] == "completed":
+                slides_url = job_data["gammaUrl"]
+                artifacts = [{"gammaUrl": slides_url}]
+            elif not profile.mock_fallbacks:
+                raise GammaError(f"Gamma generation {job_id} {job_data['status']}")
+            else:
+                slides_url = "https://gamma.app/failed"
+                artifacts = [{"error": "Gamma generation failed"}]
 
         except Exception as e:
-            import traceback
+            if not profile.mock_fallbacks:
+                raise
             traceback.print_exc()
             print(f"Gamma Error: {e}")
             slides_url = "https://gamma.app/error"
@@ -100,18 +118,20 @@ def message(request: MessageRequest) -> MessageResponse:
     else:
         # Fallback: Generate Slide Outline via OpenAI
         try:
-            completion = openai_client.chat.completions.create(
-                model=os.getenv("OPENAI_MODEL", "gpt-4o"),
+            publish_status(task_id, TaskState.working, "Drafting slide outline...")
+            completion = await chat_completion(
+                agent="presentation",
                 messages=[
                     {"role": "system", "content": "You are a presentation designer. Create a 5-slide outline based on the provided content. Output JSON with 'slides': [{'title': '...', 'bullets': [...]}]"},
-                    {"role": "user", "content": f"Create slides for:\n{request.message.content}"}
+                    {"role": "user", "content": f"Create slides for:\n{content_to_present}"}
                 ],
                 temperature=0.0
             )
             content = completion.choices[0].message.content.strip()
             
             try:
-                data = json.loads(content.replace("```json", "").replace("```", ""))
+                with stage_timer("parse"):
+                    data = json.loads(content.replace("```json", "").replace("```", ""))
                 slides_preview = data
             except json.JSONDecodeError:
                 slides_preview = {"raw": content}
@@ -119,33 +139,35 @@ def message(request: MessageRequest) -> MessageResponse:
             slides_url = "https://gamma.app/placeholder-outline"
             artifacts = [{"gammaUrl": slides_url, "slideOutline": slides_preview}]
                 
+        except CircuitOpenError:
+            raise
         except Exception as e:
+            if not profile.mock_fallbacks:
+                raise
             slides_preview = {"error": str(e)}
             artifacts = [{"error": str(e)}]
 
-    TASKS[task_id] = ResubscribeResponse(
-        task_id=task_id,
-        state=TaskState.completed,
-        last_event=TaskStatusUpdateEvent(task_id=task_id, state=TaskState.completed).model_dump(),
-        artifacts=artifacts,
-    )
     response_message = Message(role="assistant", content=f"Presentation ready: {slides_url}")
-    return MessageResponse(context_id=context_id, task_id=task_id, message=response_message)
+    return TaskResult(message=response_message, artifacts=artifacts, detail="Presentation ready.")
 
 
 @app.get("/message/stream")
-def stream_message(task_id: str):
-    events = [
-        TaskStatusUpdateEvent(task_id=task_id, state=TaskState.working, detail="Drafting slide outline...").model_dump(),
-        TaskStatusUpdateEvent(task_id=task_id, state=TaskState.working, detail="Designing layout...").model_dump(),
-        TaskArtifactUpdateEvent(task_id=task_id, artifact={"progress": "Finalizing deck..."}).model_dump(),
-        TaskStatusUpdateEvent(task_id=task_id, state=TaskState.completed).model_dump(),
-    ]
-    return EventSourceResponse(simple_event_stream(events, delay_s=0.8))
+async def stream_message(task_id: str, request: Request, last_event_id: Optional[str] = None):
+    return task_event_response(task_id, request, last_event_id, TASKS.get)
 
 
 @app.post("/tasks/resubscribe", response_model=ResubscribeResponse)
-def resubscribe(request: ResubscribeRequest):
+async def resubscribe(request: ResubscribeRequest):
+    return TASKS.get(
+        request.task_id,
+        ResubscribeResponse(task_id=request.task_id, state=TaskState.queued),
+    )
+
+
+@app.post("/tasks/cancel", response_model=ResubscribeResponse)
+async def cancel(request: CancelRequest):
+    # Answers with the final state once the job has stopped (or TASK_CANCEL_WAIT_S has passed)
+    await ENGINE.cancel_and_wait(request.task_id)
     return TASKS.get(
         request.task_id,
         ResubscribeResponse(task_id=request.task_id, state=TaskState.queued),
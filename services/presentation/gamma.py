@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Coroutine, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from services.common.metrics import Collected
+from services.common.schemas import TaskState
+from services.common.sse import publish_status
+
+PENDING_STATUSES = {"queued", "processing", "pending"}
+
+
+class GammaError(Exception):
+    pass
+
+
+@dataclass
+class Watch:
+    task_id: str
+    generation_id: str
+    api_key: str
+    future: asyncio.Future
+    deadline: float
+    interval: float
+    status: str = "queued"
+    polls: int = 0
+
+
+@dataclass
+class RateBudget:
+    """Paces Gamma requests to ``rate`` per second across all decks, without bursts."""
+
+    rate: float
+    tokens: float = 1.0
+    updated: float = field(default_factory=time.monotonic)
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self.tokens = min(1.0, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class GammaPoller:
+    """One scheduler polling every outstanding Gamma generation.
+
+    Each generation is polled with exponential backoff plus jitter, reset to
+    the initial interval whenever its status changes, and abandoned after
+    ``max_wait_s``. All polls share one pooled HTTP client and one
+    requests-per-second budget, so concurrent decks add no threads and a
+    bounded amount of traffic.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        initial_s: float = 2.0,
+        max_interval_s: float = 15.0,
+        factor: float = 1.5,
+        rps: float = 5.0,
+        max_wait_s: float = 600.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.initial_s = initial_s
+        self.max_interval_s = max_interval_s
+        self.factor = factor
+        self.max_wait_s = max_wait_s
+        self.budget = RateBudget(rps)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._watches: Dict[str, Watch] = {}
+        self._due: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._wake: Optional[asyncio.Event] = None
+        self._scheduler: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Strong references to in-flight polls; the loop itself only keeps weak ones
+        self._tasks: Set[asyncio.Task] = set()
+        self.polls = 0
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._scheduler is None or self._loop is not loop or self._scheduler.done():
+            if self._client is not None:
+                # Release the old client's connections on the loop that opened them.
+                # A closed loop has already dropped them.
+                if self._loop is loop:
+                    self._spawn(self._client.aclose())
+                elif self._loop is not None and not self._loop.is_closed():
+                    asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop)
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                timeout=30.0, limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+            )
+            self._wake = asyncio.Event()
+            self._scheduler = loop.create_task(self._run(), name="gamma-poller")
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        self._ensure_running()
+        assert self._client is not None
+        return self._client
+
+    async def submit(self, api_key: str, payload: Dict[str, Any]) -> str:
+        await self.budget.acquire()
+        resp = await self.client.post(f"{self.base_url}/generations", json=payload, headers=_headers(api_key))
+        resp.raise_for_status()
+        return resp.json()["generationId"]
+
+    async def wait(self, task_id: str, api_key: str, generation_id: str) -> Dict[str, Any]:
+        """Resolve with the generation's final payload once it leaves the pending states."""
+        self._ensure_running()
+        now = time.monotonic()
+        watch = Watch(
+            task_id=task_id,
+            generation_id=generation_id,
+            api_key=api_key,
+            future=asyncio.get_running_loop().create_future(),
+            deadline=now + self.max_wait_s,
+            interval=self.initial_s,
+        )
+        self._watches[generation_id] = watch
+        self._schedule(watch, now + self._jitter(watch.interval))
+        try:
+            return await watch.future
+        finally:
+            # Also reached when the task is canceled; the scheduler skips unknown ids
+            self._watches.pop(generation_id, None)
+
+    def _spawn(self, work: Coroutine[Any, Any, None]) -> None:
+        task = asyncio.get_running_loop().create_task(work)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _jitter(self, interval: float) -> float:
+        return interval * random.uniform(0.8, 1.2)
+
+    def _schedule(self, watch: Watch, at: float) -> None:
+        heapq.heappush(self._due, (at, next(self._seq), watch.generation_id))
+        assert self._wake is not None
+        self._wake.set()
+
+    async def _run(self) -> None:
+        assert self._wake is not None
+        while True:
+            self._wake.clear()
+            if not self._due:
+                await self._wake.wait()
+                continue
+            at, _, generation_id = self._due[0]
+            delay = at - time.monotonic()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self._due)
+            watch = self._watches.get(generation_id)
+            if watch is None or watch.future.done():
+                continue
+            await self.budget.acquire()
+            self._spawn(self._poll(watch))
+
+    async def _poll(self, watch: Watch) -> None:
+        try:
+            await self._poll_once(watch)
+        except Exception as e:
+            if not watch.future.done():
+                watch.future.set_exception(e)
+
+    async def _poll_once(self, watch: Watch) -> None:
+        now = time.monotonic()
+        if now >= watch.deadline:
+            watch.future.set_exception(GammaError(f"Gamma generation {watch.generation_id} timed out"))
+            return
+        self.polls += 1
+        watch.polls += 1
+        retry_after: Optional[float] = None
+        try:
+            resp = await self.client.get(
+                f"{self.base_url}/generations/{watch.generation_id}",
+                headers=_headers(watch.api_key),
+            )
+        except httpx.HTTPError as e:
+            print(f"Gamma poll error for {watch.generation_id}: {e}")
+            resp = None
+
+        if watch.future.done():
+            return
+        if resp is not None and resp.status_code == 200:
+            data = resp.json()
+            status = data.get("status", "pending")
+            if status != watch.status:
+                watch.status = status
+                watch.interval = self.initial_s
+                publish_status(watch.task_id, TaskState.working, f"Gamma generation {status}")
+            else:
+                watch.interval = min(self.max_interval_s, watch.interval * self.factor)
+            if status not in PENDING_STATUSES:
+                watch.future.set_result(data)
+                return
+        elif resp is not None and resp.status_code != 429 and resp.status_code < 500:
+            watch.future.set_exception(GammaError(f"Gamma returned {resp.status_code} for {watch.generation_id}"))
+            return
+        else:
+            # Rate limited or transient failure: back off, honouring Retry-After
+            if resp is not None and resp.headers.get("Retry-After", "").isdigit():
+                retry_after = float(resp.headers["Retry-After"])
+            watch.interval = min(self.max_interval_s, watch.interval * self.factor)
+
+        delay = max(retry_after or 0.0, self._jitter(watch.interval))
+        self._schedule(watch, min(time.monotonic() + delay, watch.deadline))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"outstanding": len(self._watches), "polls": self.polls}
+
+    async def close(self) -> None:
+        if self._scheduler is not None:
+            self._scheduler.cancel()
+            self._scheduler = None
+        pending = list(self._tasks)
+        for task in pending:
+            task.cancel()
+        if pending and self._loop is asyncio.get_running_loop():
+            await asyncio.wait(pending)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def _headers(api_key: str) -> Dict[str, str]:
+    return {"X-API-KEY": api_key, "Content-Type": "application/json"}
+
+
+POLLER = GammaPoller(
+    os.getenv("GAMMA_API_URL", "https://public-api.gamma.app/v1.0"),
+    initial_s=float(os.getenv("GAMMA_POLL_INITIAL_S", "2.0")),
+    max_interval_s=float(os.getenv("GAMMA_POLL_MAX_S", "15")),
+    factor=float(os.getenv("GAMMA_POLL_FACTOR", "1.5")),
+    rps=float(os.getenv("GAMMA_POLL_RPS", "5")),
+    max_wait_s=float(os.getenv("GAMMA_MAX_WAIT_S", "600")),
+)
+
+Collected("a2a_gamma_outstanding", "Gamma generations being polled", lambda: [({}, POLLER.stats()["outstanding"])])
+Collected("a2a_gamma_polls_total", "Gamma status polls sent", lambda: [({}, POLLER.polls)], kind="counter")
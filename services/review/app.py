@@ -1,36 +1,39 @@
 from __future__ import annotations
-import asyncio
-import time
-import uuid
+
 import json
-import os
-from typing import Dict, List
+from typing import Optional
 
-from fastapi import FastAPI
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from sse_starlette.sse import EventSourceResponse
 
+from services.common.artifacts import message_text, router as artifacts_router
+from services.common.breaker import CircuitOpenError
+from services.common.cache import CACHE_BYPASS, cache_key, cache_mode, cached_result, store_result
+from services.common.coalesce import SingleFlight, single_flight
+from services.common.encoding import JSON_RESPONSE
+from services.common.journal import router as journal_router
+from services.common.jsonstream import publish_json_fields, stream_json_artifacts
+from services.common.llm import check_llm_circuit, model_label, stream_chat_completion
+from services.common.metrics import FALLBACKS, stage_timer
+from services.common.profile import DEMO, PROFILES, Profile, pace, profile_for
 from services.common.schemas import (
+    CancelRequest,
     Message,
     MessageRequest,
     MessageResponse,
     ResubscribeRequest,
     ResubscribeResponse,
-    TaskArtifactUpdateEvent,
     TaskState,
-    TaskStatusUpdateEvent,
 )
-from services.common.sse import simple_event_stream
-
-from fastapi.middleware.cors import CORSMiddleware
-
-from openai import OpenAI
-from dotenv import load_dotenv
+from services.common.sse import publish_status, task_event_response
+from services.common.taskstore import TaskStore
+from services.common.tasks import TaskEngine, TaskResult, dispatch
 
 load_dotenv()
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-app = FastAPI(title="A2A Review Agent")
+app = FastAPI(title="A2A Review Agent", default_response_class=JSON_RESPONSE)
 
 app.add_middleware(
     CORSMiddleware,
@@ -40,58 +43,108 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# State storage for streaming updates
-# mapping: task_id -> {"state": TaskState, "detail": str, "timestamp": float}
-TASK_UPDATES: Dict[str, dict] = {}
-
 # State storage for resubscribe endpoint
-TASKS: Dict[str, ResubscribeResponse] = {}
+TASKS = TaskStore("review")
+
+ENGINE = TaskEngine("review", TASKS)
+
+app.include_router(artifacts_router)
+app.include_router(journal_router)
+
+FLIGHTS = SingleFlight("review")
+
+SYSTEM_PROMPT = "You are a medical content reviewer. Review the provided research summary for patient-friendliness, clarity, and safety. \n\nOutput a valid JSON object with:\n- revisedSummary: A clearer version of the summary.\n- warnings: List of potential safety issues or missing citations.\n- patientFriendlyScore: A score from 1-5.\n\nDo not use markdown formatting for the JSON."
+TEMPERATURE = 0.0
+STREAMED_FIELDS = ("revisedSummary",)
+
 
 @app.post("/message", response_model=MessageResponse)
-def message(request: MessageRequest) -> MessageResponse:
-    task_id = request.task_id or str(uuid.uuid4())
-    context_id = request.context_id or str(uuid.uuid4())
-    
-    # helper to update state
-    def update_state(state: TaskState, detail: str):
-        TASK_UPDATES[task_id] = {
-            "state": state,
-            "detail": detail,
-            "timestamp": time.time()
-        }
-    
-    update_state(TaskState.working, "Initializing medical reviewer...")
+async def message(request: MessageRequest) -> MessageResponse:
+    # The research output usually arrives by reference
+    content_to_review = await message_text(request.message)
+
+    async def job(task_id: str) -> TaskResult:
+        return await run_review(task_id, content_to_review, cache_mode(request.metadata), profile_for(request.metadata))
+
+    return await dispatch(ENGINE, request, job)
+
+
+async def run_review(
+    task_id: str, content_to_review: str, cache: Optional[str] = None, profile: Profile = PROFILES[DEMO]
+) -> TaskResult:
+    key = cache_key("review", model_label("review"), SYSTEM_PROMPT, content_to_review, temperature=TEMPERATURE)
+    cached = await cached_result(key, cache)
+    if cached is not None:
+        publish_json_fields(task_id, cached["artifacts"][0], STREAMED_FIELDS)
+        return TaskResult(
+            message=Message(role="assistant", content=cached["content"]),
+            artifacts=cached["artifacts"],
+            detail="Review approved and finalized (cached).",
+        )
+
+    return await single_flight(
+        FLIGHTS,
+        f"{key}:{profile.name}",
+        task_id,
+        lambda run_id: review(run_id, content_to_review, key, cache, profile),
+        enabled=cache != CACHE_BYPASS,
+    )
+
+
+async def review(
+    task_id: str, content_to_review: str, key: str, cache: Optional[str], profile: Profile
+) -> TaskResult:
+    # Cached results are still served above; only new work fails fast
+    check_llm_circuit("review")
+    if profile.scripted_events:
+        publish_status(task_id, TaskState.working, "Initializing medical reviewer...")
     
     # Real OpenAI Review
     try:
-        update_state(TaskState.working, "Evaluating content safety...")
+        if profile.scripted_events:
+            publish_status(task_id, TaskState.working, "Evaluating content safety...")
+        else:
+            publish_status(task_id, TaskState.working, f"Calling {model_label('review')}...")
         
-        completion = openai_client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL", "gpt-4o"),
-            messages=[
-                {"role": "system", "content": "You are a medical content reviewer. Review the provided research summary for patient-friendliness, clarity, and safety. \n\nOutput a valid JSON object with:\n- revisedSummary: A clearer version of the summary.\n- warnings: List of potential safety issues or missing citations.\n- patientFriendlyScore: A score from 1-5.\n\nDo not use markdown formatting for the JSON."},
-                {"role": "user", "content": f"Review this content:\n{request.message.content}"}
-            ],
-            temperature=0.0
+        content = await stream_json_artifacts(
+            task_id,
+            stream_chat_completion(
+                agent="review",
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": f"Review this content:\n{content_to_review}"}
+                ],
+                temperature=TEMPERATURE
+            ),
+            fields=STREAMED_FIELDS,
         )
-        content = completion.choices[0].message.content.strip()
+        content = content.strip()
         
-        update_state(TaskState.working, "Checking citations and compliance...")
-        time.sleep(1) # Visual pacing for fast LLMs
+        if profile.scripted_events:
+            publish_status(task_id, TaskState.working, "Checking citations and compliance...")
+        await pace(profile)
         
         # Best effort parsing
         try:
-            data = json.loads(content)
+            with stage_timer("parse"):
+                data = json.loads(content)
             revised_text = data.get("revisedSummary", "No revision provided.")
             artifacts = [data]
+            await store_result(key, {"content": content, "artifacts": artifacts}, cache)
         except json.JSONDecodeError:
             revised_text = content
             artifacts = [{"raw": content}]
 
+    except CircuitOpenError:
+        # The provider is known to be down: fail now rather than dress it up as content
+        raise
     except Exception as e:
+        if not profile.mock_fallbacks:
+            raise
+        FALLBACKS.inc(agent="review", error=type(e).__name__)
         print(f"Error calling OpenAI: {e}")
         
-        update_state(TaskState.failed, f"Error: {str(e)}")
+        publish_status(task_id, TaskState.working, f"Error: {str(e)}. Falling back to placeholder content.")
         
         # FALLBACK: Return mock review
         revised_text = f"**[MOCK] Review Fallback**\n\nThe review service is unavailable. The passed content appears generally safe but lacks specific citations. (Error: {str(e)})"
@@ -105,44 +158,27 @@ def message(request: MessageRequest) -> MessageResponse:
         # FIX: Define content variable
         content = revised_text
 
-    update_state(TaskState.completed, "Review approved and finalized.")
-
-    TASKS[task_id] = ResubscribeResponse(
-        task_id=task_id,
-        state=TaskState.completed,
-        last_event=TaskStatusUpdateEvent(task_id=task_id, state=TaskState.completed).model_dump(),
-        artifacts=artifacts,
-    )
     response_message = Message(role="assistant", content=content)
-    return MessageResponse(context_id=context_id, task_id=task_id, message=response_message)
+    return TaskResult(message=response_message, artifacts=artifacts, detail="Review approved and finalized.")
 
 
 @app.get("/message/stream")
-async def stream_message(task_id: str):
-    async def event_generator():
-        last_timestamp = 0
-        # Poll for 60 seconds max
-        for _ in range(120): 
-            if task_id in TASK_UPDATES:
-                update = TASK_UPDATES[task_id]
-                if update["timestamp"] > last_timestamp:
-                    last_timestamp = update["timestamp"]
-                    yield TaskStatusUpdateEvent(
-                        task_id=task_id, 
-                        state=update["state"], 
-                        detail=update["detail"]
-                    ).model_dump_json()
-                    
-                    if update["state"] in [TaskState.completed, TaskState.failed]:
-                        break
-            
-            await asyncio.sleep(0.5)
-
-    return EventSourceResponse(event_generator())
+async def stream_message(task_id: str, request: Request, last_event_id: Optional[str] = None):
+    return task_event_response(task_id, request, last_event_id, TASKS.get)
 
 
 @app.post("/tasks/resubscribe", response_model=ResubscribeResponse)
-def resubscribe(request: ResubscribeRequest):
+async def resubscribe(request: ResubscribeRequest):
+    return TASKS.get(
+        request.task_id,
+        ResubscribeResponse(task_id=request.task_id, state=TaskState.queued),
+    )
+
+
+@app.post("/tasks/cancel", response_model=ResubscribeResponse)
+async def cancel(request: CancelRequest):
+    # Answers with the final state once the job has stopped (or TASK_CANCEL_WAIT_S has passed)
+    await ENGINE.cancel_and_wait(request.task_id)
     return TASKS.get(
         request.task_id,
         ResubscribeResponse(task_id=request.task_id, state=TaskState.queued),
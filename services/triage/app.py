@@ -1,29 +1,38 @@
 from __future__ import annotations
 
-import uuid
-from typing import Dict
-
-from fastapi import FastAPI
+import asyncio
 import json
+import time
+import uuid
+from typing import Optional
 
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from sse_starlette.sse import EventSourceResponse
 
+from services.common.artifacts import message_text
+from services.common.encoding import JSON_RESPONSE
+from services.common.journal import JOURNAL, router as journal_router
+from services.common.llm import chat_completion
+from services.common.metrics import CURRENT_TRACE, TASKS_FINISHED, Trace, observe_stage
 from services.common.schemas import (
     Message,
     MessageRequest,
     MessageResponse,
     ResubscribeRequest,
     ResubscribeResponse,
-    TaskArtifactUpdateEvent,
     TaskState,
     TaskStatusUpdateEvent,
 )
-from services.common.sse import simple_event_stream
+from services.common.sse import BUS, publish_status, task_event_response
+from services.common.taskstore import TaskStore
+from services.triage import classifier
+from services.triage.routing import ROUTES, ROUTING_CACHE, normalize
 
-from fastapi.middleware.cors import CORSMiddleware
+load_dotenv()
 
-app = FastAPI(title="A2A Triage Agent")
+app = FastAPI(title="A2A Triage Agent", default_response_class=JSON_RESPONSE)
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,68 +42,124 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-TASKS: Dict[str, ResubscribeResponse] = {}
-
+TASKS = TaskStore("triage")
 
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
-
-load_dotenv()
+app.include_router(journal_router)
 
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-@app.post("/message", response_model=MessageResponse)
-def message(request: MessageRequest) -> MessageResponse:
-    task_id = request.task_id or str(uuid.uuid4())
-    context_id = request.context_id or str(uuid.uuid4())
-    
+async def llm_route(content: str) -> Optional[str]:
+    """Ask the LLM for a route; ``None`` if the call failed."""
     # Real OpenAI Routing
     try:
-        completion = openai_client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL", "gpt-4o"),
+        completion = await chat_completion(
+            agent="triage",
             messages=[
                 {"role": "system", "content": "You are a triage agent for a healthcare research system. Your job is to route user requests.\n\nRoutes:\n- 'medical_research': Use this for ANY request about a medical topic, disease, treatment, or health condition. This includes requests like 'create a presentation about X' or 'explain Y' - these STILL need research first.\n- 'presentation': Use this ONLY if the user provides COMPLETE, ready-to-use content and just wants it formatted as slides. This is rare.\n\nWhen in doubt, choose 'medical_research'.\n\nOutput ONLY the route name: 'medical_research' or 'presentation'."},
-                {"role": "user", "content": request.message.content}
+                {"role": "user", "content": content}
             ],
             temperature=0.0
         )
         route = completion.choices[0].message.content.strip()
-        if route not in ["medical_research", "presentation"]:
+        if route not in ROUTES:
             route = "medical_research" # Default fallback
-            
+        return route
     except Exception as e:
         print(f"Error calling OpenAI: {e}")
-        route = "medical_research"
+        return None
+
 
+@app.post("/message", response_model=MessageResponse)
+async def message(request: MessageRequest) -> MessageResponse:
+    task_id = request.task_id or str(uuid.uuid4())
+    context_id = request.context_id or str(uuid.uuid4())
+    prompt = await message_text(request.message)
+    BUS.bind(task_id, context_id, "triage")
+    
+    publish_status(task_id, TaskState.working, "Analyzing intent...")
+
+    trace_token = CURRENT_TRACE.set(Trace(context_id=context_id, task_id=task_id, agent="triage"))
+    try:
+        started = time.perf_counter()
+        normalized = normalize(prompt)
+        # Cheapest first: rules and exact matches, the classifier, then the similarity search
+        cached = ROUTING_CACHE.lookup(normalized)
+        model = classifier.CLASSIFIER
+        prediction = model.predict(normalized) if cached is None and model is not None else None
+        if cached is None and prediction is None:
+            cached = ROUTING_CACHE.similar(normalized)
+        if cached is not None:
+            route, source = cached
+        elif prediction is not None:
+            route, source = prediction[0], "classifier"
+        else:
+            route, source = await llm_route(prompt), "llm"
+            if route is not None:
+                ROUTING_CACHE.store(normalized, route)
+                # Labelled data for services/triage/train_classifier.py
+                await asyncio.to_thread(classifier.log_decision, normalized, route, source)
+            else:
+                # The LLM errored or its circuit is open; not a decision, so say so
+                route, source = "medical_research", "default"
+        observe_stage("route", time.perf_counter() - started, source=source)
+    finally:
+        CURRENT_TRACE.reset(trace_token)
+    TASKS_FINISHED.inc(agent="triage", state=TaskState.completed.value)
+
+    response_message = Message(role="assistant", content=f"Routed to {route} agent")
     TASKS[task_id] = ResubscribeResponse(
         task_id=task_id,
         state=TaskState.completed,
         last_event=TaskStatusUpdateEvent(task_id=task_id, state=TaskState.completed).model_dump(),
         artifacts=[{"route": route}],
+        message=response_message,
+    )
+    publish_status(task_id, TaskState.completed, f"Routed to {route}", [{"route": route}], response_message)
+    # The prompt is journaled with the route so a pipeline can be resumed from its context_id alone
+    JOURNAL.record(
+        context_id,
+        "triage",
+        task_id,
+        TaskState.completed.value,
+        response_message,
+        [{"route": route}],
+        metadata={"route": route, "route_source": source},
+        input=prompt,
+    )
+    # Route inline so callers don't need a /tasks/resubscribe round trip
+    return MessageResponse(
+        context_id=context_id,
+        task_id=task_id,
+        message=response_message,
+        metadata={"route": route, "route_source": source},
     )
-    response_message = Message(role="assistant", content=f"Routed to {route} agent")
-    return MessageResponse(context_id=context_id, task_id=task_id, message=response_message)
 
 
 @app.get("/message/stream")
-def stream_message(task_id: str):
-    events = [
-        TaskStatusUpdateEvent(task_id=task_id, state=TaskState.working, detail="Analyzing intent...").model_dump(),
-        TaskStatusUpdateEvent(task_id=task_id, state=TaskState.working, detail="Routing request...").model_dump(),
-        TaskStatusUpdateEvent(task_id=task_id, state=TaskState.completed).model_dump(),
-    ]
-    return EventSourceResponse(simple_event_stream(events, delay_s=0.5))
+async def stream_message(task_id: str, request: Request, last_event_id: Optional[str] = None):
+    return task_event_response(task_id, request, last_event_id, TASKS.get)
 
 
 @app.post("/tasks/resubscribe", response_model=ResubscribeResponse)
-def resubscribe(request: ResubscribeRequest):
+async def resubscribe(request: ResubscribeRequest):
     return TASKS.get(
         request.task_id,
         ResubscribeResponse(task_id=request.task_id, state=TaskState.queued),
     )
 
 
+@app.get("/routing/stats")
+def routing_stats():
+    model = classifier.CLASSIFIER
+    return {**ROUTING_CACHE.stats(), "classifier": model.stats() if model is not None else None}
+
+
+@app.post("/routing/classifier/reload")
+def reload_classifier():
+    """Pick up a model freshly written by services/triage/train_classifier.py."""
+    model = classifier.reload_classifier()
+    return {"loaded": model is not None, "classifier": model.stats() if model is not None else None}
+
+
 @app.get("/.well-known/agent-card.json")
 def agent_card():
     with open("services/triage/.well-known/agent-card.json", "r", encoding="utf-8") as handle:
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import time
+import zlib
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from services.common.metrics import Collected
+from services.triage.routing import ROUTES
+
+try:  # NumPy is optional; scoring falls back to a sparse dot product
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+# Label 1 is "presentation", 0 is "medical_research"
+POSITIVE = ROUTES[1]
+NEGATIVE = ROUTES[0]
+
+DEFAULT_DIM = 2 ** 18
+
+Features = Tuple[List[int], List[float]]
+
+
+@lru_cache(maxsize=65536)
+def _hash(gram: str) -> int:
+    # crc32 is stable across processes, unlike hash()
+    return zlib.crc32(gram.encode("utf-8"))
+
+
+def featurize(normalized: str, dim: int) -> Features:
+    """Hash the routing n-grams into ``dim`` buckets (signed), L2-normalized.
+
+    Same grams as routing._ngrams (char trigrams plus ``w:`` word tokens),
+    built inline because this runs on every triage request.
+    """
+    buckets: Dict[int, float] = {}
+    get = buckets.get
+    padded = f" {normalized} "
+    grams = [padded[i : i + 3] for i in range(max(1, len(padded) - 2))]
+    grams.extend("w:" + word for word in normalized.split())
+    for gram in grams:
+        h = _hash(gram)
+        index = h % dim
+        buckets[index] = get(index, 0.0) + (1.0 if h & 0x80000000 else -1.0)
+    norm = math.sqrt(sum(v * v for v in buckets.values())) or 1.0
+    return list(buckets), [v / norm for v in buckets.values()]
+
+
+class HashedClassifier:
+    """Logistic regression over hashed character/word n-grams.
+
+    Scores in microseconds in-process. ``predict`` returns a route only when
+    the model's confidence reaches ``threshold``; otherwise triage asks the LLM.
+    """
+
+    def __init__(self, weights: Dict[int, float], bias: float, dim: int = DEFAULT_DIM, threshold: float = 0.9):
+        self.dim = dim
+        self.bias = bias
+        self.threshold = threshold
+        self.sparse = weights
+        self.metadata: Dict[str, object] = {}
+        self.dense = None
+        if np is not None:
+            self.dense = np.zeros(dim, dtype=np.float32)
+            if weights:
+                self.dense[np.fromiter(weights.keys(), dtype=np.int64)] = np.fromiter(weights.values(), dtype=np.float32)
+        self.counters = {"answered": 0, "escalated": 0}
+
+    def probability(self, normalized: str) -> float:
+        """P(presentation) for a normalized prompt."""
+        indices, values = featurize(normalized, self.dim)
+        if self.dense is not None:
+            z = float(self.dense[indices] @ np.asarray(values, dtype=np.float32))
+        else:
+            z = sum(self.sparse.get(i, 0.0) * v for i, v in zip(indices, values))
+        return 1.0 / (1.0 + math.exp(-(z + self.bias)))
+
+    def probabilities(self, prompts: Sequence[str]) -> List[float]:
+        """Score many prompts at once (vectorized when NumPy is available)."""
+        if self.dense is None or not prompts:
+            return [self.probability(p) for p in prompts]
+        rows, cols, vals = [], [], []
+        for row, prompt in enumerate(prompts):
+            indices, values = featurize(prompt, self.dim)
+            rows.extend([row] * len(indices))
+            cols.extend(indices)
+            vals.extend(values)
+        z = np.bincount(
+            np.asarray(rows), weights=self.dense[np.asarray(cols)] * np.asarray(vals), minlength=len(prompts)
+        )
+        return list(1.0 / (1.0 + np.exp(-(z + self.bias))))
+
+    def predict(self, normalized: str) -> Optional[Tuple[str, float]]:
+        """``(route, confidence)`` when confident enough, else ``None``."""
+        p = self.probability(normalized)
+        confidence = max(p, 1.0 - p)
+        if confidence < self.threshold:
+            self.counters["escalated"] += 1
+            return None
+        self.counters["answered"] += 1
+        return (POSITIVE if p >= 0.5 else NEGATIVE), confidence
+
+    def save(self, path: str, **metadata: object) -> None:
+        payload = {
+            "dim": self.dim,
+            "bias": self.bias,
+            # Sparse so the file stays small and loads without NumPy
+            "weights": {str(i): round(w, 6) for i, w in self.sparse.items() if abs(w) > 1e-6},
+            "metadata": metadata,
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, threshold: float = 0.9) -> "HashedClassifier":
+        with open(path, "r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+        weights = {int(i): float(w) for i, w in payload["weights"].items()}
+        model = cls(weights, float(payload["bias"]), int(payload["dim"]), threshold)
+        model.metadata = payload.get("metadata", {})
+        return model
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            **self.counters,
+            "threshold": self.threshold,
+            "features": len(self.sparse),
+            "numpy": self.dense is not None,
+            "trained": self.metadata.get("trained"),
+        }
+
+
+def train(
+    examples: Iterable[Tuple[str, str]],
+    dim: int = DEFAULT_DIM,
+    epochs: int = 10,
+    learning_rate: float = 0.5,
+    l2: float = 1e-5,
+) -> HashedClassifier:
+    """Fit on ``(normalized prompt, route)`` pairs with plain SGD on the log loss."""
+    data = [(featurize(prompt, dim), 1.0 if route == POSITIVE else 0.0) for prompt, route in examples]
+    weights: Dict[int, float] = {}
+    bias = 0.0
+    positives = sum(label for _, label in data)
+    # Weight the rare class up so "presentation" isn't drowned out
+    pos_weight = min(20.0, (len(data) - positives) / positives) if positives else 1.0
+    for epoch in range(epochs):
+        rate = learning_rate / (1 + epoch)
+        for (indices, values), label in data:
+            z = bias + sum(weights.get(i, 0.0) * v for i, v in zip(indices, values))
+            p = 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, z))))
+            gradient = (p - label) * (pos_weight if label else 1.0)
+            for i, v in zip(indices, values):
+                w = weights.get(i, 0.0)
+                weights[i] = w - rate * (gradient * v + l2 * w)
+            bias -= rate * gradient
+    return HashedClassifier(weights, bias, dim)
+
+
+CLASSIFIER_PATH = os.getenv("TRIAGE_CLASSIFIER_PATH", ".cache/triage_classifier.json")
+CLASSIFIER_THRESHOLD = float(os.getenv("TRIAGE_CLASSIFIER_THRESHOLD", "0.9"))
+DECISION_LOG = os.getenv("TRIAGE_DECISION_LOG", ".cache/triage_decisions.jsonl")
+
+
+def load_classifier() -> Optional[HashedClassifier]:
+    """The trained model at TRIAGE_CLASSIFIER_PATH, or ``None`` if disabled or untrained."""
+    if os.getenv("TRIAGE_CLASSIFIER", "1") == "0" or not os.path.exists(CLASSIFIER_PATH):
+        return None
+    try:
+        return HashedClassifier.load(CLASSIFIER_PATH, CLASSIFIER_THRESHOLD)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Triage classifier at {CLASSIFIER_PATH} not loaded: {e}")
+        return None
+
+
+CLASSIFIER = load_classifier()
+
+
+def reload_classifier() -> Optional[HashedClassifier]:
+    global CLASSIFIER
+    CLASSIFIER = load_classifier()
+    return CLASSIFIER
+
+
+def log_decision(normalized: str, route: str, source: str) -> None:
+    """Append an LLM routing decision as training data for the classifier."""
+    if not DECISION_LOG:
+        return
+    try:
+        os.makedirs(os.path.dirname(DECISION_LOG) or ".", exist_ok=True)
+        with open(DECISION_LOG, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps({"prompt": normalized, "route": route, "source": source, "ts": time.time()}) + "\n")
+    except OSError as e:
+        print(f"Triage decision log write failed: {e}")
+
+
+Collected(
+    "a2a_triage_classifier_total",
+    "Local classifier answers vs. escalations to the LLM",
+    lambda: [({"outcome": k}, v) for k, v in CLASSIFIER.counters.items()] if CLASSIFIER is not None else [],
+    kind="counter",
+)
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import math
+import os
+import re
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from services.common.metrics import Collected
+
+ROUTES = ("medical_research", "presentation")
+
+_PUNCT = re.compile(r"[^\w\s]")
+_SPACE = re.compile(r"\s+")
+
+# Asking for slides/formatting is the only thing that can send a prompt to the
+# presentation route, and only when it also carries the content to format.
+_FORMAT_HINTS = re.compile(
+    r"\b(slides?|slide deck|deck|format|formatted|turn (this|the following) into|convert (this|the following))\b"
+)
+RULE_MAX_RESEARCH_WORDS = int(os.getenv("TRIAGE_RULE_MAX_WORDS", "40"))
+RULE_MIN_CONTENT_WORDS = int(os.getenv("TRIAGE_RULE_MIN_CONTENT_WORDS", "200"))
+RULES_ENABLED = os.getenv("TRIAGE_RULES", "1") != "0"
+
+
+def normalize(prompt: str) -> str:
+    return _SPACE.sub(" ", _PUNCT.sub(" ", prompt.lower())).strip()
+
+
+def rule_route(normalized: str) -> Optional[str]:
+    """Route obvious prompts without the LLM; ``None`` when unsure."""
+    words = normalized.count(" ") + 1 if normalized else 0
+    asks_for_format = bool(_FORMAT_HINTS.search(normalized))
+    if words <= RULE_MAX_RESEARCH_WORDS and not asks_for_format:
+        # A short topic request cannot contain ready-to-use content
+        return "medical_research"
+    if words >= RULE_MIN_CONTENT_WORDS and asks_for_format:
+        return "presentation"
+    return None
+
+
+def _ngrams(normalized: str, n: int = 3) -> Counter:
+    padded = f" {normalized} "
+    grams = Counter(padded[i : i + n] for i in range(max(1, len(padded) - n + 1)))
+    # Word tokens make the vector robust to reordering ("diabetes slides" vs "slides on diabetes")
+    grams.update(f"w:{word}" for word in normalized.split())
+    return grams
+
+
+class RoutingCache:
+    """Exact LRU of normalized prompts plus an n-gram cosine similarity index.
+
+    Entries expire after ``ttl_s``; the least recently used entry is evicted
+    once ``max_size`` is reached. A ``threshold`` of 0 disables similarity
+    lookups and leaves only exact matches.
+
+    A similarity lookup reads the postings of the prompt's rarest n-grams, at
+    most ``scan_budget`` of them, and scores only the ``max_candidates``
+    entries sharing the most of those grams. Grams most prompts contain
+    (" th", "w:the") are never scanned, so a lookup costs about the same
+    however full the cache is.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 4096,
+        ttl_s: float = 3600.0,
+        threshold: float = 0.85,
+        scan_budget: int = 2048,
+        max_candidates: int = 32,
+    ):
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self.threshold = threshold
+        self.scan_budget = scan_budget
+        self.max_candidates = max_candidates
+        # normalized prompt -> (route, expires_at, vector, norm)
+        self._entries: "OrderedDict[str, Tuple[str, float, Counter, float]]" = OrderedDict()
+        self._postings: Dict[str, Set[str]] = {}
+        self.counters = {"exact_hits": 0, "similar_hits": 0, "rule_hits": 0, "misses": 0}
+
+    def lookup(self, normalized: str) -> Optional[Tuple[str, str]]:
+        """Return ``(route, source)`` from the rules or an exact match, counting hits.
+
+        The cheap checks; callers try their classifier next and ``similar``
+        last.
+        """
+        route = rule_route(normalized) if RULES_ENABLED else None
+        if route is not None:
+            self.counters["rule_hits"] += 1
+            return route, "rule"
+
+        entry = self._entries.get(normalized)
+        if entry is not None:
+            if entry[1] > time.monotonic():
+                self._entries.move_to_end(normalized)
+                self.counters["exact_hits"] += 1
+                return entry[0], "exact"
+            self._remove(normalized)
+        return None
+
+    def similar(self, normalized: str) -> Optional[Tuple[str, str]]:
+        """Return ``(route, "similar")`` from the similarity index, or ``None`` (a miss)."""
+        if self.threshold > 0:
+            match = self._most_similar(normalized, time.monotonic())
+            if match is not None:
+                self.counters["similar_hits"] += 1
+                return match, "similar"
+
+        self.counters["misses"] += 1
+        return None
+
+    def store(self, normalized: str, route: str) -> None:
+        if normalized in self._entries:
+            self._remove(normalized)
+        vector = _ngrams(normalized)
+        norm = math.sqrt(sum(v * v for v in vector.values()))
+        self._entries[normalized] = (route, time.monotonic() + self.ttl_s, vector, norm)
+        for gram in vector:
+            self._postings.setdefault(gram, set()).add(normalized)
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+    def _most_similar(self, normalized: str, now: float) -> Optional[str]:
+        vector = _ngrams(normalized)
+        norm = math.sqrt(sum(v * v for v in vector.values()))
+        if not norm:
+            return None
+        # A prompt similar enough to match shares most of this one's grams, so also its rarest ones
+        rarest = sorted((gram for gram in vector if gram in self._postings), key=lambda gram: len(self._postings[gram]))
+        shared: Counter = Counter()
+        scanned = 0
+        for gram in rarest:
+            keys = self._postings[gram]
+            if scanned and scanned + len(keys) > self.scan_budget:
+                break
+            shared.update(keys)
+            scanned += len(keys)
+
+        best_key, best_score = None, self.threshold
+        expired = []
+        for key, _ in shared.most_common(self.max_candidates):
+            route, expires_at, other, other_norm = self._entries[key]
+            if expires_at <= now:
+                expired.append(key)
+                continue
+            dot = sum(weight * other[gram] for gram, weight in vector.items() if gram in other)
+            score = dot / (norm * other_norm)
+            if score >= best_score:
+                best_key, best_score = key, score
+        for key in expired:
+            self._remove(key)
+        if best_key is None:
+            return None
+        self._entries.move_to_end(best_key)
+        return self._entries[best_key][0]
+
+    def _remove(self, normalized: str) -> None:
+        entry = self._entries.pop(normalized, None)
+        if entry is None:
+            return
+        for gram in entry[2]:
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(normalized)
+                if not keys:
+                    del self._postings[gram]
+
+    def stats(self) -> Dict[str, float]:
+        hits = self.counters["exact_hits"] + self.counters["similar_hits"] + self.counters["rule_hits"]
+        total = hits + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "hit_rate": round(hits / total, 3) if total else 0.0,
+        }
+
+
+ROUTING_CACHE = RoutingCache(
+    max_size=int(os.getenv("TRIAGE_CACHE_SIZE", "4096")),
+    ttl_s=float(os.getenv("TRIAGE_CACHE_TTL_S", "3600")),
+    threshold=float(os.getenv("TRIAGE_SIMILARITY_THRESHOLD", "0.85")),
+    scan_budget=int(os.getenv("TRIAGE_SIMILARITY_SCAN", "2048")),
+    max_candidates=int(os.getenv("TRIAGE_SIMILARITY_CANDIDATES", "32")),
+)
+
+Collected(
+    "a2a_triage_routing_total",
+    "Triage routing decisions by source",
+    lambda: [({"outcome": name}, value) for name, value in ROUTING_CACHE.counters.items()],
+    kind="counter",
+)
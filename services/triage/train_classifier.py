@@ -0,0 +1,82 @@
+"""
+Train or refresh the triage classifier from logged LLM routing decisions.
+
+Triage appends every LLM decision to TRIAGE_DECISION_LOG. This reads that
+log (latest label per prompt wins), holds out a share for evaluation, reports
+accuracy and how many prompts the model would answer at each confidence
+threshold, then fits on everything and writes TRIAGE_CLASSIFIER_PATH. The
+running service picks the new model up via POST /triage/routing/classifier/reload.
+
+    python -m services.triage.train_classifier
+    python -m services.triage.train_classifier --log decisions.jsonl --out model.json --epochs 15
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from services.triage.classifier import CLASSIFIER_PATH, DECISION_LOG, DEFAULT_DIM, POSITIVE, train
+from services.triage.routing import ROUTES, normalize
+
+
+def load_examples(path: str) -> List[Tuple[str, str]]:
+    latest: Dict[str, str] = {}
+    with open(path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            # Only decisions the LLM made are labels; classifier answers would train on themselves
+            if record.get("source", "llm") == "llm" and record.get("route") in ROUTES:
+                latest[normalize(record["prompt"])] = record["route"]
+    return list(latest.items())
+
+
+def evaluate(model, examples: List[Tuple[str, str]]) -> None:
+    probabilities = model.probabilities([prompt for prompt, _ in examples])
+    scored = [(max(p, 1 - p), (POSITIVE if p >= 0.5 else ROUTES[0]) == route) for p, (_, route) in zip(probabilities, examples)]
+    accuracy = sum(correct for _, correct in scored) / len(scored)
+    print(f"held-out accuracy: {accuracy:.3f} over {len(scored)} prompts")
+    print(f"{'threshold':>9} {'answered':>9} {'accuracy':>9}")
+    for threshold in (0.6, 0.7, 0.8, 0.9, 0.95, 0.99):
+        answered = [correct for confidence, correct in scored if confidence >= threshold]
+        share = len(answered) / len(scored)
+        precision = sum(answered) / len(answered) if answered else 0.0
+        print(f"{threshold:>9} {share:>9.1%} {precision:>9.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", default=DECISION_LOG)
+    parser.add_argument("--out", default=CLASSIFIER_PATH)
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM)
+    parser.add_argument("--holdout", type=float, default=0.2, help="share of prompts kept for evaluation")
+    parser.add_argument("--min-examples", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    examples = load_examples(args.log)
+    counts = {route: sum(1 for _, r in examples if r == route) for route in ROUTES}
+    print(f"{len(examples)} labelled prompts from {args.log}: {counts}")
+    if len(examples) < args.min_examples or min(counts.values()) == 0:
+        sys.exit(f"need at least {args.min_examples} prompts covering both routes")
+
+    random.Random(args.seed).shuffle(examples)
+    split = int(len(examples) * (1 - args.holdout))
+    if 0 < split < len(examples):
+        evaluate(train(examples[:split], args.dim, args.epochs), examples[split:])
+
+    started = time.perf_counter()
+    model = train(examples, args.dim, args.epochs)
+    model.save(args.out, trained=time.strftime("%Y-%m-%dT%H:%M:%S%z"), examples=len(examples), counts=counts)
+    print(f"trained on {len(examples)} prompts in {time.perf_counter() - started:.1f}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
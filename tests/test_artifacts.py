@@ -0,0 +1,40 @@
+import asyncio
+import threading
+
+from services.common.artifacts import ArtifactStore
+from services.common.cache import SQLiteStore
+
+
+def test_persist_waits_for_the_background_write_instead_of_writing_again(tmp_path) -> None:
+    disk = SQLiteStore(str(tmp_path / "artifacts.sqlite3"), 1024 * 1024)
+    writers = []
+    put = disk.put
+
+    def recording_put(key, value, ttl_s):
+        writers.append(threading.current_thread() is threading.main_thread())
+        put(key, value, ttl_s)
+
+    disk.put = recording_put
+    store = ArtifactStore(1024 * 1024, disk=disk)
+
+    async def main() -> None:
+        ref = store.put("x" * 4096)
+        assert await store.persist(ref.hash)
+        assert store.persisted(ref.hash)
+        # Already durable: nothing more is written
+        assert await store.persist(ref.hash)
+
+    asyncio.run(main())
+    # One write, made off the event loop's thread
+    assert writers == [False]
+
+
+def test_persist_without_a_disk_tier() -> None:
+    store = ArtifactStore(1024 * 1024)
+
+    async def main() -> None:
+        ref = store.put("x" * 4096)
+        assert not await store.persist(ref.hash)
+        assert not store.persisted(ref.hash)
+
+    asyncio.run(main())
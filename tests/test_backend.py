@@ -0,0 +1,55 @@
+import asyncio
+import os
+import threading
+
+from benchmarks.harness import free_port, serve, stub_env
+from benchmarks.multiworker_check import run_checks
+from services.common.backend import SQLiteBackend
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_writes_are_queued_and_readable_at_once(tmp_path) -> None:
+    path = str(tmp_path / "tasks.sqlite3")
+    writer = SQLiteBackend(path)
+    other_worker = SQLiteBackend(path)
+    try:
+        writer.save_task("research", "t1", b"queued", False, False)
+        writer.save_task("research", "t1", b"done", False, True)
+        # The saving process sees its latest save before it is committed
+        assert writer.load_task("research", "t1") == (b"done", False)
+
+        ids = []
+        stored = threading.Event()
+        for i in range(5):
+            writer.append_event("t1", {"i": i}, i == 4, ids.append)
+        writer.append_event("t1", {"i": 5}, False, lambda _: stored.set())
+        assert stored.wait(5)
+        assert ids == sorted(ids) and len(set(ids)) == 5
+
+        assert writer.flush(5)
+        assert other_worker.load_task("research", "t1") == (b"done", False)
+        assert [event["i"] for _, event in other_worker.read_events("t1", 0)] == list(range(6))
+        assert writer.stats()["pending_tasks"] == 0
+    finally:
+        writer.close()
+        other_worker.close()
+
+
+def test_two_workers_share_tasks_and_streams(tmp_path) -> None:
+    """Tasks submitted on one server are streamed, resumed and resubscribed on another."""
+    llm_port, first, second = free_port(), free_port(), free_port()
+    env = stub_env(
+        llm_port,
+        TASK_BACKEND="sqlite",
+        TASK_DB_PATH=str(tmp_path / "tasks.sqlite3"),
+        ARTIFACT_STORE_PATH=str(tmp_path / "artifacts.sqlite3"),
+        WORKFLOW_JOURNAL_PATH=str(tmp_path / "workflows.sqlite3"),
+        RESULT_CACHE="0",
+        STUB_LLM_LATENCY_MS="20",
+        STUB_LLM_TOKEN_MS="1",
+    )
+    with serve("benchmarks.stub_llm:app", llm_port, ROOT, env):
+        with serve("services.main:app", first, ROOT, env), serve("services.main:app", second, ROOT, env):
+            failures = asyncio.run(run_checks(f"http://127.0.0.1:{first}", f"http://127.0.0.1:{second}", 6, fresh=False))
+    assert failures == []
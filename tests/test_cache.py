@@ -0,0 +1,38 @@
+import time
+
+from services.common.cache import SQLiteStore
+
+
+def stored_bytes(store: SQLiteStore) -> int:
+    return store.stats()["bytes"]
+
+
+def test_running_total_tracks_inserts_replacements_and_eviction(tmp_path) -> None:
+    store = SQLiteStore(str(tmp_path / "cache.sqlite3"), 10_000)
+    for i in range(50):
+        store.put(f"k{i}", b"x" * 1000, 60)
+        assert store._bytes == stored_bytes(store) <= 10_000
+    # Least recently used go first
+    assert store.get("k0") is None and store.get("k49") is not None
+    store.put("k49", b"y" * 10, 60)
+    assert store._bytes == stored_bytes(store)
+
+
+def test_expired_rows_are_subtracted(tmp_path) -> None:
+    store = SQLiteStore(str(tmp_path / "cache.sqlite3"), 10_000)
+    store.put("short", b"x" * 500, 0.01)
+    store.put("long", b"x" * 500, 60)
+    time.sleep(0.02)
+    assert store.get("short") is None
+    store.put("other", b"x" * 500, 60)
+    assert store._bytes == stored_bytes(store) == 1000
+
+
+def test_recount_picks_up_writes_from_another_process(tmp_path) -> None:
+    path = str(tmp_path / "cache.sqlite3")
+    store = SQLiteStore(path, 10_000, recount_every=5)
+    other = SQLiteStore(path, 10_000)
+    other.put("theirs", b"x" * 3000, 60)
+    for i in range(5):
+        store.put(f"k{i}", b"x" * 100, 60)
+    assert store._bytes == stored_bytes(store) == 3500
@@ -0,0 +1,24 @@
+import json
+
+from services.common.encoding import JSON_RESPONSE, dumps, loads
+from services.common.jsonstream import IncrementalJSONParser
+from services.common.schemas import TaskState, status_event
+
+
+def test_lone_surrogates_round_trip() -> None:
+    # What IncrementalJSONParser (like json.loads) yields for an unpaired escape
+    parser = IncrementalJSONParser()
+    values = {key: payload for kind, key, payload in parser.feed(r'{"summary": "cut off \uD83D"}') if kind != "delta"}
+    value = {"artifact": values, "text": "ok \U0001F600"}
+    assert value == {"artifact": json.loads(r'{"summary": "cut off \uD83D"}'), "text": "ok \U0001F600"}
+    assert loads(dumps(value)) == value
+
+
+def test_valid_text_stays_utf8() -> None:
+    assert dumps({"text": "café \U0001F600"}) == '{"text":"café \U0001F600"}'.encode("utf-8")
+
+
+def test_responses_and_events_encode_lone_surrogates() -> None:
+    event = status_event("task", TaskState.completed, "lone \ud83d", [{"summary": "\ude00"}])
+    assert loads(dumps(event))["detail"] == "lone \ud83d"
+    assert json.loads(JSON_RESPONSE({"detail": "lone \ud83d"}).body) == {"detail": "lone \ud83d"}
@@ -0,0 +1,35 @@
+import asyncio
+import os
+
+from benchmarks.harness import free_port, serve
+from services.presentation.gamma import GammaPoller
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_poller_tracks_polls_and_closes_replaced_clients() -> None:
+    port = free_port()
+    env = dict(os.environ, FAKE_GAMMA_DURATION_S="0.3")
+    with serve("benchmarks.fake_gamma:app", port, ROOT, env):
+
+        async def main() -> None:
+            poller = GammaPoller(f"http://127.0.0.1:{port}", initial_s=0.05, max_interval_s=0.05)
+            generation_id = await poller.submit("key", {"inputText": "deck"})
+            assert (await poller.wait("task", "key", generation_id))["status"] == "completed"
+            assert poller.polls > 1
+            # Finished polls drop out of the set that keeps them alive
+            await asyncio.sleep(0.1)
+            assert not poller._tasks
+
+            # A scheduler that stopped is restarted with a new client; the old one is closed
+            old = poller.client
+            poller._scheduler.cancel()
+            await asyncio.sleep(0)
+            assert poller.client is not old
+            await asyncio.sleep(0.05)
+            assert old.is_closed
+
+            await poller.close()
+            assert poller._client is None
+
+        asyncio.run(main())
@@ -0,0 +1,20 @@
+from services.common.journal import WorkflowJournal
+from services.common.schemas import Message
+
+
+def test_records_are_written_in_order(tmp_path) -> None:
+    for path in (str(tmp_path / "workflows.sqlite3"), ""):
+        journal = WorkflowJournal(path)
+        try:
+            journal.record("ctx", "research", "t1", "queued", input="asthma")
+            journal.record("ctx", "research", "t1", "completed", Message(role="assistant", content="summary"), [{"a": 1}])
+            # A retried submission that didn't complete can't replace the result
+            journal.record("ctx", "research", "t2", "queued")
+            stage = journal.stages("ctx")["research"]
+            assert (stage["task_id"], stage["state"]) == ("t1", "completed")
+            assert stage["message"]["content"] == "summary"
+            assert stage["artifacts"] == [{"a": 1}]
+            assert stage["input"] == "asthma"
+            assert journal.stats()["writes"] == 3
+        finally:
+            journal.close()
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from services.common.jsonstream import IncrementalJSONParser
+
+DOCUMENTS = [
+    r'{"summary": "plain text", "score": 7}',
+    r'{"summary": "line\nbreak \"quoted\" back\\slash \/ tab\t", "ok": true}',
+    r'{"summary": "café — done"}',
+    # A surrogate pair: one astral character
+    r'{"summary": "grin \uD83D\uDE00 and \uD83D\uDE4F"}',
+    r'{"summary": "\uD83D\uDE00\uD83D\uDE00"}',
+    # Lone surrogates are kept as they are, like json.loads does
+    r'{"summary": "lone \uD83D then text"}',
+    r'{"summary": "lone at end \uD83D"}',
+    r'{"summary": "high then escape \uD83D\n"}',
+    r'{"summary": "high then high \uD83D\uD83D\uDE00"}',
+    r'{"summary": "low alone \uDE00"}',
+    r'{"keyPoints": ["a \uD83D\uDE00", "b"], "nested": {"x": [1, 2]}, "summary": "s"}',
+]
+
+
+def parse(document: str, chunk_size: int) -> dict:
+    parser = IncrementalJSONParser()
+    values = {}
+    deltas = {}
+    for start in range(0, len(document), chunk_size):
+        for kind, key, payload in parser.feed(document[start:start + chunk_size]):
+            if kind == "delta":
+                deltas[key] = deltas.get(key, "") + payload
+            else:
+                values[key] = payload
+    assert parser.done
+    # Streamed deltas add up to the final value
+    for key, text in deltas.items():
+        assert text == values[key]
+    return values
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 1000])
+def test_matches_json_loads(document: str, chunk_size: int) -> None:
+    assert parse(document, chunk_size) == json.loads(document)
+
+
+def test_surrogate_pair_is_one_character() -> None:
+    summary = parse(r'{"summary": "\uD83D\uDE00"}', 1)["summary"]
+    assert summary == "\U0001F600"
+    # Encodable, unlike a pair of lone surrogates
+    summary.encode("utf-8")
@@ -0,0 +1,87 @@
+"""With AGENT_PROFILE=latency no agent sleeps on the hot path, and provider errors fail the task."""
+import asyncio
+import os
+import sys
+import time
+from typing import List, Tuple
+
+import httpx
+
+from benchmarks.harness import free_port, serve, stub_env
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES = os.path.join(ROOT, "services")
+
+PROMPTS = {
+    "research": "Diabetes management in adults",
+    "review": "Diabetes is a chronic condition. Patients should monitor glucose daily.",
+    "presentation": "Deck: diabetes management overview",
+}
+
+
+def record_sleeps(monkeypatch) -> List[str]:
+    """Wrap asyncio.sleep and time.sleep so positive delays requested by services/ are recorded."""
+    seen: List[str] = []
+
+    def record(name: str, delay: float) -> None:
+        caller = sys._getframe(2)
+        if delay > 0 and caller.f_code.co_filename.startswith(SERVICES):
+            location = f"{os.path.relpath(caller.f_code.co_filename, ROOT)}:{caller.f_lineno}"
+            seen.append(f"{name}({delay}) at {location}")
+
+    async_sleep = asyncio.sleep
+    blocking_sleep = time.sleep
+
+    async def sleep(delay, result=None):
+        record("asyncio.sleep", delay)
+        return await async_sleep(delay, result)
+
+    def sleep_blocking(delay):
+        record("time.sleep", delay)
+        return blocking_sleep(delay)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    monkeypatch.setattr(time, "sleep", sleep_blocking)
+    return seen
+
+
+async def run_tasks(agents: Tuple[str, ...]) -> List[Tuple[str, str, str]]:
+    from services.main import app
+
+    results = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app", timeout=60) as http:
+        for agent in agents:
+            response = await http.post(
+                f"/{agent}/message",
+                json={
+                    "message": {"role": "user", "content": PROMPTS[agent]},
+                    "metadata": {"blocking": True, "cache": "bypass", "profile": "latency"},
+                },
+            )
+            response.raise_for_status()
+            body = response.json()
+            results.append((agent, body["state"], body["message"]["content"]))
+    return results
+
+
+def test_latency_profile_has_no_sleeps_or_mock_fallbacks(monkeypatch) -> None:
+    llm_port = free_port()
+    env = stub_env(llm_port, STUB_LLM_LATENCY_MS="0", STUB_LLM_TOKEN_MS="0")
+    with serve("benchmarks.stub_llm:app", llm_port, ROOT, env) as stub:
+        for name in ("OPENAI_API_KEY", "OPENAI_BASE_URL"):
+            monkeypatch.setenv(name, env[name])
+        monkeypatch.setenv("AGENT_PROFILE", "latency")
+        monkeypatch.setenv("RESULT_CACHE", "0")
+        monkeypatch.setenv("LLM_MAX_RETRIES", "0")
+        monkeypatch.delenv("GAMMA_API_KEY", raising=False)
+
+        sleeps = record_sleeps(monkeypatch)
+        for agent, state, content in asyncio.run(run_tasks(tuple(PROMPTS))):
+            assert state == "completed", f"{agent} ended {state}: {content}"
+        assert sleeps == []
+
+        # With the LLM gone a latency-profile task must fail rather than answer with [MOCK] content
+        stub.terminate()
+        stub.wait(timeout=10)
+        for agent, state, content in asyncio.run(run_tasks(("research", "review"))):
+            assert state == "failed" and "[MOCK]" not in content, f"{agent} answered {state}: {content[:80]}"
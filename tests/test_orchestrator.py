@@ -0,0 +1,67 @@
+import asyncio
+import json
+from typing import List
+
+import httpx
+import pytest
+
+from client.orchestrator import _run, summary_of
+
+
+def research_output(content: str, artifacts: List[dict]) -> dict:
+    return {"state": "completed", "message": {"role": "assistant", "content": content}, "artifacts": artifacts}
+
+
+def test_summary_of_matches_the_streamed_summary() -> None:
+    content = json.dumps({"summary": "Short summary.", "keyPoints": ["a"]})
+    assert summary_of(research_output(content, [{"summary": "Short summary.", "keyPoints": ["a"]}])) == "Short summary."
+    # A journaled result without artifacts still yields the summary, not the whole JSON
+    assert summary_of(research_output(content, [])) == "Short summary."
+    assert summary_of(research_output("plain fallback text", [])) == "plain fallback text"
+
+
+class FakeAgent:
+    def __init__(self) -> None:
+        self.canceled: List[str] = []
+
+    def release_all(self) -> None:
+        pass
+
+    async def wait(self, submitted: dict) -> dict:
+        return submitted
+
+    async def cancel(self, task_id: str) -> dict:
+        self.canceled.append(task_id)
+        return {"task_id": task_id, "state": "canceled"}
+
+
+class DownTriage(FakeAgent):
+    def __init__(self, research_sent: asyncio.Event) -> None:
+        super().__init__()
+        self.research_sent = research_sent
+
+    async def send(self, content: str, context_id: str, ref=None) -> dict:
+        await self.research_sent.wait()
+        raise httpx.ConnectError("triage unreachable")
+
+
+class SpeculativeResearch(FakeAgent):
+    def __init__(self, sent: asyncio.Event) -> None:
+        super().__init__()
+        self.sent = sent
+
+    async def send(self, content: str, context_id: str, ref=None) -> dict:
+        self.sent.set()
+        return {"context_id": context_id, "task_id": "research-1", "state": "queued", "message": {"content": ""}}
+
+
+def test_transport_errors_cancel_speculative_research() -> None:
+    async def main() -> List[str]:
+        sent = asyncio.Event()
+        research = SpeculativeResearch(sent)
+        agents = {"triage": DownTriage(sent), "research": research, "review": FakeAgent(), "presentation": FakeAgent()}
+        with pytest.raises(httpx.ConnectError):
+            await _run(agents, "diabetes", "ctx", {})
+        return research.canceled
+
+    assert asyncio.run(main()) == ["research-1"]
@@ -0,0 +1,57 @@
+import math
+import random
+
+from services.triage import routing
+from services.triage.routing import RoutingCache, _ngrams, normalize
+
+TOPICS = ["diabetes", "asthma", "hypertension", "copd", "migraine", "arthritis", "depression", "obesity", "stroke", "sepsis"]
+WORDS = [
+    "the", "latest", "treatment", "options", "for", "patients", "with", "and", "in", "of", "research", "evidence",
+    "on", "management", "guidelines", "children", "elderly", "risk", "factors", "therapy", "outcomes", "clinical",
+]
+
+
+def prompt(rng: random.Random) -> str:
+    words = [rng.choice(TOPICS if rng.random() < 0.3 else WORDS) for _ in range(rng.randint(8, 40))]
+    return normalize(" ".join(words) + f" case {rng.randint(0, 10 ** 6)}")
+
+
+def brute_force(cache: RoutingCache, query: str) -> float:
+    """The best cosine score over every cached prompt."""
+    vector = _ngrams(query)
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    return max(
+        sum(weight * other[gram] for gram, weight in vector.items() if gram in other) / (norm * other_norm)
+        for _, _, other, other_norm in cache._entries.values()
+    )
+
+
+def test_similar_lookup_agrees_with_a_full_scan(monkeypatch) -> None:
+    monkeypatch.setattr(routing, "RULES_ENABLED", False)
+    rng = random.Random(7)
+    cache = RoutingCache(max_size=1024)
+    for _ in range(1024):
+        cache.store(prompt(rng), "medical_research")
+    stored = list(cache._entries)
+
+    queries = [key + " please" for key in rng.sample(stored, 30)]
+    queries += [" ".join(rng.sample(key.split(), len(key.split()))) for key in rng.sample(stored, 30)]
+    queries += [prompt(rng) for _ in range(30)]
+    for query in queries:
+        found = cache.similar(query) is not None
+        assert found == (brute_force(cache, query) >= cache.threshold), query
+
+
+def test_exact_match_and_expiry(monkeypatch) -> None:
+    monkeypatch.setattr(routing, "RULES_ENABLED", False)
+    cache = RoutingCache(ttl_s=0.0)
+    cache.store("slides on asthma care for children", "presentation")
+    assert cache.lookup("slides on asthma care for children") is None
+    assert cache.stats()["entries"] == 0
+
+    cache.ttl_s = 60.0
+    cache.store("slides on asthma care for children", "presentation")
+    assert cache.lookup("slides on asthma care for children") == ("presentation", "exact")
+    # Near matches are only found by the similarity search
+    assert cache.lookup("slides on asthma care for young children") is None
+    assert cache.similar("slides on asthma care for young children") == ("presentation", "similar")
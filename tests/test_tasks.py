@@ -0,0 +1,59 @@
+import asyncio
+
+from services.common.schemas import Message, TaskState
+from services.common.tasks import TaskEngine, TaskResult
+from services.common.taskstore import TaskStore
+
+
+def engine(name: str) -> TaskEngine:
+    return TaskEngine(name, TaskStore(name, spill_dir=""), concurrency=1, max_queue=10)
+
+
+async def until_working(engine: TaskEngine, task_id: str) -> None:
+    while engine.tasks[task_id].state != TaskState.working:
+        await asyncio.sleep(0.01)
+
+
+def test_cancel_waits_for_the_job_to_stop() -> None:
+    async def main() -> None:
+        tasks = engine("cancel-test")
+
+        async def job(task_id: str) -> TaskResult:
+            await asyncio.sleep(30)
+            return TaskResult(message=Message(role="assistant", content="done"))
+
+        tasks.submit("running", "ctx", job)
+        tasks.submit("queued", "ctx", job)
+        await until_working(tasks, "running")
+
+        assert await tasks.cancel_and_wait("running")
+        assert tasks.tasks["running"].state == TaskState.canceled
+        assert await tasks.cancel_and_wait("queued")
+        assert tasks.tasks["queued"].state == TaskState.canceled
+        assert not await tasks.cancel_and_wait("unknown")
+
+    asyncio.run(main())
+
+
+def test_cancel_gives_up_on_a_job_that_does_not_stop() -> None:
+    async def main() -> None:
+        tasks = engine("cancel-stuck-test")
+        release = asyncio.Event()
+
+        async def job(task_id: str) -> TaskResult:
+            while not release.is_set():
+                try:
+                    await release.wait()
+                except asyncio.CancelledError:
+                    pass
+            return TaskResult(message=Message(role="assistant", content="done"))
+
+        tasks.submit("stuck", "ctx", job)
+        await until_working(tasks, "stuck")
+        started = asyncio.get_running_loop().time()
+        assert await tasks.cancel_and_wait("stuck", timeout_s=0.2)
+        assert 0.2 <= asyncio.get_running_loop().time() - started < 2
+        assert tasks.tasks["stuck"].state == TaskState.working
+        release.set()
+
+    asyncio.run(main())
@@ -17,13 +17,41 @@ import { History, Layout, Cpu, Trash2, Radio } from "lucide-react";
 
 // API Configuration - use localhost to match frontend origin
 // API Configuration - Unified Backend
+const API_BASE = "http://localhost:8000";
 const API_URLS = {
-  triage: "http://localhost:8000/triage",
-  research: "http://localhost:8000/research",
-  review: "http://localhost:8000/review",
-  presentation: "http://localhost:8000/presentation"
+  triage: `${API_BASE}/triage`,
+  research: `${API_BASE}/research`,
+  review: `${API_BASE}/review`,
+  presentation: `${API_BASE}/presentation`
 };
 
+// Request message forwarding an agent's reply: large replies carry an artifact
+// ref, so only the hash crosses the wire and the next agent resolves it
+function forwardMessage(agent, message) {
+  if (!message.ref) return { role: "user", content: message.content };
+  return { role: "user", ref: { ...message.ref, url: `${API_URLS[agent]}/artifacts/${message.ref.hash}` } };
+}
+
+// A terminal event's reply; a large one carries only its ref, so fetch the text once for display
+async function stageMessage(agent, final) {
+  const message = final.message;
+  if (!message) throw new Error(`${agent} task ${final.task_id} finished without a reply`);
+  if (!message.ref || message.content) return message;
+  const res = await fetch(`${API_URLS[agent]}/artifacts/${message.ref.hash}`);
+  if (!res.ok) throw new Error(`${agent} artifact error: ${res.status}`);
+  return { ...message, content: await res.text() };
+}
+
+// The pipeline in progress, kept across reloads so the UI can reattach to it
+const ACTIVE_PIPELINE_KEY = "a2a.activePipeline";
+
+// Each stage's latest task for a context, as journaled by the agents
+async function fetchJournal(contextId) {
+  const res = await fetch(`${API_BASE}/contexts/${contextId}/journal`);
+  if (!res.ok) throw new Error(`Journal error: ${res.status}`);
+  return (await res.json()).stages;
+}
+
 export default function App() {
   // A2A Demo App - Force Refresh
   const [prompt, setPrompt] = useState("");
@@ -36,6 +64,7 @@ export default function App() {
   });
   const [logs, setLogs] = useState([]);
   const [artifacts, setArtifacts] = useState([]);
+  const [liveText, setLiveText] = useState({});
   const [taskId, setTaskId] = useState(null);
   const [contextId, setContextId] = useState(null);
 
@@ -57,6 +86,23 @@ export default function App() {
   // Track pipeline completion for session saving
   const pipelineResultRef = useRef(null);
 
+  // An unfinished pipeline from an earlier run or page load, offered for resume
+  const [resumable, setResumable] = useState(null);
+
+  useEffect(() => {
+    const saved = JSON.parse(localStorage.getItem(ACTIVE_PIPELINE_KEY) || "null");
+    if (!saved) return;
+    fetchJournal(saved.contextId)
+      .then((stages) => {
+        if (stages.presentation?.state === "completed") {
+          localStorage.removeItem(ACTIVE_PIPELINE_KEY);
+        } else {
+          setResumable(saved);
+        }
+      })
+      .catch(() => setResumable(saved));
+  }, []);
+
   // A2A Protocol Log state
   const [a2aMessages, setA2aMessages] = useState([]);
 
@@ -132,57 +178,92 @@ export default function App() {
     setPipelineState((prev) => ({ ...prev, [stage]: status }));
   };
 
-  const subscribeToStream = (serviceUrl, taskId, stageName) => {
-    return new Promise((resolve) => {
-      const eventSource = new EventSource(`${serviceUrl}/message/stream?task_id=${taskId}`);
+  // One EventSource per pipeline: the backend multiplexes every agent's events
+  // for the context onto it, tagged with the agent and task_id
+  const openContextStream = (contextId) => {
+    const eventSource = new EventSource(`${API_BASE}/contexts/${contextId}/stream`);
+    const finished = {};
+    const waiters = {};
+
+    const finish = (taskId, data) => {
+      finished[taskId] = data;
+      if (waiters[taskId]) {
+        waiters[taskId](data);
+        delete waiters[taskId];
+      }
+    };
 
-      eventSource.onmessage = (event) => {
-        const data = JSON.parse(event.data);
-        if (data.event === "task-status") {
-          // Mapping backend state to UI status
-          let status = "Working";
-          if (data.state === "completed") status = "Completed";
-          if (data.state === "failed") status = "Failed";
+    eventSource.onmessage = (event) => {
+      const data = JSON.parse(event.data);
+      const stageName = data.agent;
+      if (data.event === "task-status") {
+        // Mapping backend state to UI status
+        let status = "Working";
+        if (data.state === "completed") status = "Completed";
+        if (data.state === "failed") status = "Failed";
 
-          updateStageStatus(stageName, status);
-          if (data.detail) addLog(`${stageName}: ${status}`, data.detail);
+        updateStageStatus(stageName, status);
+        if (data.detail) addLog(`${stageName}: ${status}`, data.detail);
 
-          // Log streaming event to A2A log
-          logA2AMessage("stream", stageName, data, `state: ${data.state}${data.detail ? `, detail: ${data.detail.slice(0, 50)}...` : ""}`);
+        // Log streaming event to A2A log
+        logA2AMessage("stream", stageName, data, `state: ${data.state}${data.detail ? `, detail: ${data.detail.slice(0, 50)}...` : ""}`);
 
-          if (data.state === "completed" || data.state === "failed") {
-            eventSource.close();
-            resolve(data.state);
-          }
-        } else if (data.event === "task-artifact") {
-          // Handle artifacts
-          if (data.artifact.gammaUrl) {
-            setArtifacts((prev) => [...prev, { title: "Gamma Deck", detail: "Presentation Generated", url: data.artifact.gammaUrl }]);
-          } else if (data.artifact.summary) {
-            setArtifacts((prev) => [...prev, { title: "Research Summary", detail: "Summary generated", data: data.artifact }]);
-          } else if (data.artifact.slideOutline) {
-            setArtifacts((prev) => [...prev, { title: "Slide Outline", detail: "Fallback generation", data: data.artifact }]);
-          } else if (data.artifact.revisedSummary) {
-            setArtifacts((prev) => [...prev, { title: "Review Feedback", detail: "Content reviewed", data: data.artifact }]);
-          } else if (data.artifact.progress) {
-            addLog(`${stageName} Progress`, data.artifact.progress);
-          }
+        if (data.state === "completed" || data.state === "failed" || data.state === "canceled") {
+          finish(data.task_id, data);
         }
-      };
+      } else if (data.event === "task-artifact") {
+        // Token deltas streamed while the LLM is still generating
+        if (data.artifact.delta !== undefined) {
+          setLiveText((prev) => ({ ...prev, [stageName]: (prev[stageName] || "") + data.artifact.delta }));
+          return;
+        }
+        // Handle artifacts
+        if (data.artifact.gammaUrl) {
+          setArtifacts((prev) => [...prev, { title: "Gamma Deck", detail: "Presentation Generated", url: data.artifact.gammaUrl }]);
+        } else if (data.artifact.summary) {
+          setArtifacts((prev) => [...prev, { title: "Research Summary", detail: "Summary generated", data: data.artifact }]);
+        } else if (data.artifact.slideOutline) {
+          setArtifacts((prev) => [...prev, { title: "Slide Outline", detail: "Fallback generation", data: data.artifact }]);
+        } else if (data.artifact.revisedSummary) {
+          setArtifacts((prev) => [...prev, { title: "Review Feedback", detail: "Content reviewed", data: data.artifact }]);
+        } else if (data.artifact.progress) {
+          addLog(`${stageName} Progress`, data.artifact.progress);
+        }
+      }
+    };
 
-      eventSource.onerror = () => {
-        eventSource.close();
-        resolve("failed");
-      };
-    });
+    eventSource.onerror = () => {
+      // The browser reconnects on its own and resumes after the last event id it saw
+      if (eventSource.readyState !== EventSource.CLOSED) {
+        addDebugLog(`[ContextStream] Interrupted, reconnecting (context ${contextId})`);
+        return;
+      }
+      Object.keys(waiters).forEach((taskId) => finish(taskId, { task_id: taskId, state: "failed", artifacts: [] }));
+    };
+
+    return {
+      // Resolves with the task's final status event, which carries its artifacts and reply
+      waitFor: (taskId) => {
+        if (finished[taskId]) return Promise.resolve(finished[taskId]);
+        if (eventSource.readyState === EventSource.CLOSED) return Promise.resolve({ task_id: taskId, state: "failed", artifacts: [] });
+        return new Promise((resolve) => { waiters[taskId] = resolve; });
+      },
+      close: () => eventSource.close()
+    };
   };
 
-  const runPipeline = async () => {
-    if (!prompt) return;
+  // With `resume` ({ contextId, prompt }) stages the journal records as completed are
+  // reused and stages still running are followed instead of being sent again
+  const runPipeline = async (resume = null) => {
+    const pipelinePrompt = resume?.prompt ?? prompt;
+    if (!pipelinePrompt) return;
+    if (resume) setPrompt(resume.prompt);
+    setResumable(null);
 
     setIsRunning(true);
     setLogs([]);
     setArtifacts([]);
+    setLiveText({});
     setPipelineState({
       triage: "Queued",
       research: "Queued",
@@ -190,61 +271,81 @@ export default function App() {
       presentation: "Queued"
     });
 
-    // Helper to fetch artifacts from an agent
-    const fetchArtifacts = async (serviceUrl, taskId, stageName) => {
-      const controller = new AbortController();
-      const timeoutId = setTimeout(() => controller.abort(), 5000); // 5s timeout
+    // Final artifacts arrive on each task's terminal event; no resubscribe round trip
+    const showArtifacts = (stageName, artifacts = []) => {
+      addDebugLog(`[Artifacts] ${stageName}: ${artifacts.length} artifacts`);
+      artifacts.forEach(artifact => {
+        addDebugLog(`[Artifacts] Artifact keys: ${Object.keys(artifact).join(', ')}`);
+
+        if (artifact.gammaUrl) {
+          setArtifacts(prev => [...prev, { title: "Gamma Deck", detail: "Presentation Generated", url: artifact.gammaUrl, data: artifact }]);
+        } else if (artifact.summary) {
+          setArtifacts(prev => [...prev, { title: "Research Summary", detail: `From ${stageName}`, data: artifact }]);
+        } else if (artifact.revisedSummary) {
+          setArtifacts(prev => [...prev, { title: "Review Feedback", detail: "Content reviewed", data: artifact }]);
+        } else if (artifact.slideOutline) {
+          setArtifacts(prev => [...prev, { title: "Slide Outline", detail: "Fallback generation", data: artifact }]);
+        } else if (artifact.route) {
+          addLog(`Triage Decision`, `Routed to: ${artifact.route}`);
+        } else if (artifact.error) {
+          addLog(`${stageName} Error`, artifact.error);
+        } else {
+          // Catch-all for any unrecognized artifacts
+          setArtifacts(prev => [...prev, { title: `${stageName} Output`, detail: "Unknown format", data: artifact }]);
+        }
+      });
+    };
 
+    // Open the pipeline's single event stream before the first request
+    const pipelineContextId = resume?.contextId ?? crypto.randomUUID();
+    setContextId(pipelineContextId);
+    localStorage.setItem(ACTIVE_PIPELINE_KEY, JSON.stringify({ contextId: pipelineContextId, prompt: pipelinePrompt }));
+    const stream = openContextStream(pipelineContextId);
+
+    let journal = {};
+    if (resume) {
       try {
-        addDebugLog(`[FetchArtifacts] Starting for ${stageName} (Task: ${taskId})`);
+        journal = await fetchJournal(pipelineContextId);
+      } catch (e) {
+        addLog("Resume", `Journal unavailable, starting over: ${e.message}`);
+      }
+    }
+
+    // A stage's terminal event; anything but completed stops the pipeline before its output is handed on
+    const completedStage = (stage, final) => {
+      if (final.state !== "completed") throw new Error(`${stage} task ${final.state}`);
+      return final;
+    };
 
-        const res = await fetch(`${serviceUrl}/tasks/resubscribe`, {
+    // A journaled stage: completed ones are reused, running ones reattached to; null means run it
+    const resumeStage = async (stage) => {
+      const entry = journal[stage];
+      if (!entry || !["completed", "queued", "working"].includes(entry.state)) return null;
+      let status = entry;
+      if (entry.state === "completed") {
+        addLog(`${stage}: Resumed`, "Completed in an earlier attempt; reusing its output");
+      } else {
+        addLog(`${stage}: Reattached`, `Following task ${entry.task_id.slice(0, 8)}...`);
+        completedStage(stage, await stream.waitFor(entry.task_id));
+        const res = await fetch(`${API_URLS[stage]}/tasks/resubscribe`, {
           method: "POST",
           headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({ task_id: taskId }),
-          signal: controller.signal
+          body: JSON.stringify({ task_id: entry.task_id })
         });
-        clearTimeout(timeoutId);
-
-        addDebugLog(`[FetchArtifacts] Response status: ${res.status}`);
-
-        if (!res.ok) {
-          throw new Error(`Server returned ${res.status}`);
-        }
-
-        const data = await res.json();
-        addDebugLog(`[FetchArtifacts] Data received: ${JSON.stringify(data.artifacts?.length || 0)} artifacts`);
-
-        if (data.artifacts?.length) {
-          data.artifacts.forEach(artifact => {
-            addDebugLog(`[FetchArtifacts] Artifact keys: ${Object.keys(artifact).join(', ')}`);
-
-            if (artifact.gammaUrl) {
-              setArtifacts(prev => [...prev, { title: "Gamma Deck", detail: "Presentation Generated", url: artifact.gammaUrl, data: artifact }]);
-            } else if (artifact.summary) {
-              setArtifacts(prev => [...prev, { title: "Research Summary", detail: `From ${stageName}`, data: artifact }]);
-            } else if (artifact.revisedSummary) {
-              setArtifacts(prev => [...prev, { title: "Review Feedback", detail: "Content reviewed", data: artifact }]);
-            } else if (artifact.slideOutline) {
-              setArtifacts(prev => [...prev, { title: "Slide Outline", detail: "Fallback generation", data: artifact }]);
-            } else if (artifact.route) {
-              addLog(`Triage Decision`, `Routed to: ${artifact.route}`);
-            } else if (artifact.error) {
-              addLog(`${stageName} Error`, artifact.error);
-            } else {
-              // Catch-all for any unrecognized artifacts
-              setArtifacts(prev => [...prev, { title: `${stageName} Output`, detail: "Unknown format", data: artifact }]);
-            }
-          });
-        }
-        return data;
-      } catch (e) {
-        clearTimeout(timeoutId);
-        console.error(`Failed to fetch artifacts for ${stageName}:`, e);
-        addDebugLog(`[FetchArtifacts] FAILED for ${stageName}: ${e.message}`);
-        // Return null but don't crash pipeline
-        return { artifacts: [] };
+        if (!res.ok) throw new Error(`${stage} resubscribe error: ${res.status}`);
+        status = await res.json();
       }
+      return {
+        // Content, not the ref: a journaled output can outlive the artifact store
+        data: {
+          task_id: entry.task_id,
+          context_id: pipelineContextId,
+          state: status.state,
+          message: { ...status.message, ref: null },
+          metadata: entry.metadata || {}
+        },
+        artifacts: status.artifacts || []
+      };
     };
 
     try {
@@ -254,33 +355,39 @@ export default function App() {
 
       let triageData;
       try {
-        // GENERATE ID CLIENT SIDE
-        const triageTaskId = crypto.randomUUID();
-
-        // Start streaming concurrently
-        const streamPromise = subscribeToStream(API_URLS.triage, triageTaskId, "triage");
-
-        // Log A2A request
-        const triageRequestBody = {
-          task_id: triageTaskId,
-          message: { role: "user", content: prompt }
-        };
-        logA2AMessage("request", "triage", triageRequestBody, `task_id: ${triageTaskId.slice(0, 8)}..., content: "${prompt.slice(0, 40)}..."`);
+        const resumed = await resumeStage("triage");
+        if (resumed) {
+          triageData = resumed.data;
+        } else {
+          // GENERATE ID CLIENT SIDE
+          const triageTaskId = crypto.randomUUID();
+
+          // Events arrive on the pipeline's context stream
+          const streamPromise = stream.waitFor(triageTaskId);
+
+          // Log A2A request
+          const triageRequestBody = {
+            task_id: triageTaskId,
+            context_id: pipelineContextId,
+            message: { role: "user", content: pipelinePrompt }
+          };
+          logA2AMessage("request", "triage", triageRequestBody, `task_id: ${triageTaskId.slice(0, 8)}..., content: "${pipelinePrompt.slice(0, 40)}..."`);
 
-        const triageRes = await fetch(`${API_URLS.triage}/message`, {
-          method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify(triageRequestBody)
-        });
+          const triageRes = await fetch(`${API_URLS.triage}/message`, {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify(triageRequestBody)
+          });
 
-        if (!triageRes.ok) throw new Error(`Triage service error: ${triageRes.status}`);
-        triageData = await triageRes.json();
+          if (!triageRes.ok) throw new Error(`Triage service error: ${triageRes.status}`);
+          triageData = await triageRes.json();
 
-        // Log A2A response
-        logA2AMessage("response", "triage", triageData, `context_id: ${triageData.context_id?.slice(0, 8)}...`);
+          // Log A2A response
+          logA2AMessage("response", "triage", triageData, `context_id: ${triageData.context_id?.slice(0, 8)}...`);
 
-        // Wait for stream to finish (optional, but good for UI sync)
-        await streamPromise;
+          // Routing is only trusted once the task has completed
+          completedStage("triage", await streamPromise);
+        }
 
       } catch (e) {
         updateStageStatus("triage", "Failed");
@@ -289,12 +396,10 @@ export default function App() {
       }
 
       setTaskId(triageData.task_id);
-      setContextId(triageData.context_id);
 
-      // Fetch actual route from triage artifacts
-      const triageArtifacts = await fetchArtifacts(API_URLS.triage, triageData.task_id, "triage");
+      // Triage returns its route inline
+      const route = triageData.metadata?.route ?? "medical_research";
       updateStageStatus("triage", "Completed");
-      const route = triageArtifacts?.artifacts?.[0]?.route ?? "medical_research";
       addLog("Routing Complete", `Selected route: ${route}`);
 
       if (route === "medical_research") {
@@ -303,36 +408,43 @@ export default function App() {
         updateStageStatus("research", "Working");
         let researchData;
         try {
-          const researchTaskId = generateUUID();
-          addDebugLog(`Generated Research TaskID: ${researchTaskId}`);
-
-          const streamPromise = subscribeToStream(API_URLS.research, researchTaskId, "research");
-          addDebugLog("Subscribed to Research Stream");
-
-          addDebugLog("Sending Research Request...");
-          const researchRequestBody = {
-            task_id: researchTaskId,
-            context_id: triageData.context_id,
-            message: { role: "user", content: prompt }
-          };
-          logA2AMessage("request", "research", researchRequestBody, `task_id: ${researchTaskId.slice(0, 8)}..., prompt: "${prompt.slice(0, 30)}..."`);
-
-          const researchRes = await fetch(`${API_URLS.research}/message`, {
-            method: "POST",
-            headers: { "Content-Type": "application/json" },
-            body: JSON.stringify(researchRequestBody)
-          });
-
-          addDebugLog(`Research Request Status: ${researchRes.status}`);
-          if (!researchRes.ok) throw new Error(`Research service error: ${researchRes.status}`);
-          researchData = await researchRes.json();
-          logA2AMessage("response", "research", researchData, `context_id: ${researchData.context_id?.slice(0, 8)}...`);
-          addDebugLog("Research Response Parsed");
-
-          await streamPromise;
-          addDebugLog("Research Stream Completed");
-          await fetchArtifacts(API_URLS.research, researchData.task_id, "research");
-          updateStageStatus("research", "Completed");
+          const resumed = await resumeStage("research");
+          if (resumed) {
+            researchData = resumed.data;
+            showArtifacts("research", resumed.artifacts);
+            updateStageStatus("research", "Completed");
+          } else {
+            const researchTaskId = generateUUID();
+            addDebugLog(`Generated Research TaskID: ${researchTaskId}`);
+
+            const streamPromise = stream.waitFor(researchTaskId);
+
+            addDebugLog("Sending Research Request...");
+            const researchRequestBody = {
+              task_id: researchTaskId,
+              context_id: pipelineContextId,
+              message: { role: "user", content: pipelinePrompt }
+            };
+            logA2AMessage("request", "research", researchRequestBody, `task_id: ${researchTaskId.slice(0, 8)}..., prompt: "${pipelinePrompt.slice(0, 30)}..."`);
+
+            const researchRes = await fetch(`${API_URLS.research}/message`, {
+              method: "POST",
+              headers: { "Content-Type": "application/json" },
+              body: JSON.stringify(researchRequestBody)
+            });
+
+            addDebugLog(`Research Request Status: ${researchRes.status}`);
+            if (!researchRes.ok) throw new Error(`Research service error: ${researchRes.status}`);
+            const researchAccepted = await researchRes.json();
+            logA2AMessage("response", "research", researchAccepted, `context_id: ${researchAccepted.context_id?.slice(0, 8)}...`);
+
+            // The request returns once queued; the result arrives on the context stream
+            const researchFinal = completedStage("research", await streamPromise);
+            researchData = { ...researchAccepted, state: researchFinal.state, message: await stageMessage("research", researchFinal) };
+            showArtifacts("research", researchFinal.artifacts);
+            addDebugLog("Research Stream Completed");
+            updateStageStatus("research", "Completed");
+          }
         } catch (e) {
           updateStageStatus("research", "Failed");
           addLog("Research Failed", e.message);
@@ -344,30 +456,38 @@ export default function App() {
         updateStageStatus("review", "Working");
         let reviewData;
         try {
-          const reviewTaskId = crypto.randomUUID();
-
-          const streamPromise = subscribeToStream(API_URLS.review, reviewTaskId, "review");
-
-          const reviewRequestBody = {
-            task_id: reviewTaskId,
-            context_id: triageData.context_id,
-            message: { role: "user", content: researchData.message.content }
-          };
-          logA2AMessage("request", "review", reviewRequestBody, `task_id: ${reviewTaskId.slice(0, 8)}..., research: "${researchData.message.content.slice(0, 30)}..."`);
-
-          const reviewRes = await fetch(`${API_URLS.review}/message`, {
-            method: "POST",
-            headers: { "Content-Type": "application/json" },
-            body: JSON.stringify(reviewRequestBody)
-          });
-
-          if (!reviewRes.ok) throw new Error(`Review service error: ${reviewRes.status}`);
-          reviewData = await reviewRes.json();
-          logA2AMessage("response", "review", reviewData, `context_id: ${reviewData.context_id?.slice(0, 8)}...`);
-
-          await streamPromise;
-          await fetchArtifacts(API_URLS.review, reviewData.task_id, "review");
-          updateStageStatus("review", "Completed");
+          const resumed = await resumeStage("review");
+          if (resumed) {
+            reviewData = resumed.data;
+            showArtifacts("review", resumed.artifacts);
+            updateStageStatus("review", "Completed");
+          } else {
+            const reviewTaskId = crypto.randomUUID();
+
+            const streamPromise = stream.waitFor(reviewTaskId);
+
+            const reviewRequestBody = {
+              task_id: reviewTaskId,
+              context_id: pipelineContextId,
+              message: forwardMessage("research", researchData.message)
+            };
+            logA2AMessage("request", "review", reviewRequestBody, `task_id: ${reviewTaskId.slice(0, 8)}..., research: "${researchData.message.content.slice(0, 30)}..."`);
+
+            const reviewRes = await fetch(`${API_URLS.review}/message`, {
+              method: "POST",
+              headers: { "Content-Type": "application/json" },
+              body: JSON.stringify(reviewRequestBody)
+            });
+
+            if (!reviewRes.ok) throw new Error(`Review service error: ${reviewRes.status}`);
+            const reviewAccepted = await reviewRes.json();
+            logA2AMessage("response", "review", reviewAccepted, `context_id: ${reviewAccepted.context_id?.slice(0, 8)}...`);
+
+            const reviewFinal = completedStage("review", await streamPromise);
+            reviewData = { ...reviewAccepted, state: reviewFinal.state, message: await stageMessage("review", reviewFinal) };
+            showArtifacts("review", reviewFinal.artifacts);
+            updateStageStatus("review", "Completed");
+          }
 
 
           // --- HUMAN IN THE LOOP CHECKPOINT ---
@@ -386,8 +506,10 @@ export default function App() {
           setAwaitingApproval(false); // Hide modal
           addLog("Approval Granted", "User approved content for presentation.");
 
-          // Use approved/edited content for presentation
-          reviewData.message.content = approvedContent;
+          // Use approved/edited content for presentation; an edit invalidates the ref
+          if (approvedContent !== reviewData.message.content) {
+            reviewData.message = { ...reviewData.message, content: approvedContent, ref: null };
+          }
 
         } catch (e) {
           updateStageStatus("review", "Failed");
@@ -398,30 +520,35 @@ export default function App() {
         // 4. Presentation
         updateStageStatus("presentation", "Working");
         try {
-          const presentTaskId = crypto.randomUUID();
+          const resumed = await resumeStage("presentation");
+          if (resumed) {
+            showArtifacts("presentation", resumed.artifacts);
+            updateStageStatus("presentation", "Completed");
+          } else {
+            const presentTaskId = crypto.randomUUID();
 
-          const streamPromise = subscribeToStream(API_URLS.presentation, presentTaskId, "presentation");
+            const streamPromise = stream.waitFor(presentTaskId);
 
-          const presentRequestBody = {
-            task_id: presentTaskId,
-            context_id: triageData.context_id,
-            message: { role: "user", content: reviewData.message.content }
-          };
-          logA2AMessage("request", "presentation", presentRequestBody, `task_id: ${presentTaskId.slice(0, 8)}..., content: "${reviewData.message.content.slice(0, 30)}..."`);
-
-          const presentRes = await fetch(`${API_URLS.presentation}/message`, {
-            method: "POST",
-            headers: { "Content-Type": "application/json" },
-            body: JSON.stringify(presentRequestBody)
-          });
-
-          if (!presentRes.ok) throw new Error(`Presentation service error: ${presentRes.status}`);
-          const presentData = await presentRes.json();
-          logA2AMessage("response", "presentation", presentData, `context_id: ${presentData.context_id?.slice(0, 8)}...`);
-
-          await streamPromise;
-          await fetchArtifacts(API_URLS.presentation, presentData.task_id, "presentation");
-          updateStageStatus("presentation", "Completed");
+            const presentRequestBody = {
+              task_id: presentTaskId,
+              context_id: pipelineContextId,
+              message: forwardMessage("review", reviewData.message)
+            };
+            logA2AMessage("request", "presentation", presentRequestBody, `task_id: ${presentTaskId.slice(0, 8)}..., content: "${reviewData.message.content.slice(0, 30)}..."`);
+
+            const presentRes = await fetch(`${API_URLS.presentation}/message`, {
+              method: "POST",
+              headers: { "Content-Type": "application/json" },
+              body: JSON.stringify(presentRequestBody)
+            });
+
+            if (!presentRes.ok) throw new Error(`Presentation service error: ${presentRes.status}`);
+            const presentAccepted = await presentRes.json();
+            logA2AMessage("response", "presentation", presentAccepted, `context_id: ${presentAccepted.context_id?.slice(0, 8)}...`);
+
+            showArtifacts("presentation", completedStage("presentation", await streamPromise).artifacts);
+            updateStageStatus("presentation", "Completed");
+          }
 
           // Mark pipeline as successful for session saving
           addLog("Pipeline Complete", "All stages completed successfully");
@@ -442,26 +569,30 @@ export default function App() {
         updateStageStatus("review", "Skipped");
         updateStageStatus("presentation", "Working");
         try {
-          const presentTaskId = crypto.randomUUID();
-
-          const streamPromise = subscribeToStream(API_URLS.presentation, presentTaskId, "presentation");
-
-          const presentRes = await fetch(`${API_URLS.presentation}/message`, {
-            method: "POST",
-            headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({
-              task_id: presentTaskId,
-              context_id: triageData.context_id,
-              message: { role: "user", content: prompt }
-            })
-          });
-
-          if (!presentRes.ok) throw new Error(`Presentation service error: ${presentRes.status}`);
-          const presentData = await presentRes.json();
-
-          await streamPromise;
-          await fetchArtifacts(API_URLS.presentation, presentData.task_id, "presentation");
-          updateStageStatus("presentation", "Completed");
+          const resumed = await resumeStage("presentation");
+          if (resumed) {
+            showArtifacts("presentation", resumed.artifacts);
+            updateStageStatus("presentation", "Completed");
+          } else {
+            const presentTaskId = crypto.randomUUID();
+
+            const streamPromise = stream.waitFor(presentTaskId);
+
+            const presentRes = await fetch(`${API_URLS.presentation}/message`, {
+              method: "POST",
+              headers: { "Content-Type": "application/json" },
+              body: JSON.stringify({
+                task_id: presentTaskId,
+                context_id: pipelineContextId,
+                message: { role: "user", content: pipelinePrompt }
+              })
+            });
+
+            if (!presentRes.ok) throw new Error(`Presentation service error: ${presentRes.status}`);
+
+            showArtifacts("presentation", completedStage("presentation", await streamPromise).artifacts);
+            updateStageStatus("presentation", "Completed");
+          }
 
           // Mark pipeline as successful for session saving
           addLog("Pipeline Complete", "Direct presentation completed");
@@ -481,13 +612,25 @@ export default function App() {
       console.error(e);
       addLog("Pipeline Error", `Stopped due to: ${e.message}`);
       pipelineResultRef.current = null; // Mark as failed
+      // Stages after the failed one never ran
+      setPipelineState(prev => Object.fromEntries(Object.entries(prev).map(([stage, status]) => [
+        stage, ["Queued", "Working", "Awaiting Input"].includes(status) ? "Skipped" : status
+      ])));
     } finally {
+      stream.close();
       setIsRunning(false);
 
+      // Finished pipelines are forgotten; failed ones can be resumed from the journal
+      if (pipelineResultRef.current) {
+        localStorage.removeItem(ACTIVE_PIPELINE_KEY);
+      } else {
+        setResumable({ contextId: pipelineContextId, prompt: pipelinePrompt });
+      }
+
       // Save successful run only if we have valid result
       if (pipelineResultRef.current) {
         const result = pipelineResultRef.current;
-        saveSession(prompt, result);
+        saveSession(pipelinePrompt, result);
         setSessions(getSessions());
         addLog("Session Saved", "Run saved to history for replay");
       }
@@ -616,7 +759,12 @@ export default function App() {
                     <Button variant="outline" size="sm" onClick={() => setDebugMode(!debugMode)}>
                       {debugMode ? "Hide Debug" : "Show Debug"}
                     </Button>
-                    <Button onClick={runPipeline} disabled={isRunning || !prompt}>
+                    {resumable && !isRunning && (
+                      <Button variant="outline" onClick={() => runPipeline(resumable)}>
+                        Resume {resumable.contextId.slice(0, 6)}
+                      </Button>
+                    )}
+                    <Button onClick={() => runPipeline()} disabled={isRunning || !prompt}>
                       {isRunning ? "Running Pipeline..." : "Start New Run"}
                     </Button>
                   </div>
@@ -642,7 +790,13 @@ export default function App() {
                   <CardDescription>Live responses from the agent swarm.</CardDescription>
                 </CardHeader>
                 <CardContent className="space-y-4 max-h-[400px] overflow-y-auto">
-                  {logs.length === 0 && <p className="text-sm text-text-muted">No activity yet.</p>}
+                  {Object.entries(liveText).map(([stage, text]) => (
+                    <div key={stage} className="rounded-2xl border border-border bg-muted/30 p-4">
+                      <p className="text-sm font-medium text-text-primary capitalize">{stage} (live)</p>
+                      <p className="text-sm text-text-muted whitespace-pre-wrap">{text}</p>
+                    </div>
+                  ))}
+                  {logs.length === 0 && Object.keys(liveText).length === 0 && <p className="text-sm text-text-muted">No activity yet.</p>}
                   {logs.map((item, i) => (
                     <div
                       key={i}